@@ -0,0 +1,366 @@
+# backend/admission.py
+"""
+حماية الـ workers وقت الضغط:
+
+- admission control: كل endpoint له "class" (auth / list / bulk) بحد طلبات متزامنة.
+  الزايد ينتظر في طابور قصير (حجمه من ADMISSION_LIMITS "class=حد:طابور"، ولمدة
+  ADMISSION_QUEUE_TIMEOUT)، وإذا الطابور مليان أو خلص الوقت يرجع 503 + Retry-After فوراً —
+  فـ /health وتعليم المهام (بدون class) ما ينحبسون ورا login و القوائم الكبيرة.
+- rate limit (token bucket) لكل key — مستخدم، IP، أو IP+إيميل: @rate_limit("login", key=...) يرجع 429.
+
+الحالة في ذاكرة الـ process، أو مع ADMISSION_SQLITE_PATH في ملف SQLite مشترك
+فالحدود تنطبق على كل workers الـ gunicorn مجتمعين.
+
+الرد الـ streamed (قوائم JSON، تحميل ملفات) يمسك الـ slot لين يخلص إرساله (call_on_close)،
+مو لين teardown اللي يصير قبل أول byte.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+from cache import TTLCache
+
+# حد افتراضي لكل class: (طلبات متزامنة، طابور الانتظار)
+DEFAULT_LIMITS = {
+    "auth": (4, 8),  # scrypt
+    "list": (8, 16),  # قوائم كاملة وبحث
+    "bulk": (2, 4),  # استيراد أعضاء / batch مهام
+}
+
+
+def admission_class(name: str):
+    """يحط الـ endpoint في class محدود (تحت @bp.route مباشرة)"""
+
+    def decorator(fn):
+        fn.admission_class = name
+        return fn
+
+    return decorator
+
+
+def rate_limit(name: str, key):
+    """
+    token bucket لكل key (مستخدم، IP، IP+إيميل) حسب RATE_LIMITS[name] = (عدد، ثواني).
+    key دالة بدون arguments تنادى داخل الطلب؛ None = ما نحد.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            controller = current_app.extensions.get("admission")
+            if controller is not None:
+                retry_after = controller.take(name, key())
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_busy(retry_after: float):
+    response = jsonify({"msg": "Server is busy, please retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def too_many_requests(retry_after: float):
+    response = jsonify({"msg": "Too many requests, please retry later"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# ------------ Stores ------------
+
+class MemoryStore:
+    """الحالة في هذا الـ process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self._sequence = 0
+        self._buckets = {}  # name -> TTLCache(key -> (tokens, updated_at))
+
+    def acquire_slot(self, cls: str, limit: int):
+        with self._lock:
+            if self._active.get(cls, 0) >= limit:
+                return None
+            self._active[cls] = self._active.get(cls, 0) + 1
+            self._sequence += 1
+            return self._sequence
+
+    def release_slot(self, cls: str, slot) -> None:
+        with self._lock:
+            self._active[cls] -= 1
+
+    def active(self, cls: str) -> int:
+        return self._active.get(cls, 0)
+
+    def take_token(self, name: str, key, rate: float, capacity: int) -> float:
+        """0 لو مسموح، وإلا كم ثانية لين يتوفر token"""
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets.get(name)
+            if buckets is None:
+                # bucket ما انلمس طول مدة التعبئة = مليان، فنقدر ننساه
+                buckets = self._buckets[name] = TTLCache(maxsize=100000, ttl=capacity / rate)
+            tokens, updated = buckets.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                buckets.set(key, (tokens, now))
+                return (1 - tokens) / rate
+            buckets.set(key, (tokens - 1, now))
+            return 0.0
+
+
+class SQLiteStore:
+    """
+    الحالة في ملف SQLite مشترك بين الـ processes (BEGIN IMMEDIATE لكل عملية).
+    الـ slot اللي عمره أكثر من slot_ttl (process مات وهو ماسكه) ينحذف.
+    """
+
+    def __init__(self, path: str, slot_ttl: float = 60.0):
+        self.path = path
+        self.slot_ttl = slot_ttl
+        self._local = threading.local()
+        self._calls = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS admission_slots ("
+                "id INTEGER PRIMARY KEY, class TEXT NOT NULL, pid INTEGER NOT NULL, acquired_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_admission_slots_class ON admission_slots (class)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "name TEXT NOT NULL, key TEXT NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (name, key))"
+            )
+
+    def _connection(self):
+        # اتصال لكل thread، وجديد بعد fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            import sqlite3  # بس مع ADMISSION_SQLITE_PATH
+
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def acquire_slot(self, cls: str, limit: int):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admission_slots WHERE acquired_at < ?", (now - self.slot_ttl,))
+            (active,) = conn.execute("SELECT COUNT(*) FROM admission_slots WHERE class = ?", (cls,)).fetchone()
+            if active >= limit:
+                return None
+            return conn.execute(
+                "INSERT INTO admission_slots (class, pid, acquired_at) VALUES (?, ?, ?)",
+                (cls, os.getpid(), now),
+            ).lastrowid
+
+    def release_slot(self, cls: str, slot) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admission_slots WHERE id = ?", (slot,))
+
+    def active(self, cls: str) -> int:
+        (count,) = self._connection().execute(
+            "SELECT COUNT(*) FROM admission_slots WHERE class = ?", (cls,)
+        ).fetchone()
+        return count
+
+    def take_token(self, name: str, key, rate: float, capacity: int) -> float:
+        now = time.time()
+        key = str(key)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_buckets WHERE name = ? AND key = ?", (name, key)
+            ).fetchone()
+            tokens, updated = row or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            retry_after = (1 - tokens) / rate if tokens < 1 else 0.0
+            conn.execute(
+                "INSERT INTO rate_buckets (name, key, tokens, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name, key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, key, tokens if retry_after else tokens - 1, now),
+            )
+            self._calls += 1
+            if self._calls % 1000 == 0:
+                # buckets ما انلمست من زمان مليانة أصلاً
+                conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - 3600,))
+        return retry_after
+
+
+# ------------ Controller ------------
+
+class _ClassState:
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.waiting = 0
+        self.cond = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0  # الطابور مليان
+        self.timed_out = 0  # انتظر وما لقى مكان
+
+
+class AdmissionController:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.store = MemoryStore()
+        self.classes = {}
+        self.overrides = {}
+        self.queue_timeout = 1.0
+        self.retry_after = 1.0
+        # الـ release يصحّي المنتظر؛ والـ poll للـ release اللي صار في process ثاني (SQLite)
+        self.poll_seconds = 0.02
+        self.rate_limits = {}
+        self.rate_limited = {}
+
+    def init_app(self, app):
+        self.enabled = app.config.get("ADMISSION_ENABLED", True)
+        limits = {**DEFAULT_LIMITS, **(app.config.get("ADMISSION_LIMITS") or {})}
+        self.classes = {name: _ClassState(*limit) for name, limit in limits.items() if limit[0] > 0}
+        self.overrides = dict(app.config.get("ADMISSION_CLASSES") or {})
+        self.queue_timeout = app.config.get("ADMISSION_QUEUE_TIMEOUT", self.queue_timeout)
+        self.retry_after = app.config.get("ADMISSION_RETRY_AFTER", self.retry_after)
+        self.rate_limits = {
+            name: limit for name, limit in (app.config.get("RATE_LIMITS") or {}).items() if limit[0] > 0
+        }
+        self.rate_limited = {name: 0 for name in self.rate_limits}
+
+        path = app.config.get("ADMISSION_SQLITE_PATH")
+        self.store = SQLiteStore(path, app.config.get("ADMISSION_SLOT_TTL", 60.0)) if path else MemoryStore()
+
+        self.app = app
+        app.extensions["admission"] = self
+
+        if self.enabled and self.classes:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+
+    # ---------- Concurrency ----------
+
+    def class_for(self, endpoint):
+        if endpoint in self.overrides:
+            return self.overrides[endpoint] or None
+        view = current_app.view_functions.get(endpoint)
+        return getattr(view, "admission_class", None)
+
+    def _before_request(self):
+        if request.method == "OPTIONS":
+            return
+        cls = self.class_for(request.endpoint)
+        state = self.classes.get(cls)
+        if state is None:
+            return
+        slot = self.acquire(cls, state)
+        if slot is None:
+            return server_busy(self.retry_after)
+        g.admission_slot = (cls, slot)
+
+    def _after_request(self, response):
+        held = g.get("admission_slot")
+        if held is not None and response.is_streamed:
+            # الـ body ينبني وقت الإرسال بعد teardown — نفك الـ slot لما يخلص (أو العميل يقطع)
+            g.admission_slot = None
+            response.call_on_close(lambda: self.release(*held))
+        return response
+
+    def _teardown_request(self, exc):
+        held = g.pop("admission_slot", None)
+        if held is not None:
+            self.release(*held)
+
+    def acquire(self, cls: str, state: _ClassState):
+        """slot أو None (الطابور مليان / خلص وقت الانتظار)"""
+        slot = self.store.acquire_slot(cls, state.limit)
+        if slot is not None:
+            state.admitted += 1
+            return slot
+
+        with state.cond:
+            if state.waiting >= state.queue:
+                state.rejected += 1
+                return None
+            state.waiting += 1
+
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    state.timed_out += 1
+                    return None
+                with state.cond:
+                    state.cond.wait(min(remaining, self.poll_seconds))
+                slot = self.store.acquire_slot(cls, state.limit)
+                if slot is not None:
+                    state.admitted += 1
+                    return slot
+        finally:
+            with state.cond:
+                state.waiting -= 1
+
+    def release(self, cls: str, slot) -> None:
+        self.store.release_slot(cls, slot)
+        state = self.classes[cls]
+        with state.cond:
+            state.cond.notify()
+
+    # ---------- Rate limits ----------
+
+    def take(self, name: str, key) -> float:
+        """0 = مسموح، وإلا Retry-After بالثواني"""
+        limit = self.rate_limits.get(name)
+        if not self.enabled or limit is None or key is None:
+            return 0.0
+        count, seconds = limit
+        retry_after = self.store.take_token(name, key, count / seconds, count)
+        if retry_after:
+            self.rate_limited[name] += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "classes": {
+                name: {
+                    "limit": state.limit,
+                    "queue": state.queue,
+                    "active": self.store.active(name),
+                    "waiting": state.waiting,
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "timed_out": state.timed_out,
+                }
+                for name, state in self.classes.items()
+            },
+            "rate_limits": {
+                name: {"requests": count, "per_seconds": seconds, "limited": self.rate_limited[name]}
+                for name, (count, seconds) in self.rate_limits.items()
+            },
+        }
@@ -1,17 +1,50 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import hmac
 import os
+from functools import wraps
+
+import click
 from dotenv import load_dotenv
-from flask import Flask
+from flask import Flask, abort, request
 from flask_cors import CORS
-from sqlalchemy import text
 
-from extensions import db, jwt
+from extensions import (
+    admission,
+    batcher,
+    db,
+    file_processor,
+    hub,
+    identity_cache,
+    jwt,
+    metrics,
+    password_hasher,
+    profiler,
+    replica_router,
+    sql_stats,
+)
+from migrations import LATEST_VERSION, current_version, upgrade
+from startup import StartupTimer, dispose_after_fork
+
+# وقت استيراد Flask/SQLAlchemy/JWT (مرة وحدة لكل process)
+_IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
 
 # ------------------------------------------------------
 #                CREATE FLASK APP
 # ------------------------------------------------------
 def create_app():
+    global _IMPORT_MS
+
+    timer = StartupTimer()
+    # الاستيراد ينحسب لأول create_app في الـ process بس
+    timer.add("imports", _IMPORT_MS)
+    _IMPORT_MS = 0.0
+
     load_dotenv()
+    timer.mark("dotenv")
 
     app = Flask(__name__)
     app.url_map.strict_slashes = False  # يسمح /groups و /groups/
@@ -21,6 +54,25 @@ def create_app():
         "DATABASE_URL", "sqlite:///vsgp.db"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # replicas للقراءة (مفصولة بفواصل) — GET يقرأ منها، والكتابة على DATABASE_URL
+    app.config["DATABASE_REPLICA_URLS"] = os.getenv("DATABASE_REPLICA_URLS", "")
+    # بعد ما المستخدم يكتب، قراءاته تروح للـ primary كم ثانية (يشوف تعديله).
+    # العميل يرجّع هيدر X-Last-Write اللي يوصله مع رد الكتابة
+    app.config["REPLICA_READ_YOUR_WRITES_SECONDS"] = float(
+        os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", "5")
+    )
+    app.config["REPLICA_HEALTH_INTERVAL"] = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+    app.config["REPLICA_MAX_LAG_SECONDS"] = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+    # الترقيات تنشغل بـ `flask db-upgrade` قبل التشغيل؛ في dev نطبّقها تلقائياً
+    app.config["DB_AUTO_MIGRATE"] = os.getenv(
+        "DB_AUTO_MIGRATE", "1" if os.getenv("FLASK_ENV") == "development" else "0"
+    ) == "1"
+    # استعلام نسخة الـ schema وقت الإقلاع (ممكن نطفيه لو الـ deploy يضمن الترقية)
+    app.config["DB_SCHEMA_CHECK"] = os.getenv("DB_SCHEMA_CHECK", "1") == "1"
+    # المستخدم الافتراضي: بس لو طلبناه (أو dev) — وإلا `flask seed-admin`
+    app.config["DB_SEED"] = os.getenv(
+        "DB_SEED", "1" if os.getenv("FLASK_ENV") == "development" else "0"
+    ) == "1"
 
     # ----------- JWT -----------
     app.config["JWT_SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
@@ -29,9 +81,152 @@ def create_app():
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
 
     # ----------- UPLOADS -----------
-    upload_folder = os.path.join(os.path.dirname(__file__), "uploads")
+    upload_folder = os.getenv(
+        "UPLOAD_FOLDER", os.path.join(os.path.dirname(__file__), "uploads")
+    )
     os.makedirs(upload_folder, exist_ok=True)
     app.config["UPLOAD_FOLDER"] = upload_folder
+    # تحميل الملفات: "" (Flask يخدمها) أو "x-accel" (nginx) أو "x-sendfile" (Apache/lighttpd)
+    app.config["FILE_OFFLOAD"] = os.getenv("FILE_OFFLOAD", "").lower()
+    app.config["FILE_ACCEL_PREFIX"] = os.getenv("FILE_ACCEL_PREFIX", "/protected-uploads/")
+    app.config["USE_X_SENDFILE"] = app.config["FILE_OFFLOAD"] == "x-sendfile"
+    app.config["UPLOAD_CHUNK_MAX"] = int(os.getenv("UPLOAD_CHUNK_MAX", str(8 * 1024 * 1024)))
+    app.config["UPLOAD_SESSION_TTL_HOURS"] = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+    # ----------- FILE PROCESSING (بعد الرفع) -----------
+    app.config["FILE_JOBS_ENABLED"] = os.getenv("FILE_JOBS_ENABLED", "1") == "1"
+    app.config["FILE_JOB_WORKERS"] = int(os.getenv("FILE_JOB_WORKERS", "2"))
+    app.config["FILE_JOB_POLL_SECONDS"] = float(os.getenv("FILE_JOB_POLL_SECONDS", "10"))
+    app.config["FILE_JOB_MAX_ATTEMPTS"] = int(os.getenv("FILE_JOB_MAX_ATTEMPTS", "3"))
+    # أول retry بعد كذا ثانية، وكل محاولة بعدها ضعف اللي قبلها
+    app.config["FILE_JOB_RETRY_SECONDS"] = float(os.getenv("FILE_JOB_RETRY_SECONDS", "30"))
+
+    # ----------- MESSAGE STREAM (SSE) -----------
+    app.config["MESSAGE_STREAM_MAX"] = int(os.getenv("MESSAGE_STREAM_MAX", "50"))
+    app.config["MESSAGE_STREAM_QUEUE_SIZE"] = int(
+        os.getenv("MESSAGE_STREAM_QUEUE_SIZE", "100")
+    )
+    app.config["MESSAGE_STREAM_HEARTBEAT"] = float(
+        os.getenv("MESSAGE_STREAM_HEARTBEAT", "15")
+    )
+    app.config["MESSAGE_STREAM_RETRY_MS"] = int(os.getenv("MESSAGE_STREAM_RETRY_MS", "3000"))
+
+    # ----------- MESSAGE WRITE-BEHIND -----------
+    app.config["MESSAGE_WRITE_BEHIND"] = os.getenv("MESSAGE_WRITE_BEHIND", "0") == "1"
+    app.config["MESSAGE_BATCH_SIZE"] = int(os.getenv("MESSAGE_BATCH_SIZE", "50"))
+    app.config["MESSAGE_BATCH_LATENCY_MS"] = int(os.getenv("MESSAGE_BATCH_LATENCY_MS", "20"))
+
+    # ----------- IDENTITY CACHE -----------
+    # كاش لكل process: تعديل أو حذف مستخدم يبان بعد TTL ثانية بالكثير.
+    # العضويات والأدوار ما تمر عليه
+    app.config["IDENTITY_CACHE_SIZE"] = int(os.getenv("IDENTITY_CACHE_SIZE", "1024"))
+    app.config["IDENTITY_CACHE_TTL"] = float(os.getenv("IDENTITY_CACHE_TTL", "5"))
+
+    # ----------- PASSWORDS / MEMBERS -----------
+    # processes مخصصة لـ scrypt (0 = نفس الـ thread)
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # مثل werkzeug: "scrypt" أو "scrypt:16384:8:1" أو "pbkdf2:sha256:600000"
+    # تغييره ما يحتاج reset — الـ hash ينحدّث مع أول دخول ناجح
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # حد الطلبات المنتظرة ومهلة الانتظار (ثواني) قبل ما نرجع 503
+    app.config["PASSWORD_HASH_QUEUE_MAX"] = int(os.getenv("PASSWORD_HASH_QUEUE_MAX", "32"))
+    app.config["PASSWORD_HASH_QUEUE_TIMEOUT"] = float(
+        os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2")
+    )
+    app.config["MEMBER_IMPORT_MAX"] = int(os.getenv("MEMBER_IMPORT_MAX", "1000"))
+
+    # ----------- SQL INSTRUMENTATION -----------
+    dev_or_test = os.getenv("FLASK_ENV") in ("development", "testing")
+    app.config["SQL_STATS_ENABLED"] = os.getenv("SQL_STATS_ENABLED", "1") == "1"
+    app.config["SQL_SLOW_QUERY_MS"] = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))  # 0 = بدون log
+    # نفس الـ SELECT يتكرر كم مرة في طلب واحد عشان نعتبره N+1
+    app.config["SQL_N_PLUS_ONE_THRESHOLD"] = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    # "tasks.list_tasks=3,groups.list_groups=2" — تغلب @query_budget على الـ view
+    app.config["SQL_QUERY_BUDGETS"] = {
+        endpoint.strip(): int(limit)
+        for endpoint, _, limit in (
+            item.partition("=") for item in os.getenv("SQL_QUERY_BUDGETS", "").split(",") if "=" in item
+        )
+    }
+    app.config["SQL_QUERY_BUDGET_DEFAULT"] = int(os.getenv("SQL_QUERY_BUDGET_DEFAULT", "0"))  # 0 = بدون
+    # تعدّي الميزانية: 500 في dev/test، وتحذير في الـ log بس في الإنتاج
+    app.config["SQL_QUERY_BUDGET_ENFORCE"] = os.getenv(
+        "SQL_QUERY_BUDGET_ENFORCE", "1" if dev_or_test else "0"
+    ) == "1"
+    # Server-Timing: db;dur=... للـ devtools
+    app.config["SQL_TIMING_HEADER"] = os.getenv(
+        "SQL_TIMING_HEADER", "1" if dev_or_test else "0"
+    ) == "1"
+
+    # ----------- METRICS / READINESS -----------
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "1") == "1"
+    # مجلد مشترك بين workers الـ gunicorn (بدونه: أرقام الـ process اللي رد على الـ scrape بس)
+    app.config["METRICS_MULTIPROC_DIR"] = os.getenv(
+        "METRICS_MULTIPROC_DIR", os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    )
+    app.config["METRICS_FLUSH_SECONDS"] = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    if os.getenv("METRICS_BUCKETS"):
+        app.config["METRICS_BUCKETS"] = sorted(float(b) for b in os.getenv("METRICS_BUCKETS").split(","))
+    # /metrics و /health/* الداخلية تحتاج "Authorization: Bearer <HEALTH_TOKEN>"
+    # (فاضي = مقفلة 404). /health و /health/ready مفتوحة للـ load balancer
+    app.config["HEALTH_TOKEN"] = os.getenv("HEALTH_TOKEN", "")
+    # /health/ready يرجع 503 لو الـ pool مليان بهالنسبة
+    app.config["READINESS_POOL_MAX_RATIO"] = float(os.getenv("READINESS_POOL_MAX_RATIO", "0.9"))
+
+    # ----------- PROFILER (طلبات مختارة) -----------
+    app.config["PROFILER_ENABLED"] = os.getenv("PROFILER_ENABLED", "0") == "1"
+    app.config["PROFILER_MODE"] = os.getenv("PROFILER_MODE", "sample")  # sample | cprofile
+    # طلب فيه X-Profile-Token بهذي القيمة ينعمل له profile (فاضي = الهيدر مطفي)
+    app.config["PROFILER_TOKEN"] = os.getenv("PROFILER_TOKEN", "")
+    app.config["PROFILER_SAMPLE_RATE"] = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    app.config["PROFILER_INTERVAL_MS"] = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    app.config["PROFILER_DIR"] = os.getenv("PROFILER_DIR", "")  # الافتراضي: instance/profiles
+    app.config["PROFILER_KEEP"] = int(os.getenv("PROFILER_KEEP", "50"))  # ملفات لكل endpoint
+
+    # ----------- STREAMING JSON / COMPRESSION -----------
+    app.config["JSON_STREAM_YIELD_PER"] = int(os.getenv("JSON_STREAM_YIELD_PER", "500"))  # صفوف لكل fetch
+    app.config["JSON_STREAM_CHUNK_BYTES"] = int(os.getenv("JSON_STREAM_CHUNK_BYTES", "16384"))
+    # أصغر من كذا نرجّع بدون ضغط (وبدون stream)
+    app.config["COMPRESS_MIN_BYTES"] = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    # بالترتيب المفضّل لو العميل يقبل أكثر من واحد؛ br يحتاج مكتبة brotli (فاضي = بدون ضغط)
+    app.config["COMPRESS_ENCODINGS"] = [
+        name.strip() for name in os.getenv("COMPRESS_ENCODINGS", "br,gzip").split(",") if name.strip()
+    ]
+    app.config["GZIP_LEVEL"] = int(os.getenv("GZIP_LEVEL", "6"))
+    app.config["BROTLI_QUALITY"] = int(os.getenv("BROTLI_QUALITY", "4"))
+
+    # ----------- ADMISSION CONTROL / RATE LIMITS -----------
+    app.config["ADMISSION_ENABLED"] = os.getenv("ADMISSION_ENABLED", "1") == "1"
+    # "auth=4:8,list=8:16,bulk=2:4" — طلبات متزامنة:طابور لكل class (0 = بدون حد)
+    app.config["ADMISSION_LIMITS"] = {
+        name.strip(): tuple(int(n) for n in value.split(":", 1)) if ":" in value else (int(value), 0)
+        for name, _, value in (
+            item.partition("=") for item in os.getenv("ADMISSION_LIMITS", "").split(",") if "=" in item
+        )
+    }
+    # "groups.get_group=list,search.search_all=" — تغلب @admission_class (فاضي = بدون class)
+    app.config["ADMISSION_CLASSES"] = {
+        endpoint.strip(): cls.strip()
+        for endpoint, _, cls in (
+            item.partition("=") for item in os.getenv("ADMISSION_CLASSES", "").split(",") if "=" in item
+        )
+    }
+    app.config["ADMISSION_QUEUE_TIMEOUT"] = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1"))
+    app.config["ADMISSION_RETRY_AFTER"] = float(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+    # ملف SQLite مشترك بين الـ workers (فاضي = كل process لحاله)
+    app.config["ADMISSION_SQLITE_PATH"] = os.getenv("ADMISSION_SQLITE_PATH", "")
+    # slot أقدم من كذا ثانية ينحذف (process مات) — لازم أطول من أبطأ رد streamed
+    app.config["ADMISSION_SLOT_TTL"] = float(os.getenv("ADMISSION_SLOT_TTL", "60"))
+    # "عدد/ثواني" لكل مستخدم (0/... = مطفي). login لكل IP+إيميل، و login_ip لكل IP
+    app.config["RATE_LIMITS"] = {
+        name: (int(count), float(seconds))
+        for name, env, default in (
+            ("login", "RATE_LIMIT_LOGIN", "10/60"),
+            ("login_ip", "RATE_LIMIT_LOGIN_IP", "100/60"),
+            ("messages", "RATE_LIMIT_MESSAGES", "30/10"),
+        )
+        for count, _, seconds in [os.getenv(env, default).partition("/")]
+    }
 
     # ----------- CORS (حل مشاكل Vercel + Render) -----------
     CORS(
@@ -39,12 +234,48 @@ def create_app():
         resources={r"/*": {"origins": "*"}},
         supports_credentials=True,
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=[
+            "Content-Type",
+            "Authorization",
+            "Last-Event-ID",
+            "If-None-Match",
+            "Upload-Offset",
+            "Range",
+            "If-Range",
+            "If-Modified-Since",
+            "X-Last-Write",
+        ],
+        expose_headers=[
+            "X-Next-Cursor",
+            "X-Prev-Cursor",
+            "ETag",
+            "Upload-Offset",
+            "Content-Range",
+            "Content-Disposition",
+            "Accept-Ranges",
+            "Retry-After",
+            "Server-Timing",
+            "X-Last-Write",
+        ],
     )
 
+    timer.mark("config")
+
     # ----------- INIT EXTENSIONS -----------
+    replica_router.init_app(app)  # قبل db: يضيف الـ replicas كـ binds
     db.init_app(app)
     jwt.init_app(app)
+    hub.init_app(app)
+    batcher.init_app(app)
+    identity_cache.init_app(app)
+    file_processor.init_app(app)
+    password_hasher.init_app(app)
+    sql_stats.init_app(app)  # بعد db: يسمع لكل engine
+    metrics.init_app(app)
+    metrics.add_collector("messages_batch", batcher.metric_samples)
+    profiler.init_app(app)
+    admission.init_app(app)
+    timer.mark("extensions")
 
     # ----------- IMPORT MODELS -----------
     from models.user import User
@@ -52,17 +283,27 @@ def create_app():
     from models.group_member import GroupMember
     from models.task import Task
     from models.file import GroupFile
+    from models.upload_session import UploadSession
+    from models.file_job import FileJob
+    timer.mark("models")
 
     # ----------- IMPORT ROUTES -----------
     from routes.auth import auth_bp
+    from routes.files import files_bp
     from routes.groups import groups_bp
     from routes.messages import messages_bp
+    from routes.search import search_bp
     from routes.tasks import tasks_bp
+    from routes.uploads import uploads_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(groups_bp, url_prefix="/groups")
+    app.register_blueprint(files_bp, url_prefix="/groups")
     app.register_blueprint(messages_bp, url_prefix="/groups")
     app.register_blueprint(tasks_bp, url_prefix="/groups")
+    app.register_blueprint(uploads_bp, url_prefix="/groups")
+    app.register_blueprint(search_bp)
+    timer.mark("blueprints")
 
     # ------------------------------------------------------
     #                DATABASE INITIALIZATION
@@ -81,57 +322,220 @@ def create_app():
                 except:
                     pass
 
-        db.create_all()
-
-        # إنشاء جدول الرسائل بصيغة PostgreSQL (استخدام SERIAL بدل AUTOINCREMENT)
-        db.session.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS messages (
-                    id SERIAL PRIMARY KEY,
-                    group_id INTEGER NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        # الجداول والـ indexes من الترقيات (flask db-upgrade) مو من كل worker وقت التشغيل.
+        # هنا بس نشيّك النسخة — استعلام واحد
+        version = None
+        if app.config["DB_SCHEMA_CHECK"] or app.config["DB_AUTO_MIGRATE"]:
+            version = current_version(db.engine)
+            if version < LATEST_VERSION and app.config["DB_AUTO_MIGRATE"]:
+                upgrade(db.engine, log=app.logger.info)
+                version = current_version(db.engine)
+            if version < LATEST_VERSION:
+                app.logger.error(
+                    "Database schema is at version %s, code expects %s — run `flask db-upgrade`",
+                    version,
+                    LATEST_VERSION,
                 )
-                """
-            )
-        )
+        app.config["SCHEMA_VERSION"] = version
+        timer.mark("database")
 
         # ----------- CREATE DEFAULT USER -----------
-        from werkzeug.security import generate_password_hash
+        if app.config["DB_SEED"] and version in (None, LATEST_VERSION):
+            seed_default_admin()
+            timer.mark("seed")
+
+        # الأب (gunicorn --preload) ما يحتاج اتصالاته — والـ workers يبدأون بـ pool فاضي
+        # (SQLite في الذاكرة ما نلمسه — الـ dispose يمسح القاعدة)
+        for engine in db.engines.values():
+            if engine.url.database not in (None, "", ":memory:"):
+                engine.dispose()
+                dispose_after_fork(engine)
+
+    # ----------- CLI: ترقية قاعدة البيانات -----------
+    @app.cli.command("db-upgrade")
+    @click.option("--to", "target", type=int, default=None, help="آخر نسخة تنطبق (الافتراضي: الأحدث)")
+    def db_upgrade_command(target):
+        """يطبّق ترقيات قاعدة البيانات الناقصة (مرة وحدة قبل تشغيل الـ workers)"""
+        applied = upgrade(db.engine, target=target)
+        print(f"schema at version {current_version(db.engine)} ({len(applied)} applied)")
+
+    @app.cli.command("db-version")
+    def db_version_command():
+        """يطبع نسخة قاعدة البيانات الحالية والنسخة اللي يتوقعها الكود"""
+        print(f"database: {current_version(db.engine)}, code: {LATEST_VERSION}")
 
-        default_email = os.getenv("DEFAULT_ADMIN_EMAIL", "noon@test.com")
-        default_password = os.getenv("DEFAULT_ADMIN_PASSWORD", "password123")
+    # ----------- CLI: المستخدم الافتراضي -----------
+    @app.cli.command("seed-admin")
+    def seed_admin_command():
+        """ينشئ المستخدم الافتراضي (DEFAULT_ADMIN_EMAIL) لو مو موجود"""
+        created = seed_default_admin()
+        print("default admin created" if created else "default admin already exists")
 
-        existing = User.query.filter_by(email=default_email).first()
-        if not existing:
-            hashed = generate_password_hash(default_password)
-            u = User(name="Noon", email=default_email, password_hash=hashed)
-            db.session.add(u)
+    # ----------- CLI: إصلاح عدّاد الأعضاء -----------
+    @app.cli.command("recount-members")
+    def recount_members_command():
+        """يعيد حساب group.members_count من جدول group_member"""
+        from routes.groups import recount_members
 
+        fixed = recount_members()
+        print(f"members_count repaired for {fixed} group(s)")
+
+    # ----------- CLI: تنظيف الرفعات الناقصة -----------
+    @app.cli.command("prune-uploads")
+    def prune_uploads_command():
+        """يحذف جلسات الرفع اللي ما اكتملت وأقدم من UPLOAD_SESSION_TTL_HOURS"""
+        from routes.uploads import prune_uploads
+
+        removed = prune_uploads(app.config["UPLOAD_SESSION_TTL_HOURS"])
+        print(f"removed {removed} stale upload(s)")
+
+    # ----------- CLI: معالجة ملفات معلّقة -----------
+    @app.cli.command("process-file-jobs")
+    def process_file_jobs_command():
+        """يعالج كل مهام file_jobs المعلّقة (مثلاً لملفات قديمة أو لو الـ pool مطفي)"""
+        from models.file import GroupFile
+
+        # الملفات القديمة اللي ما لها بيانات ولا مهمة
+        queued = {job.file_id for job in FileJob.query.all()}
+        for gf in GroupFile.query.filter(GroupFile.meta_status.is_(None)).all():
+            if gf.id not in queued:
+                gf.meta_status = "pending"
+                file_processor.enqueue(gf.id)
         db.session.commit()
 
+        done = file_processor.run_pending()
+        print(f"processed {done} file job(s)")
+
+    # ----------- CLI: تقرير الـ profiler -----------
+    @app.cli.command("profile-report")
+    @click.option("--endpoint", default=None, help="endpoint واحد (مثل tasks.list_tasks)")
+    @click.option("--top", type=int, default=15)
+    def profile_report_command(endpoint, top):
+        """أكثر الدوال استهلاكاً في الطلبات اللي انحفظ لها profile (من كل الـ workers)"""
+        report = profiler.report_from_files(endpoint=endpoint, top=top)
+        if not report:
+            print(f"no profiles in {profiler.directory}")
+        for name, data in report.items():
+            print(f"\n{name} ({data['requests']} request(s))")
+            for row in data["self"]:
+                amount = f"{row['percent']:5.1f}%" if "percent" in row else f"{row['self_ms']:9.1f}ms"
+                print(f"  {amount}  {row['function']}")
+
     # ----------- HEALTH CHECK -----------
+    def internal(fn):
+        """إحصائيات داخلية (أسماء endpoints، كويريات، أداء) — بس بـ HEALTH_TOKEN"""
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = app.config["HEALTH_TOKEN"]
+            if not token:
+                abort(404)
+            given = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+                abort(401)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
     @app.get("/health")
     def health():
         return {"ok": True}
 
+    @app.get("/health/ready")
+    def readiness():
+        """للـ load balancer: الـ worker يقدر يخدم؟ (قاعدة البيانات، الـ pool، الـ schema)"""
+        ready, checks = metrics.readiness()
+        if ready:
+            return {"ready": True, "checks": checks}
+        return {"ready": False, "checks": checks}, 503, {"Retry-After": "5"}
+
+    @app.get("/metrics")
+    @internal
+    def metrics_endpoint():
+        return metrics.response()
+
+    @app.get("/health/messages-batch")
+    @internal
+    def messages_batch_stats():
+        return batcher.stats()
+
+    @app.get("/health/file-jobs")
+    @internal
+    def file_jobs_stats():
+        return file_processor.stats()
+
+    @app.get("/health/cache")
+    @internal
+    def cache_stats():
+        return identity_cache.stats()
+
+    @app.get("/health/passwords")
+    @internal
+    def passwords_stats():
+        return password_hasher.stats()
+
+    @app.get("/health/replicas")
+    @internal
+    def replicas_stats():
+        return replica_router.stats()
+
+    @app.get("/health/sql")
+    @internal
+    def sql_stats_report():
+        return sql_stats.stats()
+
+    @app.get("/health/profiler")
+    @internal
+    def profiler_report():
+        return {**profiler.stats(), "report": profiler.report(top=10)}
+
+    @app.get("/health/admission")
+    @internal
+    def admission_stats():
+        return admission.stats()
+
+    @app.get("/health/startup")
+    @internal
+    def startup_stats():
+        return app.extensions["startup"]
+
+    timer.mark("routes")
+    app.extensions["startup"] = timer.report()
+    app.logger.info("startup timings: %s", app.extensions["startup"])
     return app
 
 
+# ------------------------------------------------------
+#        DEFAULT USER (SEEDING)
+# ------------------------------------------------------
+def seed_default_admin() -> bool:
+    """ينشئ المستخدم الافتراضي لو مو موجود (داخل app context)"""
+    from werkzeug.security import generate_password_hash
+    from models.user import User
+
+    default_email = os.getenv("DEFAULT_ADMIN_EMAIL", "noon@test.com")
+    default_password = os.getenv("DEFAULT_ADMIN_PASSWORD", "password123")
+
+    if User.query.filter_by(email=default_email).first():
+        return False
+
+    hashed = generate_password_hash(default_password)
+    db.session.add(User(name="Noon", email=default_email, password_hash=hashed))
+    db.session.commit()
+    return True
+
+
 # ------------------------------------------------------
 #        USER LOOKUP FOR JWT
 # ------------------------------------------------------
 @jwt.user_lookup_loader
 def load_user_callback(jwt_header, jwt_data):
-    from models.user import User
-
     identity = jwt_data.get("sub")
     try:
         user_id = int(identity)
     except:
         return None
-    return User.query.get(user_id)
+    return identity_cache.get_user(user_id)
 
 
 # ------------------------------------------------------
@@ -0,0 +1 @@
+# backend/benchmarks — سكربتات قياس الأداء (تنشغل من مجلد backend: python -m benchmarks.<name>)
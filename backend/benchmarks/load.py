@@ -0,0 +1,323 @@
+# backend/benchmarks/load.py
+"""
+قياس الحمل لكل endpoints الـ API: التطبيق من create_app على قاعدة SQLite
+مؤقتة فيها بيانات، والطلبات من عدة threads (test client، بدون شبكة) —
+فالأرقام تقيس كودنا وقاعدة البيانات بس، وتتكرر بنفس الشكل كل مرة.
+
+لكل endpoint: p50/p95/p99 (ms)، طلبات بالثانية، وعدد كويريات SQL ووقتها لكل طلب (sql_stats).
+
+    cd backend && python -m benchmarks.load --requests 300 --concurrency 8 --out bench.json
+    cd backend && python -m benchmarks.load --baseline bench.json --threshold 0.2
+
+مع --baseline: أي endpoint صار أبطأ (p95) أو أقل طلبات/ثانية بأكثر من threshold،
+أو زادت كويرياته لكل طلب، يطلع في "regressions" والسكربت يرجع exit code 1.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD = "bench-password"
+BENCH_USERS = 4
+
+# الفرق المسموح في متوسط الكويريات لكل طلب (الطلبات المتزامنة ممكن تختلف شوي)
+QUERY_TOLERANCE = 0.5
+
+
+# ------------ Seed ------------
+
+def seed(app, client, rows: int) -> dict:
+    """
+    مستخدمين BENCH_USERS (تسجيل/دخول عن طريق الـ API عشان الباسورد حقيقي)،
+    قروب واحد فيه rows مهمة/رسالة/عضو، وملف مرفوع فعلاً للتحميل.
+    """
+    from datetime import date
+
+    from sqlalchemy import insert, select, text, update
+
+    from extensions import db
+    from models.group import Group
+    from models.group_member import GroupMember
+    from models.task import Task
+    from models.user import User
+
+    headers = []
+    for i in range(BENCH_USERS):
+        email = f"bench{i}@bench.local"
+        client.post("/auth/register", json={"name": f"Bench {i}", "email": email, "password": PASSWORD})
+        token = client.post("/auth/login", json={"email": email, "password": PASSWORD}).get_json()["access_token"]
+        headers.append({"Authorization": f"Bearer {token}"})
+
+    group = client.post("/groups", json={"name": "Bench group"}, headers=headers[0]).get_json()
+    for h in headers[1:]:
+        client.post("/groups/join", json={"code": group["invite_code"]}, headers=h)
+
+    with app.app_context():
+        db.session.execute(
+            insert(User),
+            [{"name": f"Member {i}", "email": f"m{i}@bench.local", "password_hash": "x"} for i in range(rows)],
+        )
+        member_ids = db.session.execute(
+            select(User.id).where(User.email.like("m%@bench.local"))
+        ).scalars().all()
+        db.session.execute(
+            insert(GroupMember),
+            [{"group_id": group["id"], "user_id": uid, "role": "member"} for uid in member_ids],
+        )
+        db.session.execute(
+            update(Group)
+            .where(Group.id == group["id"])
+            .values(members_count=Group.members_count + len(member_ids))
+        )
+        db.session.execute(
+            insert(Task),
+            [
+                {"group_id": group["id"], "title": f"Task {i} review", "description": "d" * 40,
+                 "priority": "Normal", "due_date": date(2026, 1, 1 + i % 28), "is_done": i % 2 == 0}
+                for i in range(rows)
+            ],
+        )
+        db.session.execute(
+            text("INSERT INTO messages (group_id, content) VALUES (:gid, :content)"),
+            [{"gid": group["id"], "content": f"message {i} about the review"} for i in range(rows)],
+        )
+        db.session.commit()
+        task_ids = db.session.execute(
+            select(Task.id).where(Task.group_id == group["id"]).order_by(Task.id)
+        ).scalars().all()
+
+    upload = client.post(
+        f"/groups/{group['id']}/files",
+        data={"file": (io.BytesIO(b"%PDF-1.4\n" + b"x" * 64 * 1024), "bench.pdf")},
+        headers=headers[0],
+        content_type="multipart/form-data",
+    ).get_json()
+
+    return {
+        "headers": headers,
+        "group_id": group["id"],
+        "task_ids": task_ids,
+        "file_id": upload["id"],
+    }
+
+
+# ------------ Scenarios ------------
+
+def scenarios(ctx: dict) -> dict:
+    """
+    endpoint -> دالة (client, i, headers) ترجع الـ response.
+    القراءة أول، وبعدها الكتابة (عشان القراءة تقيس نفس حجم البيانات كل مرة).
+    ما فيه SSE (stream مفتوح) ولا الرفع المجزأ (عدة طلبات لكل ملف).
+    """
+    gid = ctx["group_id"]
+    task_ids = ctx["task_ids"]
+    run_id = int(time.time() * 1000)
+
+    return {
+        "auth.me": lambda c, i, h: c.get("/auth/me", headers=h),
+        "groups.list": lambda c, i, h: c.get("/groups", headers=h),
+        "groups.get": lambda c, i, h: c.get(f"/groups/{gid}", headers=h),
+        "groups.dashboard": lambda c, i, h: c.get(f"/groups/{gid}/dashboard", headers=h),
+        "members.list": lambda c, i, h: c.get(f"/groups/{gid}/members", headers=h),
+        "tasks.list": lambda c, i, h: c.get(f"/groups/{gid}/tasks", headers=h),
+        "messages.list": lambda c, i, h: c.get(f"/groups/{gid}/messages", headers=h),
+        "files.list": lambda c, i, h: c.get(f"/groups/{gid}/files", headers=h),
+        "files.download": lambda c, i, h: c.get(f"/groups/files/{ctx['file_id']}/download", headers=h),
+        "search.group": lambda c, i, h: c.get(f"/groups/{gid}/search?q=review", headers=h),
+        "search.all": lambda c, i, h: c.get("/search?q=review", headers=h),
+        "auth.login": lambda c, i, h: c.post(
+            "/auth/login", json={"email": f"bench{i % BENCH_USERS}@bench.local", "password": PASSWORD}
+        ),
+        "members.add": lambda c, i, h: c.post(
+            f"/groups/{gid}/members", json={"name": f"New {i}", "email": f"new{run_id}-{i}@bench.local"}, headers=h
+        ),
+        "tasks.create": lambda c, i, h: c.post(f"/groups/{gid}/tasks", json={"title": f"Created {i}"}, headers=h),
+        "tasks.update": lambda c, i, h: c.patch(
+            f"/groups/{gid}/tasks/{task_ids[i % len(task_ids)]}", json={"completed": i % 2 == 0}, headers=h
+        ),
+        "tasks.batch": lambda c, i, h: c.post(
+            f"/groups/{gid}/tasks/batch",
+            json={"operations": [{"op": "create", "title": f"Batch {i}-{n}"} for n in range(10)]},
+            headers=h,
+        ),
+        "messages.create": lambda c, i, h: c.post(f"/groups/{gid}/messages", json={"content": f"hi {i}"}, headers=h),
+        "files.upload": lambda c, i, h: c.post(
+            f"/groups/{gid}/files",
+            data={"file": (io.BytesIO(b"bench %d " % i * 512), f"upload{i}.txt")},
+            headers=h,
+            content_type="multipart/form-data",
+        ),
+    }
+
+
+# ------------ Runner ------------
+
+def percentile(sorted_values, p: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[int(p) - 1]
+
+
+def run_endpoint(app, sql_stats, call, headers, requests: int, concurrency: int, warmup: int) -> dict:
+    """requests طلب موزعة على concurrency thread، كل thread بـ client خاص فيه"""
+    warm = app.test_client()
+    for i in range(warmup):
+        call(warm, i, headers[0]).close()
+
+    latencies, queries, db_ms, errors = [], [], [], []
+    lock = threading.Lock()
+
+    def worker(n):
+        client = app.test_client()
+        local = []
+        for i in range(n, requests, concurrency):
+            # الـ test client ينفّذ الطلب في نفس الـ thread، فالـ capture يشوف كويرياته بس
+            with sql_stats.capture() as log:
+                started = time.perf_counter()
+                response = call(client, warmup + i, headers[i % len(headers)])
+                response.get_data()
+                elapsed = time.perf_counter() - started
+            response.close()
+            local.append((elapsed, log.count, log.db_seconds, response.status_code))
+        with lock:
+            for elapsed, count, db_seconds, status in local:
+                latencies.append(elapsed * 1000)
+                queries.append(count)
+                db_ms.append(db_seconds * 1000)
+                if status >= 400:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "requests_per_sec": round(requests / wall, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "db_ms_per_request": round(sum(db_ms) / len(db_ms), 3),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """الـ endpoints اللي تراجعت عن الـ baseline (endpoint جديد أو محذوف ما يُحسب)"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["requests_per_sec"] < before["requests_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: requests/sec {before['requests_per_sec']} -> {current['requests_per_sec']}"
+            )
+        if current["queries_per_request"] > before["queries_per_request"] + QUERY_TOLERANCE:
+            regressions.append(
+                f"{name}: queries/request {before['queries_per_request']} -> {current['queries_per_request']}"
+            )
+        if current["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="طلبات لكل endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10, help="طلبات قبل القياس (ما تنحسب)")
+    parser.add_argument("--rows", type=int, default=500, help="مهام/رسائل/أعضاء في قروب الـ benchmark")
+    parser.add_argument("--only", default="", help="endpoints مفصولة بفواصل (مثل tasks.list,auth.login)")
+    parser.add_argument("--out", help="يحفظ النتيجة JSON في هذا الملف")
+    parser.add_argument("--baseline", help="ملف JSON من تشغيل سابق للمقارنة")
+    parser.add_argument("--threshold", type=float, default=0.2, help="نسبة التراجع المسموحة (0.2 = 20%%)")
+    parser.add_argument("--json", action="store_true", help="نتيجة JSON بدل الجدول")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+    os.environ["UPLOAD_FOLDER"] = os.path.join(tmp, "uploads")
+    os.environ["DB_AUTO_MIGRATE"] = "1"
+    os.environ["DB_SEED"] = "0"
+    os.environ["SQL_STATS_ENABLED"] = "1"
+    os.environ["SQL_QUERY_BUDGET_ENFORCE"] = "0"  # نقيس، ما نوقف الطلبات
+    os.environ["ADMISSION_ENABLED"] = "0"  # بدون 503/429 — نقيس الـ endpoints نفسها
+
+    from app import create_app
+    from extensions import sql_stats
+
+    app = create_app()
+
+    ctx = seed(app, app.test_client(), args.rows)
+    cases = scenarios(ctx)
+    only = [name for name in args.only.split(",") if name]
+    unknown = [name for name in only if name not in cases]
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(unknown)}; choose from {', '.join(cases)}")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "rows": args.rows,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "endpoints": {},
+    }
+    for name, call in cases.items():
+        if only and name not in only:
+            continue
+        results["endpoints"][name] = run_endpoint(
+            app, sql_stats, call, ctx["headers"], args.requests, args.concurrency, args.warmup
+        )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["regressions"] = compare(results, baseline, args.threshold)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{'endpoint':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'req/s':>8} {'queries':>8} {'errors':>7}"
+        )
+        for name, r in results["endpoints"].items():
+            print(
+                f"{name:<18} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                f"{r['requests_per_sec']:>8.1f} {r['queries_per_request']:>8.2f} {r['errors']:>7}"
+            )
+        for line in results.get("regressions", []):
+            print(f"REGRESSION {line}")
+
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# backend/benchmarks/serializers.py
+"""
+تكلفة الصف الواحد في قوائم tasks/members/files/groups:
+قبل (كائنات ORM + getattr) وبعد (select للأعمدة + RowSerializer).
+
+    cd backend && python -m benchmarks.serializers --rows 5000 --repeat 7
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def legacy_tasks(db, Task, group_id):
+    result = []
+    for t in Task.query.filter_by(group_id=group_id).order_by(Task.id.asc()).all():
+        result.append(
+            {
+                "id": t.id,
+                "group_id": getattr(t, "group_id", group_id),
+                "title": getattr(t, "title", ""),
+                "description": getattr(t, "description", ""),
+                "due_date": getattr(t, "due_date", None),
+                "priority": getattr(t, "priority", "Normal"),
+                "completed": bool(getattr(t, "completed", False)),
+            }
+        )
+    return result
+
+
+def legacy_members(db, GroupMember, User, group_id):
+    rows = (
+        db.session.query(GroupMember, User)
+        .join(User, GroupMember.user_id == User.id)
+        .filter(GroupMember.group_id == group_id)
+        .all()
+    )
+    return [
+        {"id": gm.id, "name": u.name, "email": u.email, "role": gm.role or "member"}
+        for gm, u in rows
+    ]
+
+
+def legacy_files(GroupFile, group_id):
+    result = []
+    for f in GroupFile.query.filter_by(group_id=group_id).all():
+        result.append(
+            {
+                "id": f.id,
+                "group_id": f.group_id,
+                "name": getattr(f, "original_name", None) or getattr(f, "filename", None),
+                "filename": getattr(f, "filename", None),
+                "size": f.size,
+                "mime_type": f.mime_type,
+                "page_count": f.page_count,
+                "image_width": f.image_width,
+                "image_height": f.image_height,
+                "thumbnail_url": f"/groups/files/{f.id}/thumbnail" if f.thumbnail else None,
+                "uploaded_at": f.uploaded_at.isoformat() if f.uploaded_at else None,
+                "meta_status": f.meta_status,
+            }
+        )
+    return result
+
+
+def legacy_groups(db, Group, GroupMember, user_id):
+    rows = (
+        db.session.query(GroupMember, Group)
+        .join(Group, GroupMember.group_id == Group.id)
+        .filter(GroupMember.user_id == user_id)
+        .all()
+    )
+    return [
+        {
+            "id": g.id,
+            "name": g.name,
+            "invite_code": g.invite_code,
+            "members_count": g.members_count or 0,
+            "role": gm.role or "member",
+            "is_owner": bool((gm.role == "admin") or (g.owner_id == user_id)),
+        }
+        for gm, g in rows
+    ]
+
+
+def seed(db, rows: int):
+    """قروب فيه rows مهمة/عضو/ملف، ومستخدم عضو في rows قروب"""
+    from datetime import date, datetime
+
+    from sqlalchemy import insert
+
+    from models.file import GroupFile
+    from models.group import Group
+    from models.group_member import GroupMember
+    from models.task import Task
+    from models.user import User
+
+    db.session.execute(
+        insert(User),
+        [{"name": f"User {i}", "email": f"u{i}@bench.local", "password_hash": "x"} for i in range(rows)],
+    )
+    db.session.execute(
+        insert(Group),
+        [{"name": f"Group {i}", "invite_code": f"B{i:07d}", "owner_id": 1, "members_count": 1} for i in range(rows)],
+    )
+    members = [{"group_id": 1, "user_id": i + 1, "role": "member"} for i in range(rows)]
+    members += [{"group_id": i + 1, "user_id": 1, "role": "owner"} for i in range(1, rows)]
+    db.session.execute(insert(GroupMember), members)
+    db.session.execute(
+        insert(Task),
+        [
+            {"group_id": 1, "title": f"Task {i}", "description": "d" * 40, "priority": "Normal",
+             "due_date": date(2026, 1, 1 + i % 28), "is_done": i % 2 == 0}
+            for i in range(rows)
+        ],
+    )
+    db.session.execute(
+        insert(GroupFile),
+        [
+            {"group_id": 1, "filename": f"objects/{i}", "original_name": f"file{i}.pdf", "size": 1000 + i,
+             "mime_type": "application/pdf", "page_count": 3, "meta_status": "done",
+             "thumbnail": None if i % 3 else f"objects/thumbs/{i}.jpg", "uploaded_at": datetime(2026, 1, 1)}
+            for i in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="نتيجة JSON بدل الجدول")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+    os.environ.setdefault("UPLOAD_FOLDER", os.path.join(tmp, "uploads"))
+    os.environ["DB_AUTO_MIGRATE"] = "1"
+    os.environ["DB_SEED"] = "0"
+
+    from app import create_app
+    from extensions import db
+    from models.file import GroupFile
+    from models.group import Group
+    from models.group_member import GroupMember
+    from models.task import Task
+    from models.user import User
+    from routes.groups import GROUP_ROW, list_group_files, list_group_members
+    from routes.tasks import list_group_tasks
+    from sqlalchemy import select
+
+    def after_groups():
+        rows = db.session.execute(
+            select(*GROUP_ROW.columns)
+            .select_from(GroupMember)
+            .join(Group, GroupMember.group_id == Group.id)
+            .where(GroupMember.user_id == 1),
+            {"user_id": 1},
+        )
+        return GROUP_ROW.all(rows)
+
+    cases = {
+        "tasks": (lambda: legacy_tasks(db, Task, 1), lambda: list_group_tasks(1)),
+        "members": (lambda: legacy_members(db, GroupMember, User, 1), lambda: list_group_members(1)),
+        "files": (lambda: legacy_files(GroupFile, 1), lambda: list_group_files(1)),
+        "groups": (lambda: legacy_groups(db, Group, GroupMember, 1), after_groups),
+    }
+
+    app = create_app()
+    results = {}
+    with app.app_context():
+        seed(db, args.rows)
+        for name, (before, after) in cases.items():
+            count = len(after())
+            # كل قياس في session نظيف (الـ identity map فاضي مثل أول طلب)
+            timings = {}
+            for label, fn in (("before", before), ("after", after)):
+                def run(fn=fn):
+                    fn()
+                    db.session.remove()
+                timings[label] = best_of(run, args.repeat)
+            results[name] = {
+                "rows": count,
+                "before_us_per_row": timings["before"] * 1e6 / count,
+                "after_us_per_row": timings["after"] * 1e6 / count,
+                "speedup": timings["before"] / timings["after"],
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'endpoint':<10} {'rows':>6} {'before µs/row':>14} {'after µs/row':>13} {'speedup':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<10} {r['rows']:>6} {r['before_us_per_row']:>14.2f} "
+            f"{r['after_us_per_row']:>13.2f} {r['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# backend/cache.py
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+# نخزّن نسخ بسيطة بدل كائنات الـ ORM عشان ما تصير detached/expired بين الطلبات
+CachedUser = namedtuple("CachedUser", ["id", "name", "email"])
+
+
+class TTLCache:
+    """LRU محدود الحجم، وكل عنصر له عمر (TTL) بالثواني"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class IdentityCache:
+    """
+    كاش بين الطلبات لبيانات المستخدم (الاسم والإيميل) — للـ JWT user loader
+    والـ endpoints اللي برّا group_access (قائمة القروبات، إنشاء، انضمام).
+
+    العضويات ما تنخزن: group_access يجيب المستخدم والقروب والعضوية بـ JOIN واحد،
+    فالكاش ما يوفّر round trip، وعضو انشال كان بيظل يدخل في الـ workers الثانية
+    لين يخلص الـ TTL. الكاش داخل الـ process، فقرارات الصلاحيات ما تعتمد عليه.
+
+    ما فيه endpoint يعدّل الاسم أو الإيميل، فما فيه invalidation: أي تعديل مباشر
+    على الـ DB يبان بعد IDENTITY_CACHE_TTL.
+    """
+
+    def __init__(self):
+        self.users = TTLCache()
+
+    def init_app(self, app):
+        size = app.config.get("IDENTITY_CACHE_SIZE", 1024)
+        ttl = app.config.get("IDENTITY_CACHE_TTL", 5.0)
+        self.users = TTLCache(maxsize=size, ttl=ttl)
+        app.extensions["identity_cache"] = self
+
+    def get_user(self, user_id):
+        from models.user import User
+
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        cached = self.users.get(user_id)
+        if cached is not None:
+            return cached
+
+        user = User.query.get(user_id)
+        if not user:
+            return None
+        cached = CachedUser(user.id, user.name, user.email)
+        self.users.set(user_id, cached)
+        return cached
+
+    def stats(self) -> dict:
+        return {
+            "users": self.users.stats(),
+        }
@@ -2,5 +2,27 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 
-db = SQLAlchemy()
+from admission import AdmissionController
+from cache import IdentityCache
+from file_jobs import FileProcessor
+from metrics import Metrics
+from passwords import PasswordHasher
+from profiling import RequestProfiler
+from pubsub import MessageHub
+from replicas import ReplicaRouter, RoutingSession
+from sqlstats import SQLStats
+from write_behind import MessageBatcher
+
+# RoutingSession: قراءة GET من replica لو DATABASE_REPLICA_URLS موجود
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
+hub = MessageHub()
+batcher = MessageBatcher()
+identity_cache = IdentityCache()
+file_processor = FileProcessor()
+password_hasher = PasswordHasher()
+replica_router = ReplicaRouter()
+sql_stats = SQLStats()
+metrics = Metrics()
+profiler = RequestProfiler()
+admission = AdmissionController()
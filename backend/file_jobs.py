@@ -0,0 +1,394 @@
+# backend/file_jobs.py
+import mimetypes
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from werkzeug.security import safe_join
+
+from storage import COPY_BUFFER_SIZE, hash_file
+
+THUMBNAIL_SIZE = (256, 256)
+
+# أول بايتات الملف -> نوعه (ما نعتمد على الامتداد اللي أرسله العميل)
+MAGIC_NUMBERS = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),  # doc/xls/ppt القديمة
+    (b"PK\x03\x04", "application/zip"),  # docx/xlsx/pptx كلها zip
+    (b"\x1f\x8b", "application/gzip"),
+    (b"ID3", "audio/mpeg"),
+]
+
+PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+# ------------ Metadata ------------
+
+def sniff_mime(head: bytes, original_name: str) -> str:
+    guessed = mimetypes.guess_type(original_name)[0]
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, mime in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            # الحاويات (zip/ole) نخلي الامتداد يحدد النوع الدقيق (docx مثلاً)
+            if mime in ("application/zip", "application/x-ole-storage") and guessed:
+                return guessed
+            return mime
+
+    try:
+        head.decode("utf-8")
+        return guessed if guessed and guessed.startswith("text/") else "text/plain"
+    except UnicodeDecodeError:
+        return guessed or "application/octet-stream"
+
+
+def count_pdf_pages(path: str) -> int:
+    """عدد صفحات PDF بقراءة على دفعات (تقريبي لكن بدون مكتبات إضافية)"""
+    count = 0
+    tail = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            data = tail + chunk
+            # نعدّ بس اللي ينتهي قبل آخر 32 بايت، والباقي يتكرر مع الـ chunk الجاي
+            safe = len(data) - 32
+            count += sum(1 for m in PDF_PAGE_RE.finditer(data) if m.end() <= safe)
+            tail = data[max(safe, 0):]
+    count += len(PDF_PAGE_RE.findall(tail))
+    return count
+
+
+def _pil_image():
+    """Pillow اختياري، ونستورده أول ما نحتاجه (مو وقت إقلاع كل worker)"""
+    try:
+        from PIL import Image
+    except ImportError:  # pragma: no cover
+        return None
+    return Image
+
+
+def make_thumbnail(path: str, upload_folder: str, sha256: str):
+    """يرجع (width, height, stored_thumbnail) أو None لو Pillow مو موجود"""
+    Image = _pil_image()
+    if Image is None:
+        return None
+
+    name = os.path.join("objects", "thumbs", f"{sha256}.jpg")
+    thumb_path = os.path.join(upload_folder, name)
+
+    with Image.open(path) as img:
+        width, height = img.size
+        # نفس المحتوى = نفس الصورة المصغّرة
+        if not os.path.exists(thumb_path):
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            img.thumbnail(THUMBNAIL_SIZE)
+            img.convert("RGB").save(thumb_path + ".tmp", "JPEG", quality=80)
+            os.replace(thumb_path + ".tmp", thumb_path)
+
+    return width, height, name
+
+
+def process_file(gf, upload_folder: str) -> None:
+    """يحسب بيانات الملف ويحطها على GroupFile (بدون commit)"""
+    from models.file import GroupFile
+
+    path = safe_join(upload_folder, gf.filename)
+    if not path or not os.path.isfile(path):
+        raise FileNotFoundError(gf.filename)
+
+    if not gf.sha256:
+        gf.sha256 = hash_file(path).hexdigest()
+    if gf.size is None:
+        gf.size = os.path.getsize(path)
+
+    # نفس المحتوى انعالج قبل؟ ننسخ النتيجة بدون ما نقرأ الملف
+    done = (
+        GroupFile.query.filter(
+            GroupFile.sha256 == gf.sha256,
+            GroupFile.meta_status == "done",
+            GroupFile.id != gf.id,
+        )
+        .first()
+    )
+    if done:
+        gf.page_count = done.page_count
+        gf.image_width = done.image_width
+        gf.image_height = done.image_height
+        gf.thumbnail = done.thumbnail
+        gf.mime_type = done.mime_type
+        return
+
+    with open(path, "rb") as f:
+        head = f.read(512)
+    gf.mime_type = sniff_mime(head, gf.original_name)
+
+    if gf.mime_type == "application/pdf":
+        gf.page_count = count_pdf_pages(path)
+    elif gf.mime_type.startswith("image/"):
+        try:
+            result = make_thumbnail(path, upload_folder, gf.sha256)
+        except Exception:
+            result = None  # صورة تالفة: نكتفي بالنوع والحجم
+        if result:
+            gf.image_width, gf.image_height, gf.thumbnail = result
+
+
+# ------------ Worker pool ------------
+
+class FileProcessor:
+    """
+    Pool محدود من الـ threads يعالج جدول file_jobs بعيداً عن الطلبات.
+    المهام محفوظة في قاعدة البيانات، فلو انعاد تشغيل الـ worker تكمل من حيث وقفت.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        poll_seconds: float = 10.0,
+        max_attempts: int = 3,
+        retry_seconds: float = 30.0,
+    ):
+        self.enabled = True
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.stale_after = timedelta(minutes=10)
+        self.app = None
+        self.db = None
+
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._pid = None
+        self.in_flight = 0
+
+        self.processed = 0
+        self.failed = 0
+        self.latency_seconds_total = 0.0
+        self.max_latency_seconds = 0.0
+        self.run_seconds_total = 0.0
+        # الـ worker المولود بـ fork ما يورث الـ threads، يشغّل dispatcher حقه
+        if hasattr(os, "register_at_fork"):  # مو موجود على Windows
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("FILE_JOBS_ENABLED", self.enabled)
+        self.workers = app.config.get("FILE_JOB_WORKERS", self.workers)
+        self.poll_seconds = app.config.get("FILE_JOB_POLL_SECONDS", self.poll_seconds)
+        self.max_attempts = app.config.get("FILE_JOB_MAX_ATTEMPTS", self.max_attempts)
+        self.retry_seconds = app.config.get("FILE_JOB_RETRY_SECONDS", self.retry_seconds)
+        self.app = app
+        self.db = app.extensions["sqlalchemy"]
+        app.extensions["file_processor"] = self
+
+        # مهام باقية من قبل إعادة التشغيل (أو retry مؤجل) ما تنتظر أول رفع جديد —
+        # بس نبدأ مع أول طلب، مو في create_app: أوامر الـ CLI (db-upgrade وغيره) والأب
+        # في gunicorn --preload ما يخدمون طلبات، ولا يشغّلون dispatcher قبل الـ migrations
+        app.before_request(self._start_in_worker)
+
+    # ---------- Public ----------
+
+    def enqueue(self, file_id: int):
+        """يضيف مهمة للـ session الحالي (تنحفظ مع نفس الـ commit)"""
+        from models.file_job import FileJob
+
+        job = FileJob(file_id=file_id, status="pending")
+        self.db.session.add(job)
+        return job
+
+    def notify(self) -> None:
+        """بعد الـ commit: نصحّي الـ dispatcher عشان يلتقط المهام الجديدة"""
+        if not self.enabled:
+            return
+        self._ensure_started()
+        self._wake.set()
+
+    def run_pending(self, limit=None) -> int:
+        """يعالج المهام المعلّقة في نفس الـ thread (للـ CLI)"""
+        done = 0
+        while limit is None or done < limit:
+            job_ids = self._claim(1)
+            if not job_ids:
+                break
+            self._run(job_ids[0])
+            done += 1
+        return done
+
+    def stats(self) -> dict:
+        from models.file_job import FileJob
+
+        counts = dict(
+            self.db.session.query(FileJob.status, self.db.func.count(FileJob.id))
+            .group_by(FileJob.status)
+            .all()
+        )
+        finished = (self.processed + self.failed) or 1
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": counts.get("pending", 0),
+            "jobs_by_status": counts,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_latency_ms": self.latency_seconds_total * 1000 / finished,
+            "max_latency_ms": self.max_latency_seconds * 1000,
+            "avg_run_ms": self.run_seconds_total * 1000 / finished,
+        }
+
+    # ---------- Dispatcher ----------
+
+    def _ensure_started(self):
+        # بعد fork (gunicorn --preload) لازم thread و executor جداد للـ worker
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            self._pid = os.getpid()
+            self.in_flight = 0
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="file-job"
+            )
+            self._thread = threading.Thread(
+                target=self._dispatch, name="file-job-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def _start_in_worker(self):
+        if self.enabled:
+            self._ensure_started()
+
+    def _restart_in_child(self):
+        self._lock = threading.Lock()  # ممكن كان ممسوك وقت الـ fork
+        self._thread = None  # أول طلب في الـ worker يشغّل dispatcher جديد
+
+    def _dispatch(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+            if not self.enabled:
+                continue  # init_app طفّاه بعد ما اشتغل
+
+            free = self.workers - self.in_flight
+            if free <= 0:
+                continue
+
+            try:
+                with self.app.app_context():
+                    job_ids = self._claim(free)
+                    self.db.session.remove()
+            except Exception:
+                continue
+
+            for job_id in job_ids:
+                with self._lock:
+                    self.in_flight += 1
+                self._executor.submit(self._run_in_context, job_id)
+
+    def _claim(self, limit: int):
+        """ياخذ مهام pending بـ UPDATE شرطي — آمن لو فيه أكثر من process"""
+        from models.file_job import FileJob
+
+        db = self.db
+        now = datetime.utcnow()
+
+        # مهام علقت في running (الـ process مات) ترجع pending
+        FileJob.query.filter(
+            FileJob.status == "running", FileJob.started_at < now - self.stale_after
+        ).update({FileJob.status: "pending"}, synchronize_session=False)
+
+        candidates = [
+            job_id
+            for (job_id,) in db.session.query(FileJob.id)
+            .filter(
+                FileJob.status == "pending",
+                db.or_(FileJob.next_attempt_at.is_(None), FileJob.next_attempt_at <= now),
+            )
+            .order_by(FileJob.id.asc())
+            .limit(limit)
+        ]
+
+        claimed = []
+        for job_id in candidates:
+            updated = FileJob.query.filter_by(id=job_id, status="pending").update(
+                {
+                    FileJob.status: "running",
+                    FileJob.started_at: now,
+                    FileJob.attempts: FileJob.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+            if updated:
+                claimed.append(job_id)
+
+        db.session.commit()
+        return claimed
+
+    def _run_in_context(self, job_id: int):
+        try:
+            with self.app.app_context():
+                self._run(job_id)
+                self.db.session.remove()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            # خلصنا وحدة — يمكن فيه مهام تنتظر مكان
+            self._wake.set()
+
+    def _run(self, job_id: int):
+        from models.file import GroupFile
+        from models.file_job import FileJob
+        from models.group import Group
+
+        db = self.db
+        started = time.perf_counter()
+        job = db.session.get(FileJob, job_id)
+        gf = db.session.get(GroupFile, job.file_id)
+
+        try:
+            if gf is None:
+                raise LookupError(f"file {job.file_id} no longer exists")
+            process_file(gf, self.app.config["UPLOAD_FOLDER"])
+            gf.meta_status = "done"
+            job.status = "done"
+            job.error = None
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(FileJob, job_id)
+            gf = db.session.get(GroupFile, job.file_id)
+            job.error = f"{type(e).__name__}: {e}"
+            if job.attempts >= self.max_attempts:
+                job.status = "failed"
+                if gf is not None:
+                    gf.meta_status = "failed"
+            else:
+                # backoff أسّي: retry_seconds، ضعفها، ...
+                job.status = "pending"
+                job.next_attempt_at = datetime.utcnow() + timedelta(
+                    seconds=self.retry_seconds * 2 ** (job.attempts - 1)
+                )
+
+        job.finished_at = datetime.utcnow()
+        if gf is not None and job.status != "pending":
+            Group.bump_version(gf.group_id, "files")
+        db.session.commit()
+
+        if job.status == "done":
+            self.processed += 1
+        elif job.status == "failed":
+            self.failed += 1
+        if job.status != "pending":
+            latency = (job.finished_at - job.created_at).total_seconds()
+            self.latency_seconds_total += latency
+            self.max_latency_seconds = max(self.max_latency_seconds, latency)
+            self.run_seconds_total += time.perf_counter() - started
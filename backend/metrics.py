@@ -0,0 +1,352 @@
+# backend/metrics.py
+"""
+/metrics بصيغة Prometheus (text format 0.0.4) بدون مكتبة خارجية:
+عدد الطلبات لكل endpoint/status، histogram للوقت، الطلبات الجارية، وحالة الـ DB pool.
+
+تحت gunicorn كل worker له ذاكرته — فمع METRICS_MULTIPROC_DIR كل process يكتب
+snapshot (metrics-<pid>.json) كل METRICS_FLUSH_SECONDS، و /metrics يجمعها كلها.
+الـ counters من workers ماتوا تنحسب (ما ترجع تنقص)، والـ gauges من الأحياء بس.
+extensions ثانية تضيف مقاييسها بـ add_collector (write-behind الرسائل مثلاً).
+امسح المجلد مع كل deploy (مثل prometheus_client multiprocess).
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import Response, g, request
+from sqlalchemy import text
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return _pid_alive_windows(pid)
+    # signal 0 = فحص بس، ما يوصل للـ process شي
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pid_alive_windows(pid: int) -> bool:
+    # على Windows os.kill(pid, 0) يقتل الـ process (TerminateProcess) — نسأل الـ kernel بدالها
+    import ctypes
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+    ERROR_ACCESS_DENIED = 5
+
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # موجود بس مو لنا
+        return kernel32.GetLastError() == ERROR_ACCESS_DENIED
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def pool_status(engine) -> dict:
+    """حالة الـ pool (QueuePool) — None لو الـ pool ما يعدّ (NullPool/StaticPool)"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return None
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        # -1 = بدون حد
+        "capacity": None if max_overflow < 0 else pool.size() + max_overflow,
+    }
+
+
+class Metrics:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.buckets = DEFAULT_BUCKETS
+        self.multiproc_dir = None
+        self.flush_seconds = 5.0
+        self.ready_pool_ratio = 0.9
+        self._lock = threading.Lock()
+        self._collectors = {}  # name -> collect()
+        self._reset()
+        if hasattr(os, "register_at_fork"):  # مو موجود على Windows
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # الـ worker يبدأ من صفر (ما يورث عدّادات الأب)
+        self._requests = Counter()  # (blueprint, endpoint, method, status) -> count
+        self._durations = {}  # (blueprint, endpoint, method) -> [buckets..., +Inf], sum
+        self.in_flight = 0
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """بعد db.init_app — نقرأ الـ pools وقت الـ scrape"""
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        self.buckets = tuple(app.config.get("METRICS_BUCKETS") or DEFAULT_BUCKETS)
+        self.multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR") or None
+        self.flush_seconds = app.config.get("METRICS_FLUSH_SECONDS", self.flush_seconds)
+        self.ready_pool_ratio = app.config.get("READINESS_POOL_MAX_RATIO", self.ready_pool_ratio)
+        self.app = app
+        app.extensions["metrics"] = self
+
+        if not self.enabled:
+            return
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            atexit.register(self.flush)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def add_collector(self, name: str, collect) -> None:
+        """
+        collect() يرجع [(metric, type, help, value)] وقت كل snapshot.
+        type: counter أو gauge أو summary (value = (sum, count)).
+        نفس الـ name مرة ثانية يبدّل القديم (create_app أكثر من مرة)
+        """
+        self._collectors[name] = collect
+
+    # ---------- Request hooks ----------
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+
+    def _after_request(self, response):
+        self._observe(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        if "metrics_observed" not in g:
+            self._observe(500, started)  # exception ما وصل لـ after_request
+        with self._lock:
+            self.in_flight -= 1
+        if self.multiproc_dir and time.monotonic() - self._flushed_at >= self.flush_seconds:
+            self.flush()
+
+    def _observe(self, status: int, started=None):
+        started = started if started is not None else g.get("metrics_started")
+        if started is None:
+            return
+        g.metrics_observed = True
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "<unmatched>"
+        blueprint = request.blueprint or ""
+        key = (blueprint, endpoint, request.method)
+        index = bisect.bisect_left(self.buckets, elapsed)
+
+        with self._lock:
+            self._requests[key + (str(status),)] += 1
+            hist = self._durations.get(key)
+            if hist is None:
+                hist = self._durations[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            hist[0][index] += 1
+            hist[1] += elapsed
+
+    # ---------- Snapshots ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests = [list(key) + [count] for key, count in self._requests.items()]
+            durations = [list(key) + [list(counts), total] for key, (counts, total) in self._durations.items()]
+            in_flight = self.in_flight
+        return {
+            "pid": os.getpid(),
+            "buckets": list(self.buckets),
+            "requests": requests,
+            "durations": durations,
+            "in_flight": in_flight,
+            "pools": self._pools(),
+            "custom": self._custom(),
+        }
+
+    def _custom(self) -> list:
+        samples = []
+        for collect in list(self._collectors.values()):
+            samples.extend(list(sample) for sample in collect())
+        return samples
+
+    def _pools(self) -> dict:
+        pools = {}
+        if self.app is None:
+            return pools
+        with self.app.app_context():
+            for key, engine in self.app.extensions["sqlalchemy"].engines.items():
+                status = pool_status(engine)
+                if status is not None:
+                    pools[key or "primary"] = status
+        return pools
+
+    def flush(self) -> None:
+        """يكتب snapshot هذا الـ process (write + rename عشان القارئ ما يشوف نص ملف)"""
+        if not self.multiproc_dir:
+            return
+        self._flushed_at = time.monotonic()
+        path = os.path.join(self.multiproc_dir, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _collect(self) -> list:
+        if not self.multiproc_dir:
+            return [self.snapshot()]
+
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.multiproc_dir):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("buckets") != list(self.buckets):
+                continue  # إعدادات قديمة — ما نقدر نجمعها
+            if not _pid_alive(snapshot["pid"]):
+                snapshot["in_flight"], snapshot["pools"] = 0, {}
+                snapshot["custom"] = [s for s in snapshot.get("custom", []) if s[1] != "gauge"]
+            snapshots.append(snapshot)
+        return snapshots
+
+    # ---------- Exposition ----------
+
+    def render(self) -> str:
+        requests = Counter()
+        durations = {}
+        in_flight = 0
+        pools = {}
+        custom = {}  # metric -> [type, help, value]
+        for snapshot in self._collect():
+            for *key, count in snapshot["requests"]:
+                requests[tuple(key)] += count
+            for blueprint, endpoint, method, counts, total in snapshot["durations"]:
+                merged = durations.setdefault((blueprint, endpoint, method), [[0] * len(counts), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+            in_flight += snapshot["in_flight"]
+            for name, status in snapshot["pools"].items():
+                merged = pools.setdefault(name, Counter())
+                for field in ("size", "checked_out", "overflow"):
+                    merged[field] += status[field]
+            for metric, kind, help_text, value in snapshot.get("custom", []):
+                merged = custom.setdefault(metric, [kind, help_text, [0, 0] if kind == "summary" else 0])
+                if kind == "summary":
+                    merged[2] = [merged[2][0] + value[0], merged[2][1] + value[1]]
+                else:
+                    merged[2] += value
+
+        lines = [
+            "# HELP http_requests_total HTTP requests by endpoint and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (blueprint, endpoint, method, status), count in sorted(requests.items()):
+            labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method, status=status)
+            lines.append(f"http_requests_total{labels} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds Time spent handling the request (until the response is returned).",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (blueprint, endpoint, method), (counts, total) in sorted(durations.items()):
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += count
+                labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method, le=bound)
+                lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method)
+            lines.append(f"http_request_duration_seconds_sum{labels} {total:.6f}")
+            lines.append(f"http_request_duration_seconds_count{labels} {cumulative}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+        ]
+
+        for field, help_text in (
+            ("size", "Connections kept in the pool."),
+            ("checked_out", "Connections currently checked out of the pool."),
+            ("overflow", "Connections opened beyond the pool size."),
+        ):
+            lines += [f"# HELP db_pool_{field} {help_text}", f"# TYPE db_pool_{field} gauge"]
+            for name, status in sorted(pools.items()):
+                lines.append(f"db_pool_{field}{_labels(engine=name)} {status[field]}")
+
+        for metric, (kind, help_text, value) in sorted(custom.items()):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            if kind == "summary":
+                lines += [f"{metric}_sum {value[0]}", f"{metric}_count {value[1]}"]
+            else:
+                lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+    # ---------- Readiness ----------
+
+    def readiness(self):
+        """(ready, checks): الاتصال بقاعدة البيانات، امتلاء الـ pool، ونسخة الـ schema"""
+        from migrations import LATEST_VERSION
+
+        app = self.app
+        checks = {}
+        ready = True
+
+        db = app.extensions["sqlalchemy"]
+        try:
+            started = time.perf_counter()
+            with db.engine.connect().execution_options(sql_stats=False) as conn:
+                conn.execute(text("SELECT 1"))
+            checks["database"] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 3)}
+        except Exception as e:
+            ready = False
+            checks["database"] = {"ok": False, "error": f"{type(e).__name__}: {str(e).splitlines()[0]}"}
+
+        for name, status in self._pools().items():
+            saturated = (
+                status["capacity"] is not None
+                and status["checked_out"] >= status["capacity"] * self.ready_pool_ratio
+            )
+            ready = ready and not saturated
+            checks[f"pool:{name}"] = {"ok": not saturated, **status}
+
+        version = app.config.get("SCHEMA_VERSION")
+        schema_ok = version is None or version >= LATEST_VERSION
+        ready = ready and schema_ok
+        checks["schema"] = {"ok": schema_ok, "version": version, "expected": LATEST_VERSION}
+
+        return ready, checks
@@ -0,0 +1,459 @@
+# backend/migrations.py
+"""
+ترقيات قاعدة البيانات بأرقام نسخ (SQLite و PostgreSQL).
+
+تنشغل مرة وحدة من برّا السيرفر:  flask db-upgrade
+والنسخة المطبّقة تنحفظ في جدول schema_version، فالـ workers وقت التشغيل
+يكفيهم استعلام واحد رخيص (current_version) بدل create_all و DDL مع كل boot.
+
+كل ترقية idempotent (IF NOT EXISTS / نشيّك الأعمدة قبل ALTER) لأن قواعد
+البيانات القديمة انبنت بـ create_all وفيها جزء من الجداول والأعمدة.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+SCHEMA_TABLE = "schema_version"
+
+
+# ------------ Helpers ------------
+
+def quote(conn, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def add_missing_columns(conn, table: str, columns) -> list:
+    """ALTER TABLE ADD COLUMN لكل عمود مو موجود. columns: [(name, ddl), ...]"""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    added = []
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {quote(conn, table)} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    return added
+
+
+def create_index(conn, name: str, table: str, columns: str, unique: bool = False) -> None:
+    conn.execute(
+        text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+            f"ON {quote(conn, table)} ({columns})"
+        )
+    )
+
+
+# ------------ Migrations ------------
+
+def m001_baseline(conn):
+    """
+    الـ schema وقت ما بدأنا الترقيات (مجمّد: ما يعتمد على الموديلات الحالية).
+    عمود جديد في موديل = ترقية جديدة، مو تعديل هنا.
+    """
+    if conn.dialect.name == "sqlite":
+        pk, timestamp = "INTEGER NOT NULL PRIMARY KEY", "DATETIME"
+        messages_pk = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    else:
+        pk, timestamp = "SERIAL NOT NULL PRIMARY KEY", "TIMESTAMP WITHOUT TIME ZONE"
+        messages_pk = "id SERIAL PRIMARY KEY"
+
+    user, group = quote(conn, "user"), quote(conn, "group")
+    tables = {
+        "user": f"""
+            id {pk},
+            name VARCHAR(120) NOT NULL,
+            email VARCHAR(120) NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            UNIQUE (email)
+        """,
+        "group": f"""
+            id {pk},
+            name VARCHAR(120) NOT NULL,
+            invite_code VARCHAR(20) NOT NULL,
+            owner_id INTEGER NOT NULL REFERENCES {user} (id),
+            members_count INTEGER NOT NULL DEFAULT 0,
+            tasks_version INTEGER NOT NULL DEFAULT 0,
+            members_version INTEGER NOT NULL DEFAULT 0,
+            files_version INTEGER NOT NULL DEFAULT 0,
+            messages_version INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (invite_code)
+        """,
+        "group_member": f"""
+            id {pk},
+            group_id INTEGER NOT NULL REFERENCES {group} (id),
+            user_id INTEGER NOT NULL REFERENCES {user} (id),
+            role VARCHAR(20)
+        """,
+        "tasks": f"""
+            id {pk},
+            group_id INTEGER NOT NULL,
+            title VARCHAR(200) NOT NULL,
+            description TEXT,
+            priority VARCHAR(20),
+            due_date DATE,
+            is_done BOOLEAN,
+            created_at {timestamp}
+        """,
+        "group_files": f"""
+            id {pk},
+            group_id INTEGER NOT NULL,
+            filename VARCHAR(255) NOT NULL,
+            original_name VARCHAR(255) NOT NULL,
+            sha256 VARCHAR(64),
+            size BIGINT,
+            mime_type VARCHAR(120),
+            page_count INTEGER,
+            image_width INTEGER,
+            image_height INTEGER,
+            thumbnail VARCHAR(255),
+            meta_status VARCHAR(20),
+            uploaded_at {timestamp}
+        """,
+        "upload_sessions": f"""
+            id VARCHAR(32) NOT NULL PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            original_name VARCHAR(255) NOT NULL,
+            total_size BIGINT,
+            received BIGINT NOT NULL,
+            created_at {timestamp}
+        """,
+        "file_jobs": f"""
+            id {pk},
+            file_id INTEGER NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            attempts INTEGER NOT NULL,
+            error TEXT,
+            created_at {timestamp},
+            started_at {timestamp},
+            finished_at {timestamp}
+        """,
+        # الرسائل ما لها موديل
+        "messages": f"""
+            {messages_pk},
+            group_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """,
+    }
+    indexes = {
+        "group_member": [
+            ("uq_group_member_user_group", "user_id, group_id", True),
+            ("ix_group_member_group_id", "group_id", False),
+        ],
+        "tasks": [("ix_tasks_group_id", "group_id", False)],
+        "group_files": [
+            ("ix_group_files_group_id", "group_id", False),
+            ("ix_group_files_sha256", "sha256", False),
+        ],
+        "file_jobs": [
+            ("ix_file_jobs_file_id", "file_id", False),
+            ("ix_file_jobs_status", "status", False),
+        ],
+    }
+
+    # الجداول الموجودة (قواعد create_all القديمة) ما تنلمس: أعمدتها وindexes حقها
+    # في الترقيات اللي بعد (0004 ينظّف العضويات المكررة قبل الـ unique index)
+    existing = set(inspect(conn).get_table_names())
+    for table, columns in tables.items():
+        if table in existing:
+            continue
+        conn.execute(text(f"CREATE TABLE {quote(conn, table)} ({columns})"))
+        for name, indexed, unique in indexes.get(table, []):
+            create_index(conn, name, table, indexed, unique=unique)
+
+
+def m002_group_counters(conn):
+    """عدّاد الأعضاء ونسخ القوائم على group (القواعد القديمة ما فيها هالأعمدة)"""
+    # Group.VERSIONED_COLLECTIONS وقتها — قائمة جديدة هناك = ترقية جديدة هنا
+    counters = [
+        "members_count",
+        "tasks_version",
+        "members_version",
+        "files_version",
+        "messages_version",
+    ]
+    added = add_missing_columns(
+        conn, "group", [(column, "INTEGER NOT NULL DEFAULT 0") for column in counters]
+    )
+
+    if "members_count" in added:
+        conn.execute(
+            text(
+                'UPDATE "group" SET members_count = ('
+                "SELECT COUNT(*) FROM group_member "
+                'WHERE group_member.group_id = "group".id)'
+            )
+        )
+
+
+def m003_file_metadata(conn):
+    """أعمدة المحتوى (sha256/size) وبيانات الـ worker على group_files"""
+    add_missing_columns(
+        conn,
+        "group_files",
+        [
+            ("sha256", "VARCHAR(64)"),
+            ("size", "BIGINT"),
+            ("mime_type", "VARCHAR(120)"),
+            ("page_count", "INTEGER"),
+            ("image_width", "INTEGER"),
+            ("image_height", "INTEGER"),
+            ("thumbnail", "VARCHAR(255)"),
+            ("meta_status", "VARCHAR(20)"),
+        ],
+    )
+    create_index(conn, "ix_group_files_sha256", "group_files", "sha256")
+
+
+def m004_hot_path_indexes(conn):
+    """
+    indexes للاستعلامات اللي تنفّذ مع كل طلب تقريباً:
+    فحص العضوية (user_id, group_id)، قوائم المهام/الملفات/الأعضاء بـ group_id،
+    وصفحات الرسائل بـ (group_id, created_at, id).
+    """
+    # العضوية المكررة (من قبل ما يكون فيه unique) — نخلي الأقدم
+    deleted = conn.execute(
+        text(
+            "DELETE FROM group_member WHERE id NOT IN ("
+            "SELECT MIN(id) FROM group_member GROUP BY user_id, group_id)"
+        )
+    ).rowcount
+    if deleted:
+        conn.execute(
+            text(
+                'UPDATE "group" SET members_count = ('
+                "SELECT COUNT(*) FROM group_member "
+                'WHERE group_member.group_id = "group".id), '
+                "members_version = members_version + 1"
+            )
+        )
+
+    create_index(conn, "uq_group_member_user_group", "group_member", "user_id, group_id", unique=True)
+    create_index(conn, "ix_group_member_group_id", "group_member", "group_id")
+    create_index(conn, "ix_tasks_group_id", "tasks", "group_id")
+    create_index(conn, "ix_group_files_group_id", "group_files", "group_id")
+    create_index(conn, "ix_messages_group_created_id", "messages", "group_id, created_at, id")
+
+
+# m005: مصادر الفهرس وتوحيد الكتابة العربية مثل ما كانت وقتها (search.py يوحّد
+# الاستعلام بنفس الشي). تعديلها = ترقية جديدة تعيد بناء الـ triggers والفهرس
+# النوع -> (كوده في رقم المستند، الجدول، عنوان، نص، الأعمدة اللي تغييرها يحدّث الفهرس)
+SEARCH_SOURCES_V5 = {
+    "task": (1, "tasks", "{row}.title", "coalesce({row}.description, '')", ("title", "description", "group_id")),
+    "message": (2, "messages", "''", "{row}.content", ("content", "group_id")),
+    "file": (3, "group_files", "{row}.original_name", "''", ("original_name", "group_id")),
+}
+SEARCH_FOLD_V5 = [("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"), ("ى", "ي"), ("ئ", "ي"), ("ؤ", "و"), ("ة", "ه")]
+SEARCH_STRIP_V5 = [chr(c) for c in range(0x064B, 0x0653)] + ["ٰ", "ـ"]
+
+
+def _search_fold_sql(expr: str, dialect: str) -> str:
+    if dialect == "postgresql":
+        source = "".join(c for c, _ in SEARCH_FOLD_V5) + "".join(SEARCH_STRIP_V5)
+        target = "".join(r for _, r in SEARCH_FOLD_V5)  # translate يحذف الباقي
+        return f"translate({expr}, '{source}', '{target}')"
+
+    for char, repl in SEARCH_FOLD_V5 + [(c, "") for c in SEARCH_STRIP_V5]:
+        expr = f"replace({expr}, '{char}', '{repl}')"
+    return expr
+
+
+def _search_document(kind: str, row: str, dialect: str):
+    code, _, title, body, _ = SEARCH_SOURCES_V5[kind]
+    return (
+        f"{row}.id * 4 + {code}",
+        _search_fold_sql(title.format(row=row), dialect),
+        _search_fold_sql(body.format(row=row), dialect),
+    )
+
+
+def m005_search_index(conn):
+    """فهرس البحث (FTS5 / tsvector) مع triggers المزامنة وتعبئة الموجود"""
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql":
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS search_index (
+                    doc_id BIGINT PRIMARY KEY,
+                    kind VARCHAR(10) NOT NULL,
+                    ref_id INTEGER NOT NULL,
+                    group_id INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    tsv tsvector GENERATED ALWAYS AS (
+                        setweight(to_tsvector('simple', title), 'A')
+                        || setweight(to_tsvector('simple', body), 'B')
+                    ) STORED
+                )
+                """
+            )
+        )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_search_index_tsv ON search_index USING GIN (tsv)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_search_index_group_id ON search_index (group_id)"))
+    else:
+        conn.execute(
+            text(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    title, body,
+                    kind UNINDEXED, ref_id UNINDEXED, group_id UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """
+            )
+        )
+
+    for kind, (code, table, _, _, watched) in SEARCH_SOURCES_V5.items():
+        quoted = quote(conn, table)
+        doc_id, title, body = _search_document(kind, "NEW" if dialect == "postgresql" else "new", dialect)
+
+        if dialect == "postgresql":
+            conn.execute(
+                text(
+                    f"""
+                    CREATE OR REPLACE FUNCTION search_sync_{table}() RETURNS trigger AS $$
+                    BEGIN
+                        IF TG_OP = 'DELETE' THEN
+                            DELETE FROM search_index WHERE doc_id = OLD.id * 4 + {code};
+                            RETURN OLD;
+                        END IF;
+                        INSERT INTO search_index (doc_id, kind, ref_id, group_id, title, body)
+                        VALUES ({doc_id}, '{kind}', NEW.id, NEW.group_id, {title}, {body})
+                        ON CONFLICT (doc_id) DO UPDATE SET
+                            group_id = EXCLUDED.group_id,
+                            title = EXCLUDED.title,
+                            body = EXCLUDED.body;
+                        RETURN NEW;
+                    END
+                    $$ LANGUAGE plpgsql
+                    """
+                )
+            )
+            conn.execute(text(f"DROP TRIGGER IF EXISTS search_sync ON {quoted}"))
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER search_sync AFTER INSERT OR DELETE OR UPDATE OF "
+                    f"{', '.join(watched)} ON {quoted} "
+                    f"FOR EACH ROW EXECUTE FUNCTION search_sync_{table}()"
+                )
+            )
+        else:
+            insert = (
+                "INSERT INTO search_index (rowid, title, body, kind, ref_id, group_id) "
+                f"VALUES ({doc_id}, {title}, {body}, '{kind}', new.id, new.group_id);"
+            )
+            delete = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+            conn.execute(
+                text(f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {quoted} BEGIN {insert} END")
+            )
+            # تعليم المهمة كمنجزة مثلاً ما يلمس الفهرس
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE OF "
+                    f"{', '.join(watched)} ON {quoted} BEGIN {delete} {insert} END"
+                )
+            )
+            conn.execute(
+                text(f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {quoted} BEGIN {delete} END")
+            )
+
+        # البيانات الموجودة قبل الـ triggers
+        doc_id, title, body = _search_document(kind, quoted, dialect)
+        id_column = "doc_id" if dialect == "postgresql" else "rowid"
+        conn.execute(
+            text(
+                f"INSERT INTO search_index ({id_column}, kind, ref_id, group_id, title, body) "
+                f"SELECT {doc_id}, '{kind}', {quoted}.id, {quoted}.group_id, {title}, {body} "
+                f"FROM {quoted} WHERE {doc_id} NOT IN (SELECT {id_column} FROM search_index)"
+            )
+        )
+
+
+def m006_file_job_backoff(conn):
+    """وقت المحاولة الجاية للمهام اللي فشلت (backoff)"""
+    add_missing_columns(conn, "file_jobs", [("next_attempt_at", "TIMESTAMP")])
+
+
+# (النسخة، الوصف، الدالة) — بالترتيب، وما نعدّل ترقية انطبقت، نضيف وحدة جديدة
+MIGRATIONS = [
+    (1, "baseline schema", m001_baseline),
+    (2, "group counters and collection versions", m002_group_counters),
+    (3, "group file content and metadata columns", m003_file_metadata),
+    (4, "hot-path indexes", m004_hot_path_indexes),
+    (5, "full-text search index", m005_search_index),
+    (6, "file job retry backoff", m006_file_job_backoff),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ------------ Runner ------------
+
+def current_version(engine) -> int:
+    """استعلام واحد: آخر نسخة مطبّقة (0 لو القاعدة جديدة)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text(f"SELECT MAX(version) FROM {SCHEMA_TABLE}")).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # 0 بس لو الجدول فعلاً مو موجود — قاعدة واقفة أو صلاحيات ناقصة لازم تطلع
+        with engine.connect() as conn:
+            if inspect(conn).has_table(SCHEMA_TABLE):
+                raise
+        return 0
+
+
+def _ensure_schema_table(conn):
+    conn.execute(
+        text(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(200) NOT NULL,
+                applied_at TIMESTAMP NOT NULL
+            )
+            """
+        )
+    )
+
+
+def _lock(conn):
+    """ما نبي process ثاني يطبّق نفس الترقية بنفس الوقت (SQLite يقفل الملف بنفسه)"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": SCHEMA_TABLE})
+
+
+def upgrade(engine, target=None, log=print) -> list:
+    """يطبّق الترقيات الناقصة لين target (الافتراضي: الأحدث). كل ترقية في transaction"""
+    target = LATEST_VERSION if target is None else target
+
+    with engine.begin() as conn:
+        _ensure_schema_table(conn)
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version > target:
+            break
+
+        with engine.begin() as conn:
+            _lock(conn)
+            done = conn.execute(
+                text(f"SELECT 1 FROM {SCHEMA_TABLE} WHERE version = :v"), {"v": version}
+            ).first()
+            if done:
+                continue
+
+            migrate(conn)
+            conn.execute(
+                text(
+                    f"INSERT INTO {SCHEMA_TABLE} (version, description, applied_at) "
+                    "VALUES (:v, :d, :t)"
+                ),
+                {"v": version, "d": description, "t": datetime.utcnow()},
+            )
+            applied.append(version)
+            log(f"applied {version:04d} {description}")
+
+    return applied
@@ -3,3 +3,5 @@ from .group import Group
 from .group_member import GroupMember
 from .task import Task
 from .file import GroupFile
+from .upload_session import UploadSession
+from .file_job import FileJob
@@ -6,9 +6,19 @@ class GroupFile(db.Model):
     __tablename__ = "group_files"
 
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, nullable=False)  # Foreign key لـ StudyGroup
+    group_id = db.Column(db.Integer, nullable=False, index=True)  # Foreign key لـ StudyGroup
     filename = db.Column(db.String(255), nullable=False)       # الاسم المخزَّن في السيرفر
     original_name = db.Column(db.String(255), nullable=False)  # الاسم الأصلي للملف
+    sha256 = db.Column(db.String(64), nullable=True, index=True)  # بصمة المحتوى (نفس المحتوى = نفس الملف على الديسك)
+    size = db.Column(db.BigInteger, nullable=True)
+
+    # بيانات يحسبها الـ worker بعد الرفع (file_jobs) — عشان القائمة ما تلمس الديسك
+    mime_type = db.Column(db.String(120), nullable=True)
+    page_count = db.Column(db.Integer, nullable=True)      # للـ PDF
+    image_width = db.Column(db.Integer, nullable=True)     # للصور
+    image_height = db.Column(db.Integer, nullable=True)
+    thumbnail = db.Column(db.String(255), nullable=True)   # الاسم المخزَّن للصورة المصغّرة
+    meta_status = db.Column(db.String(20), nullable=True)  # pending / done / failed
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
@@ -17,6 +27,14 @@ class GroupFile(db.Model):
             "group_id": self.group_id,
             "filename": self.filename,
             "original_name": self.original_name,
+            "sha256": self.sha256,
+            "size": self.size,
+            "mime_type": self.mime_type,
+            "page_count": self.page_count,
+            "image_width": self.image_width,
+            "image_height": self.image_height,
+            "thumbnail_url": f"/groups/files/{self.id}/thumbnail" if self.thumbnail else None,
+            "meta_status": self.meta_status,
             "uploaded_at": self.uploaded_at.isoformat() if self.uploaded_at else None,
             "download_url": f"/groups/files/{self.id}/download",
         }
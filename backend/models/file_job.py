@@ -0,0 +1,21 @@
+from datetime import datetime
+from app import db
+
+
+class FileJob(db.Model):
+    """مهمة معالجة ملف بعد الرفع (نخزّنها عشان ما تضيع لو انعاد تشغيل السيرفر)"""
+
+    __tablename__ = "file_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)  # pending / running / done / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)  # بعد فشل: ما تنعاد قبل هالوقت
+
+    def __repr__(self):
+        return f"<FileJob {self.id} file={self.file_id} {self.status}>"
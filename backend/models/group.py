@@ -2,6 +2,9 @@ from extensions import db
 
 
 class Group(db.Model):
+    # المجموعات اللي لها عدّاد نسخة (ETag) — كل تعديل عليها يزيد العدّاد
+    VERSIONED_COLLECTIONS = ("tasks", "members", "files", "messages")
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     invite_code = db.Column(db.String(20), unique=True, nullable=False)
@@ -9,9 +12,29 @@ class Group(db.Model):
     # صاحب (مالك) القروب
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # عدد الأعضاء (denormalized) — يتحدّث مع كل إضافة/حذف عضوية
+    members_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # نسخة كل قائمة في القروب (تزيد مع كل تعديل) — تُستخدم للـ ETag
+    tasks_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    members_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    files_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    messages_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # أعضاء القروب
     members = db.relationship(
         "GroupMember",
         backref="group",
         cascade="all, delete"
     )
+
+    def version_of(self, collection: str) -> int:
+        return getattr(self, f"{collection}_version") or 0
+
+    @classmethod
+    def bump_version(cls, group_id: int, collection: str) -> None:
+        """يزيد نسخة القائمة داخل نفس الـ transaction (الزيادة في SQL)"""
+        column = getattr(cls, f"{collection}_version")
+        cls.query.filter_by(id=group_id).update(
+            {column: column + 1}, synchronize_session=False
+        )
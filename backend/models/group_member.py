@@ -2,8 +2,13 @@ from extensions import db
 
 
 class GroupMember(db.Model):
+    # فحص العضوية (user_id, group_id) يصير مع كل طلب تقريباً — و ما نسمح بعضوية مكررة
+    __table_args__ = (
+        db.Index("uq_group_member_user_group", "user_id", "group_id", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     # role: "owner" أو "admin" أو "member"
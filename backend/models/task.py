@@ -6,12 +6,14 @@ class Task(db.Model):
     __tablename__ = "tasks"
 
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, nullable=False)  # StudyGroup.id
+    group_id = db.Column(db.Integer, nullable=False, index=True)  # StudyGroup.id
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)   # وصف المهمة
     priority = db.Column(db.String(20), default="normal")  # low / normal / high
     due_date = db.Column(db.Date, nullable=True)
     is_done = db.Column(db.Boolean, default=False)
+    # الـ API والفرونت يستخدمون "completed"
+    completed = db.synonym("is_done")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
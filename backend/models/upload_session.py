@@ -0,0 +1,28 @@
+from datetime import datetime
+from app import db
+
+
+class UploadSession(db.Model):
+    """رفع ملف على دفعات (chunks) — نقدر نكمّل منه لو انقطع الاتصال"""
+
+    __tablename__ = "upload_sessions"
+
+    id = db.Column(db.String(32), primary_key=True)  # token عشوائي
+    group_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    original_name = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=True)  # لو العميل حدده مقدماً
+    received = db.Column(db.BigInteger, nullable=False, default=0)  # آخر offset مكتوب فعلاً
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "upload_id": self.id,
+            "group_id": self.group_id,
+            "original_name": self.original_name,
+            "total_size": self.total_size,
+            "offset": self.received,
+        }
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.received}/{self.total_size}>"
@@ -0,0 +1,184 @@
+# backend/passwords.py
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from itertools import repeat
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """الـ pool مليان أو الطلب انتظر أكثر من المسموح — الأفضل 503 من انتظار بلا نهاية"""
+
+
+def placeholder_password() -> str:
+    """باسورد عشوائي لمستخدم انضاف بدون ما يسجّل (ما أحد يعرفه)"""
+    return secrets.token_hex(8)
+
+
+# ---------- تنفّذ داخل processes الـ pool (لازم تكون على مستوى الموديول) ----------
+
+def _hash_task(password: str, method: str, deadline=None):
+    # انتظر في الطابور أكثر من اللازم؟ صاحب الطلب راح — ما نضيّع CPU عليه
+    if deadline is not None and time.time() > deadline:
+        return None
+    return generate_password_hash(password, method)
+
+
+def _verify_task(pwhash: str, password: str, deadline=None):
+    if deadline is not None and time.time() > deadline:
+        return None
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """
+    scrypt ياخذ CPU كامل لكل باسورد، فنشغّله في pool من الـ processes
+    بدل الـ thread اللي يخدم الطلب (و بدون ما يمسك الـ GIL عن باقي الـ threads).
+    workers = 0 يعني نحسب في نفس الـ thread.
+
+    طلبات الدخول/التسجيل محدودة (max_pending) ولها مهلة انتظار (queue_timeout)،
+    فوقت الزحمة نرفض بسرعة بدل ما يتكدّس الطابور.
+    """
+
+    def __init__(self, workers: int = 2, method: str = "scrypt", max_pending: int = 32,
+                 queue_timeout: float = 2.0):
+        self.workers = workers
+        self.method = method
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._prefix = None
+        self.pending = 0
+
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def init_app(self, app):
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.max_pending = app.config.get("PASSWORD_HASH_QUEUE_MAX", self.max_pending)
+        self.queue_timeout = app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", self.queue_timeout)
+        self._prefix = None
+        app.extensions["password_hasher"] = self
+
+    # ---------- Public ----------
+
+    def hash(self, password: str) -> str:
+        """hash للتسجيل/تغيير الباسورد. يرمي PasswordHasherBusy وقت الزحمة"""
+        pwhash = self._call(_hash_task, password, self.method)
+        self.hashed += 1
+        self._prefix = pwhash.split("$", 1)[0]
+        return pwhash
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """check_password_hash في الـ pool. يرمي PasswordHasherBusy وقت الزحمة"""
+        ok = self._call(_verify_task, pwhash, password)
+        self.verified += 1
+        return ok
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """الـ hash المخزّن بإعدادات قديمة (method/تكلفة) غير الحالية؟"""
+        if self._prefix is None:
+            # أول مرة في الـ process: نعرف شكل الإعدادات الحالية من hash فعلي
+            self.hash("")
+        return pwhash.split("$", 1)[0] != self._prefix
+
+    def rehash(self, password: str) -> str:
+        """hash جديد بالإعدادات الحالية بدل واحد قديم (بعد needs_rehash)"""
+        pwhash = self.hash(password)
+        self.rehashed += 1
+        return pwhash
+
+    def hash_many(self, passwords) -> list:
+        """hashes بنفس ترتيب passwords (للاستيراد — بدون حد الطابور)"""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        self.hashed += len(passwords)
+
+        if self.workers <= 0:
+            return [generate_password_hash(p, self.method) for p in passwords]
+
+        from concurrent.futures.process import BrokenProcessPool
+
+        # دفعات أكبر = رحلات أقل بين الـ processes، ونخلي كل worker ياخذ أكثر من دفعة
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        try:
+            return list(
+                self._ensure_started().map(
+                    _hash_task, passwords, repeat(self.method), chunksize=chunksize
+                )
+            )
+        except BrokenProcessPool:
+            # process مات (OOM مثلاً) — pool جديد للطلب الجاي، وهالمرة نحسب هنا
+            self._executor = None
+            return [generate_password_hash(p, self.method) for p in passwords]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "method": self.method,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "queue_timeout": self.queue_timeout,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
+
+    # ---------- Pool ----------
+
+    def _call(self, task, *args):
+        if self.workers <= 0:
+            return task(*args)
+
+        # multiprocessing ما ينحمّل إلا مع أول باسورد (مو وقت إقلاع كل worker)
+        from concurrent.futures.process import BrokenProcessPool
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+
+        try:
+            deadline = time.time() + self.queue_timeout
+            future = self._ensure_started().submit(task, *args, deadline)
+            # الـ worker نفسه يتخطى المهمة لو تعدّت الـ deadline، فالانتظار هنا محدود
+            result = future.result(timeout=self.queue_timeout + 30)
+        except BrokenProcessPool:
+            self._executor = None
+            result = task(*args)
+        except FutureTimeout:
+            future.cancel()
+            result = None
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+        if result is None:
+            self.expired += 1
+            raise PasswordHasherBusy()
+        return result
+
+    def _ensure_started(self):
+        # بعد fork (gunicorn --preload) الـ pool حق الأب ما ينفع في الـ worker
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
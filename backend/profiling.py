@@ -0,0 +1,319 @@
+# backend/profiling.py
+"""
+profiling لطلبات مختارة في الإنتاج (مطفي افتراضياً):
+- طلب فيه X-Profile-Token = PROFILER_TOKEN، أو نسبة عشوائية PROFILER_SAMPLE_RATE من الطلبات.
+- "sample" (الافتراضي): thread واحد ياخذ stack الطلب كل PROFILER_INTERVAL_MS —
+  الطلب نفسه ما يتبطأ تقريباً. الناتج collapsed stacks (flamegraph.pl / speedscope).
+  الـ thread يحتاج الـ GIL عشان ياخذ العيّنة، فالطلبات السريعة (أقل من ~20ms) عيّناتها قليلة.
+- "cprofile": كل استدعاء دالة ينحسب (أدق وأبطأ). الناتج .prof (pstats / snakeviz).
+
+الملفات في PROFILER_DIR/<endpoint>/، ونخلي آخر PROFILER_KEEP ملف لكل endpoint.
+`flask profile-report` يجمع الملفات (من كل الـ workers) ويطلع أكثر الدوال استهلاكاً.
+"""
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+
+HEADER = "X-Profile-Token"
+MODES = ("sample", "cprofile")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _short_path(filename: str) -> str:
+    """مسار قصير: نسبةً لـ backend أو لـ site-packages"""
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return filename
+
+
+def frame_name(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapsed_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def hot_functions(stacks: Counter, top: int = 20) -> dict:
+    """
+    من collapsed stacks: self (الدالة في رأس الـ stack) و total (في أي مكان فيه).
+    النسب من مجموع العيّنات.
+    """
+    own, total = Counter(), Counter()
+    samples = sum(stacks.values())
+    for stack, count in stacks.items():
+        names = stack.split(";")
+        own[names[-1]] += count
+        for name in set(names):
+            total[name] += count
+
+    def rows(counter):
+        return [
+            {"function": name, "samples": count, "percent": round(100 * count / samples, 1)}
+            for name, count in counter.most_common(top)
+        ]
+
+    return {"samples": samples, "self": rows(own), "total": rows(total)}
+
+
+def cprofile_functions(stats: "pstats.Stats", top: int = 20) -> dict:
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{name} ({_short_path(filename)}:{line})",
+                "calls": calls,
+                "self_ms": round(own * 1000, 3),
+                "total_ms": round(cumulative * 1000, 3),
+            }
+        )
+    return {
+        "self": sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top],
+        "total": sorted(rows, key=lambda r: r["total_ms"], reverse=True)[:top],
+    }
+
+
+def read_collapsed(path: str) -> Counter:
+    stacks = Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+
+class _Sampler:
+    """thread واحد للـ process: كل interval ياخذ stack الـ threads اللي نـ profile طلباتها"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.targets = {}  # thread id -> Counter
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # بعد fork الـ thread ما ينتقل للـ worker
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+        self._thread.start()
+
+    def start(self, thread_id: int) -> None:
+        with self._lock:
+            self._ensure_started()
+            self.targets[thread_id] = Counter()
+            self._active.set()
+
+    def stop(self, thread_id: int) -> Counter:
+        with self._lock:
+            stacks = self.targets.pop(thread_id, Counter())
+            if not self.targets:
+                self._active.clear()
+        return stacks
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self.targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        stacks[collapsed_stack(frame)] += 1
+            del frames
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.mode = "sample"
+        self.sample_rate = 0.0
+        self.token = ""
+        self.directory = None
+        self.keep = 50
+        self.sampler = _Sampler(0.005)
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self.profiled = Counter()  # endpoint -> عدد الطلبات
+        self.stacks = {}  # endpoint -> Counter (sample)
+        self.cprofile_stats = {}  # endpoint -> pstats.Stats (cprofile)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("PROFILER_ENABLED", False)
+        self.mode = app.config.get("PROFILER_MODE", self.mode)
+        if self.mode not in MODES:
+            raise ValueError(f"PROFILER_MODE must be one of {', '.join(MODES)}")
+        self.sample_rate = app.config.get("PROFILER_SAMPLE_RATE", self.sample_rate)
+        self.token = app.config.get("PROFILER_TOKEN") or ""
+        self.directory = app.config.get("PROFILER_DIR") or os.path.join(app.instance_path, "profiles")
+        self.keep = app.config.get("PROFILER_KEEP", self.keep)
+        self.sampler.interval = app.config.get("PROFILER_INTERVAL_MS", 5) / 1000
+        self.app = app
+        app.extensions["profiler"] = self
+
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    # ---------- Request hooks ----------
+
+    def _wanted(self) -> bool:
+        supplied = request.headers.get(HEADER)
+        if supplied and self.token and hmac.compare_digest(supplied.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _before_request(self):
+        if not self._wanted():
+            return
+        g.profile_started = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile  # بس لو الوضع cprofile (ما نحمّله مع كل worker)
+
+            g.profile = cProfile.Profile()
+            g.profile.enable()
+        else:
+            self.sampler.start(threading.get_ident())
+
+    def _finish(self):
+        """يوقف الـ profiler (مرة وحدة) ويرجع (stacks أو pstats.Stats)"""
+        started = g.pop("profile_started", None)
+        if started is None:
+            return None, None
+        elapsed = time.perf_counter() - started
+        if self.mode == "cprofile":
+            import pstats
+
+            profile = g.pop("profile")
+            profile.disable()
+            return pstats.Stats(profile), elapsed
+        return self.sampler.stop(threading.get_ident()), elapsed
+
+    def _after_request(self, response):
+        result, elapsed = self._finish()
+        if result is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        try:
+            name = self._save(endpoint, result, elapsed)
+        except OSError as e:
+            self.app.logger.warning("could not write profile for %s: %s", endpoint, e)
+            return response
+        response.headers["X-Profile-Id"] = name
+        return response
+
+    def _teardown_request(self, exc):
+        self._finish()  # الطلب طاح قبل after_request — بس نوقف الـ profiler
+
+    # ---------- Output ----------
+
+    def _save(self, endpoint: str, result, elapsed: float) -> str:
+        folder = os.path.join(self.directory, endpoint)
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        name = f"{stamp}-{os.getpid()}-{next(self._sequence)}-{int(elapsed * 1000)}ms"
+
+        with self._lock:
+            self.profiled[endpoint] += 1
+            if self.mode == "cprofile":
+                name += ".prof"
+                result.dump_stats(os.path.join(folder, name))
+                if endpoint in self.cprofile_stats:
+                    self.cprofile_stats[endpoint].add(result)
+                else:
+                    self.cprofile_stats[endpoint] = result
+            else:
+                name += ".collapsed"
+                with open(os.path.join(folder, name), "w") as f:
+                    for stack, count in result.items():
+                        f.write(f"{stack} {count}\n")
+                self.stacks.setdefault(endpoint, Counter()).update(result)
+
+        self._rotate(folder)
+        return f"{endpoint}/{name}"
+
+    def _rotate(self, folder: str) -> None:
+        files = sorted(
+            (entry for entry in os.scandir(folder) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in files[: max(len(files) - self.keep, 0)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # ---------- Reports ----------
+
+    def report(self, endpoint=None, top: int = 20) -> dict:
+        """أكثر الدوال استهلاكاً في الطلبات اللي انعمل لها profile في هذا الـ process"""
+        with self._lock:
+            endpoints = [endpoint] if endpoint else sorted(self.profiled)
+            result = {}
+            for name in endpoints:
+                if self.mode == "cprofile" and name in self.cprofile_stats:
+                    hot = cprofile_functions(self.cprofile_stats[name], top)
+                elif name in self.stacks:
+                    hot = hot_functions(self.stacks[name], top)
+                else:
+                    continue
+                result[name] = {"requests": self.profiled[name], **hot}
+        return result
+
+    def report_from_files(self, endpoint=None, top: int = 20) -> dict:
+        """نفس التقرير من الملفات في PROFILER_DIR (كل الـ workers)"""
+        result = {}
+        if not os.path.isdir(self.directory):
+            return result
+        for name in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, name)
+            if (endpoint and name != endpoint) or not os.path.isdir(folder):
+                continue
+            files = [os.path.join(folder, f) for f in os.listdir(folder)]
+            collapsed = [f for f in files if f.endswith(".collapsed")]
+            profiles = [f for f in files if f.endswith(".prof")]
+            if collapsed:
+                stacks = Counter()
+                for path in collapsed:
+                    stacks.update(read_collapsed(path))
+                result[name] = {"requests": len(collapsed), **hot_functions(stacks, top)}
+            elif profiles:
+                import pstats
+
+                stats = pstats.Stats(*profiles)
+                result[name] = {"requests": len(profiles), **cprofile_functions(stats, top)}
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "token_configured": bool(self.token),
+            "directory": self.directory,
+            "profiled": dict(self.profiled),
+        }
@@ -0,0 +1,75 @@
+# backend/pubsub.py
+import queue
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    """اشتراك واحد (stream واحد) في قروب معيّن"""
+
+    def __init__(self, group_id: int, queue_size: int):
+        self.group_id = group_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        # يصير True لو العميل تأخر وامتلأ الـ queue — الـ stream يقفل
+        # والعميل يرجع يتصل بـ Last-Event-ID ويكمّل من قاعدة البيانات
+        self.lagged = False
+
+    def get(self, timeout: float):
+        """يرجع الحدث التالي أو None لو خلص الوقت بدون أحداث"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MessageHub:
+    """
+    Publish/subscribe داخل نفس الـ process، مفهرس بـ group_id.
+    كل مشترك عنده queue محدود، وعدد الـ streams لكل worker محدود.
+    """
+
+    def __init__(self, queue_size: int = 100, max_streams: int = 50):
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._count = 0
+
+    def init_app(self, app):
+        self.queue_size = app.config.get("MESSAGE_STREAM_QUEUE_SIZE", self.queue_size)
+        self.max_streams = app.config.get("MESSAGE_STREAM_MAX", self.max_streams)
+        app.extensions["message_hub"] = self
+
+    def subscribe(self, group_id: int):
+        """يرجع Subscription أو None لو وصلنا الحد الأقصى للـ streams"""
+        with self._lock:
+            if self._count >= self.max_streams:
+                return None
+            sub = Subscription(group_id, self.queue_size)
+            self._subscribers[group_id].add(sub)
+            self._count += 1
+            return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.group_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[sub.group_id]
+
+    def publish(self, group_id: int, event) -> None:
+        """يوزّع الحدث على كل مشتركين القروب بدون ما يوقف الطلب"""
+        with self._lock:
+            subs = list(self._subscribers.get(group_id, ()))
+
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                sub.lagged = True
+
+    @property
+    def active_streams(self) -> int:
+        return self._count
@@ -0,0 +1,198 @@
+# backend/replicas.py
+"""
+توجيه القراءة لـ replica: طلبات GET/HEAD تقرأ من replica سليمة، وكل شيء ثاني
+(الكتابة، الـ flush، وأي طلب بعد ما المستخدم نفسه كتب خلال نافذة قصيرة) يروح للـ primary.
+
+Read-your-writes: كل كتابة ناجحة ترجع هيدر X-Last-Write (وقت الكتابة)، والعميل يرجّعه
+مع طلباته. طالما أقل من REPLICA_READ_YOUR_WRITES_SECONDS تنقرأ من الـ primary —
+يشتغل مهما كان الـ worker اللي يستقبل الطلب، بدون حالة مشتركة في السيرفر.
+كل طلب ياخذ replica وحدة (تنختار في before_request) عشان كويرياته تشوف نفس اللقطة.
+
+الـ replicas تنضاف كـ SQLALCHEMY_BINDS (replica0, replica1, ...) فـ Flask-SQLAlchemy
+ينشئ الـ engines بنفس إعداداته، ونفحص صحتها على فترات من داخل الطلبات (بدون thread).
+"""
+import itertools
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def is_read(clause) -> bool:
+    """SELECT (ORM/Core أو text) — غيره نعتبره كتابة"""
+    if clause is None:
+        return True
+    if getattr(clause, "is_select", False):
+        return True
+    sql = getattr(clause, "text", None)
+    if sql is not None:
+        return sql.lstrip().upper().startswith(("SELECT", "WITH"))
+    return not getattr(clause, "is_dml", False)
+
+
+class RoutingSession(Session):
+    """يختار engine لكل كويري: replica لو الطلب قراءة فقط، وإلا الـ primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("primary"):
+            if not is_read(clause):
+                # بعد أول كتابة، باقي الـ session على الـ primary (نشوف اللي كتبناه)
+                self.info["primary"] = True
+            elif has_request_context() and g.get("db_replica_engine") is not None:
+                return g.db_replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+    def __init__(self, key: str):
+        self.key = key
+        self.healthy = True
+        self.checked_at = 0.0
+        self.error = None
+        self.lag_seconds = None
+        self.reads = 0
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.app = None
+        self.replicas = []
+        self.ryw_seconds = 5.0
+        self.health_interval = 10.0
+        self.max_lag = 30.0
+        self._cycle = None
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.read_your_writes = 0
+
+    def init_app(self, app):
+        """لازم قبل db.init_app — نضيف الـ replicas كـ binds"""
+        urls = [u.strip() for u in app.config.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+        self.ryw_seconds = app.config.get("REPLICA_READ_YOUR_WRITES_SECONDS", self.ryw_seconds)
+        self.health_interval = app.config.get("REPLICA_HEALTH_INTERVAL", self.health_interval)
+        self.max_lag = app.config.get("REPLICA_MAX_LAG_SECONDS", self.max_lag)
+
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        self.replicas = []
+        for i, url in enumerate(urls):
+            key = f"replica{i}"
+            binds[key] = url
+            self.replicas.append(Replica(key))
+        app.config["SQLALCHEMY_BINDS"] = binds
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+
+        self.app = app
+        app.extensions["replica_router"] = self
+
+        if self.replicas:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    # ---------- Request hooks ----------
+
+    def _recent_write(self) -> bool:
+        """العميل كتب قبل أقل من ryw_seconds؟ (حسب X-Last-Write اللي رجّعناه له)"""
+        try:
+            written_at = float(request.headers.get(LAST_WRITE_HEADER, ""))
+        except ValueError:
+            return False
+        return time.time() - written_at < self.ryw_seconds
+
+    def _before_request(self):
+        if request.method not in SAFE_METHODS:
+            return
+        if self._recent_write():
+            # يقرأ من الـ primary لين تلحق الـ replica
+            self.read_your_writes += 1
+            return
+        g.db_replica_engine = self.pick()
+
+    def _after_request(self, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+        return response
+
+    # ---------- Routing ----------
+
+    def pick(self):
+        """replica سليمة بالدور (round-robin) للطلب كامل، أو None = الـ primary"""
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if time.monotonic() - replica.checked_at > self.health_interval:
+                self._check(replica)
+            if replica.healthy:
+                replica.reads += 1
+                return self._engine(replica)
+        self.primary_reads += 1
+        return None
+
+    def _engine(self, replica):
+        return self.app.extensions["sqlalchemy"].engines[replica.key]
+
+    def _check(self, replica):
+        # thread واحد يفحص، والباقي يكمل على آخر حالة معروفة
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            from migrations import LATEST_VERSION
+
+            engine = self._engine(replica)
+            self._watch_disconnects(replica, engine)
+            with engine.connect().execution_options(sql_stats=False) as conn:
+                version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+                lag = None
+                if conn.dialect.name == "postgresql":
+                    lag = conn.execute(
+                        text(
+                            "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                        )
+                    ).scalar()
+            replica.lag_seconds = float(lag) if lag is not None else None
+
+            if (version or 0) < LATEST_VERSION:
+                raise RuntimeError(f"schema version {version}, expected {LATEST_VERSION}")
+            if lag is not None and lag > self.max_lag:
+                raise RuntimeError(f"replication lag {lag:.1f}s")
+            replica.healthy, replica.error = True, None
+        except Exception as e:
+            replica.healthy, replica.error = False, f"{type(e).__name__}: {str(e).splitlines()[0]}"
+        finally:
+            replica.checked_at = time.monotonic()
+            self._lock.release()
+
+    def _watch_disconnects(self, replica, engine):
+        # انقطع الاتصال وسط طلب؟ الطلبات الجاية تروح للـ primary لين الفحص الجاي
+        if event.contains(engine, "handle_error", self._on_error):
+            return
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if not context.is_disconnect:
+            return
+        for replica in self.replicas:
+            if self._engine(replica) is context.engine:
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+                replica.error = "disconnected"
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {
+                    "key": r.key,
+                    "healthy": r.healthy,
+                    "error": r.error,
+                    "lag_seconds": r.lag_seconds,
+                    "reads": r.reads,
+                }
+                for r in self.replicas
+            ],
+            "primary_fallback_reads": self.primary_reads,
+            "read_your_writes_seconds": self.ryw_seconds,
+            "read_your_writes_requests": self.read_your_writes,
+        }
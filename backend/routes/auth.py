@@ -1,14 +1,19 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
     create_access_token,
     jwt_required,
     get_jwt_identity,
 )
 from functools import wraps
+from sqlalchemy import and_
 
+from admission import admission_class, rate_limit
 from app import db
+from extensions import password_hasher
+from models.group import Group
+from models.group_member import GroupMember
 from models.user import User
+from passwords import PasswordHasherBusy
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -23,7 +28,74 @@ def login_required(fn):
     return wrapper
 
 
+def hasher_busy():
+    """الـ pool حق الباسوردات مزحوم — نرفض بسرعة والعميل يعيد بعد شوي"""
+    response = jsonify({"msg": "Server is busy, please retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+# ترتيب الصلاحيات: owner > admin > member
+ROLE_LEVELS = {"member": 0, "admin": 1, "owner": 2}
+
+
+def group_access(role=None):
+    """
+    ديكور للـ endpoints اللي تحت /groups/<group_id>:
+    يجيب المستخدم + القروب + العضوية بكويري واحد (JOIN)، ويمررهم للـ view
+    كـ user و group و membership. نفس ردود 404/403 القديمة.
+    role اختياري: "admin" أو "owner" لو الـ endpoint يحتاج صلاحية أعلى.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            group_id = kwargs.get("group_id")
+
+            row = (
+                db.session.query(User, Group, GroupMember)
+                .select_from(User)
+                .outerjoin(Group, Group.id == group_id)
+                .outerjoin(
+                    GroupMember,
+                    and_(
+                        GroupMember.group_id == Group.id,
+                        GroupMember.user_id == User.id,
+                    ),
+                )
+                .filter(User.id == get_jwt_identity())
+                .first()
+            )
+
+            if not row:
+                return jsonify({"msg": "User not found"}), 404
+
+            user, group, membership = row
+            if not group:
+                return jsonify({"msg": "Group not found"}), 404
+
+            if not membership:
+                return jsonify({"msg": "You are not a member of this group"}), 403
+
+            if role:
+                current_role = membership.role or "member"
+                if group.owner_id == user.id:
+                    current_role = "owner"
+                if ROLE_LEVELS.get(current_role, 0) < ROLE_LEVELS[role]:
+                    return jsonify({"msg": "You do not have permission to do this"}), 403
+
+            kwargs.update(user=user, group=group, membership=membership)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 @auth_bp.post("/register")
+@admission_class("auth")
 def register():
     """إنشاء حساب جديد"""
     data = request.get_json() or {}
@@ -38,10 +110,15 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"msg": "Email already registered"}), 400
 
+    try:
+        pw_hash = password_hasher.hash(password)
+    except PasswordHasherBusy:
+        return hasher_busy()
+
     user = User(
         name=name,
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=pw_hash,
     )
 
     db.session.add(user)
@@ -49,7 +126,21 @@ def register():
 
     return jsonify({"msg": "Account created"}), 201
 
+
+def login_rate_key():
+    """
+    محاولات الدخول تنعد لكل (IP، إيميل): لو بس إيميل، أي أحد يقدر يقفل حساب
+    غيره بمحاولات غلط. الـ IP اللي يجرّب إيميلات كثيرة يوقفه login_ip
+    """
+    data = request.get_json(silent=True) or {}
+    email = str(data.get("email") or "").strip().lower()
+    return f"{request.remote_addr}|{email}"
+
+
 @auth_bp.post("/login")
+@admission_class("auth")
+@rate_limit("login_ip", key=lambda: request.remote_addr)
+@rate_limit("login", key=login_rate_key)
 def login():
     """تسجيل دخول وإرجاع JWT"""
     data = request.get_json() or {}
@@ -61,9 +152,24 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user:
         return jsonify({"msg": "Invalid email or password"}), 401
 
+    try:
+        valid = password_hasher.verify(user.password_hash, password)
+    except PasswordHasherBusy:
+        return hasher_busy()
+    if not valid:
+        return jsonify({"msg": "Invalid email or password"}), 401
+
+    # الـ hash بإعدادات قديمة (PASSWORD_HASH_METHOD تغيّر)؟ نحدّثه الحين وعندنا الباسورد
+    try:
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.rehash(password)
+            db.session.commit()
+    except PasswordHasherBusy:
+        pass  # نحدّثه في دخول جاي
+
     # مهم: الـ identity لازم يكون string
     access_token = create_access_token(identity=str(user.id))
 
@@ -0,0 +1,29 @@
+# backend/routes/etags.py
+import hashlib
+
+from flask import make_response, request
+
+
+def collection_etag(group, collection: str) -> str:
+    """ETag ضعيف من نسخة القائمة (+ الـ query string لو فيه pagination مثلاً)"""
+    tag = f"g{group.id}-{collection}-v{group.version_of(collection)}"
+    if request.query_string:
+        tag += "-" + hashlib.md5(request.query_string).hexdigest()[:8]
+    return tag
+
+
+def versioned_response(group, collection: str, build):
+    """
+    يرجّع 304 لو If-None-Match يطابق النسخة الحالية بدون ما نحمّل الصفوف،
+    وإلا يستدعي build() (اللي يرجّع Response) ويحط عليه الـ ETag.
+    """
+    etag = collection_etag(group, collection)
+
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,45 +1,197 @@
 # backend/routes/files.py
+import mimetypes
 import os
-from flask import Blueprint, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import secrets
+from datetime import datetime, timezone
 
-from models.group import Group
+from flask import Blueprint, Response, current_app, jsonify, request, send_file
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import and_
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+from werkzeug.security import safe_join
+
+from extensions import db
+from models.file import GroupFile
 from models.group_member import GroupMember
-from models.user import User
+from storage import COPY_BUFFER_SIZE
 
 files_bp = Blueprint("files", __name__)
 
 
-def get_current_user():
-    uid = get_jwt_identity()
-    if not uid:
+# ------------ Helpers ------------
+
+def load_member_file(file_id: int):
+    """الملف + عضوية المستخدم في قروبه بكويري واحد. يرجّع (gf, None) أو (None, response)"""
+    row = (
+        db.session.query(GroupFile, GroupMember.id)
+        .outerjoin(
+            GroupMember,
+            and_(
+                GroupMember.group_id == GroupFile.group_id,
+                GroupMember.user_id == get_jwt_identity(),
+            ),
+        )
+        .filter(GroupFile.id == file_id)
+        .first()
+    )
+    if not row:
+        return None, (jsonify({"msg": "File not found"}), 404)
+
+    gf, membership_id = row
+    if not membership_id:
+        return None, (jsonify({"msg": "You are not a member of this group"}), 403)
+
+    return gf, None
+
+
+def byte_ranges(length: int):
+    """
+    يرجّع قائمة (start, stop) لو الطلب فيه أكثر من range صالح،
+    [] لو ولا واحد صالح (416)، و None لو الطلب عادي/range واحد.
+    """
+    rng = request.range
+    if rng is None or rng.units != "bytes" or len(rng.ranges) < 2:
         return None
-    return User.query.get(uid)
 
+    result = []
+    for start, stop in rng.ranges:
+        if start < 0:  # suffix range: -500 = آخر 500 بايت
+            start, stop = max(length + start, 0), length
+        stop = length if stop is None else min(stop, length)
+        if start < stop:
+            result.append((start, stop))
+    return result
+
+
+def range_is_stale(etag: str, last_modified: datetime) -> bool:
+    """True لو If-Range موجود وما يطابق النسخة الحالية"""
+    if_range = request.if_range
+    if if_range.etag:
+        return if_range.etag != etag
+    if if_range.date:
+        return if_range.date < last_modified.replace(microsecond=0)
+    return False
+
+
+def multipart_ranges(path: str, ranges, length: int, mimetype: str) -> Response:
+    """multipart/byteranges مع قراءة على دفعات (الذاكرة محدودة)"""
+    boundary = secrets.token_hex(12)
+
+    def generate():
+        with open(path, "rb") as f:
+            for start, stop in ranges:
+                yield (
+                    f"\r\n--{boundary}\r\n"
+                    f"Content-Type: {mimetype}\r\n"
+                    f"Content-Range: bytes {start}-{stop - 1}/{length}\r\n\r\n"
+                ).encode()
+                f.seek(start)
+                remaining = stop - start
+                while remaining > 0:
+                    chunk = f.read(min(COPY_BUFFER_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            yield f"\r\n--{boundary}--\r\n".encode()
 
-def user_in_group(user_id, group_id):
-    """يتأكد إن المستخدم عضو في القروب"""
-    return GroupMember.query.filter_by(
-        user_id=user_id, group_id=group_id
-    ).first()
+    return Response(
+        generate(),
+        status=206,
+        mimetype=f"multipart/byteranges; boundary={boundary}",
+        direct_passthrough=True,
+    )
 
 
-# ---------- جلب ملفات القروب ----------
-# مبدئياً نرجّع قائمة فاضية بس عشان ما يطيّح الصفحة
-@files_bp.route("/<int:group_id>/files", methods=["GET"])
+# ------------ Download ------------
+
+@files_bp.route("/files/<int:file_id>/download", methods=["GET", "HEAD"])
 @jwt_required()
-def list_files(group_id):
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
+def download_file(file_id):
+    """
+    تحميل ملف للأعضاء فقط. يدعم Range (واحد أو أكثر) و ETag/Last-Modified،
+    و X-Accel-Redirect / X-Sendfile لو السيرفر ورا reverse proxy.
+    """
+    gf, error = load_member_file(file_id)
+    if error:
+        return error
+
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    path = safe_join(upload_folder, gf.filename)
+    if not path or not os.path.isfile(path):
+        return jsonify({"msg": "File not found"}), 404
+
+    download_name = gf.original_name or os.path.basename(gf.filename)
+    mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    as_attachment = request.args.get("inline") != "1"
+
+    # nginx يخدم الملف بنفسه (Range و sendfile عنده)
+    if current_app.config["FILE_OFFLOAD"] == "x-accel":
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = (
+            current_app.config["FILE_ACCEL_PREFIX"].rstrip("/") + "/" + gf.filename
+        )
+        response.headers.set(
+            "Content-Disposition",
+            "attachment" if as_attachment else "inline",
+            filename=download_name,
+        )
+        return response
+
+    stat = os.stat(path)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    # المحتوى ثابت لنفس الـ sha256، فنستخدمه كـ ETag قوي (الملفات القديمة: mtime + size)
+    etag = gf.sha256 or f"{stat.st_mtime}-{stat.st_size}"
+
+    ranges = byte_ranges(stat.st_size)
+    if ranges is not None and current_app.config["FILE_OFFLOAD"] != "x-sendfile":
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = Response(status=304)
+        elif not ranges:
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{stat.st_size}"
+        elif range_is_stale(etag, last_modified):
+            # If-Range ما تطابق — نرجع الملف كامل
+            response = None
+        else:
+            response = multipart_ranges(path, ranges, stat.st_size, mimetype)
 
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
+        if response is not None:
+            response.headers["ETag"] = quote_etag(etag)
+            response.headers["Last-Modified"] = http_date(last_modified)
+            response.headers["Accept-Ranges"] = "bytes"
+            return response
+
+    # send_file: Range واحد + الشروط + wsgi.file_wrapper (sendfile بدون نسخ)
+    # ومع USE_X_SENDFILE يرجّع هيدر X-Sendfile بدل المحتوى
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=etag,
+        last_modified=last_modified,
+    )
+    response.headers["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
+
+
+# ------------ Thumbnail ------------
+
+@files_bp.route("/files/<int:file_id>/thumbnail", methods=["GET"])
+@jwt_required()
+def file_thumbnail(file_id):
+    """الصورة المصغّرة اللي جهّزها الـ worker (للصور فقط)"""
+    gf, error = load_member_file(file_id)
+    if error:
+        return error
 
-    if not user_in_group(user.id, group.id):
-        return jsonify({"msg": "You are not a member of this group"}), 403
+    path = safe_join(current_app.config["UPLOAD_FOLDER"], gf.thumbnail) if gf.thumbnail else None
+    if not path or not os.path.isfile(path):
+        return jsonify({"msg": "Thumbnail not available"}), 404
 
-    # مستقبلاً تقدري تربطي هنا مع جدول GroupFile
-    # حالياً نرجّع قائمة فاضية عشان كل شيء يشتغل بدون أخطاء
-    return jsonify([]), 200
+    # الصورة المصغّرة مربوطة بالمحتوى (sha256) فما تتغير
+    response = send_file(path, mimetype="image/jpeg", conditional=True, etag=gf.sha256 or True)
+    response.headers["Cache-Control"] = "private, max-age=86400"
+    return response
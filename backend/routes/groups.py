@@ -3,14 +3,29 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from extensions import db
+from extensions import db, file_processor, identity_cache, password_hasher
+from routes.auth import group_access
+from routes.etags import versioned_response
+from routes.messages import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, fetch_messages_page
+from routes.tasks import list_group_tasks
+from routes.uploads import add_group_file, file_response
+from passwords import placeholder_password
+from serializers import RowSerializer
+from admission import admission_class
+from sqlstats import query_budget
+from streaming import json_stream, stream_rows
+from storage import copy_stream, partial_path, store_object
 from models.user import User
 from models.group import Group
 from models.group_member import GroupMember
 from models.file import GroupFile
 
+from sqlalchemy import bindparam, case, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash
+import csv
+import hashlib
+import io
 import os
 import secrets
 import string
@@ -18,6 +33,50 @@ import string
 groups_bp = Blueprint("groups", __name__)
 
 
+# ------------ Row serializers (قوائم بدون كائنات ORM) ------------
+
+MEMBER_ROW = RowSerializer(
+    "member",
+    ("id", GroupMember.id),
+    ("name", User.name),
+    ("email", User.email),
+    ("role", GroupMember.role, lambda role: role or "member"),
+)
+
+FILE_ROW = RowSerializer(
+    "file",
+    ("id", GroupFile.id),
+    ("group_id", GroupFile.group_id),
+    ("name", func.coalesce(GroupFile.original_name, GroupFile.filename)),
+    ("filename", GroupFile.filename),
+    # البيانات محسوبة مسبقاً من الـ worker — ما نلمس الديسك هنا
+    ("size", GroupFile.size),
+    ("mime_type", GroupFile.mime_type),
+    ("page_count", GroupFile.page_count),
+    ("image_width", GroupFile.image_width),
+    ("image_height", GroupFile.image_height),
+    (
+        "thumbnail_url",
+        case((GroupFile.thumbnail.is_not(None), GroupFile.id)),
+        lambda file_id: f"/groups/files/{file_id}/thumbnail" if file_id is not None else None,
+    ),
+    ("uploaded_at", GroupFile.uploaded_at),
+    ("meta_status", GroupFile.meta_status),
+)
+
+
+# is_owner يعتمد على المستخدم، فنحسبه في SQL (:user_id وقت التنفيذ)
+GROUP_ROW = RowSerializer(
+    "group",
+    ("id", Group.id),
+    ("name", Group.name),
+    ("invite_code", Group.invite_code),
+    ("members_count", Group.members_count, lambda n: n or 0),
+    ("role", GroupMember.role, lambda role: role or "member"),
+    ("is_owner", or_(GroupMember.role == "admin", Group.owner_id == bindparam("user_id")), bool),
+)
+
+
 # ------------ Helpers ------------
 
 def generate_invite_code(length: int = 8) -> str:
@@ -30,7 +89,7 @@ def get_current_user():
     uid = get_jwt_identity()
     if not uid:
         return None
-    return User.query.get(uid)
+    return identity_cache.get_user(uid)
 
 
 def get_membership(user_id: int, group_id: int):
@@ -38,9 +97,116 @@ def get_membership(user_id: int, group_id: int):
     return GroupMember.query.filter_by(user_id=user_id, group_id=group_id).first()
 
 
+def bump_members_count(group_id: int, delta: int) -> None:
+    """يحدّث عدّاد الأعضاء (ونسخة قائمة الأعضاء) داخل نفس الـ transaction (الزيادة تصير في SQL عشان ما نفقد تحديثات متزامنة)"""
+    Group.query.filter_by(id=group_id).update(
+        {
+            Group.members_count: Group.members_count + delta,
+            Group.members_version: Group.members_version + 1,
+        },
+        synchronize_session=False,
+    )
+
+
+def recount_members() -> int:
+    """يعيد حساب members_count لكل القروبات من جدول group_member بكويري تجميعي واحد"""
+    counts = dict(
+        db.session.query(GroupMember.group_id, func.count(GroupMember.id))
+        .group_by(GroupMember.group_id)
+        .all()
+    )
+
+    fixed = 0
+    for group_id, current in db.session.query(Group.id, Group.members_count).all():
+        actual = counts.get(group_id, 0)
+        if current != actual:
+            Group.query.filter_by(id=group_id).update(
+                {Group.members_count: actual}, synchronize_session=False
+            )
+            fixed += 1
+
+    db.session.commit()
+    return fixed
+
+
+def group_details(group, user, membership) -> dict:
+    return {
+        "id": group.id,
+        "name": group.name,
+        "invite_code": group.invite_code,
+        "members_count": group.members_count or 0,
+        "is_owner": bool(
+            (membership.role == "admin")
+            or (getattr(group, "owner_id", None) == user.id)
+        ),
+    }
+
+
+def group_members_query(group_id: int):
+    """أعضاء القروب مع بيانات المستخدم بكويري واحد"""
+    return (
+        select(*MEMBER_ROW.columns)
+        .join(User, GroupMember.user_id == User.id)
+        .where(GroupMember.group_id == group_id)
+    )
+
+
+def list_group_members(group_id: int):
+    return MEMBER_ROW.all(db.session.execute(group_members_query(group_id)))
+
+
+def parse_member_rows():
+    """
+    صفوف الاستيراد من JSON ({"members": [...]} أو قائمة) أو CSV (body أو ملف "file")
+    فيه عمودين name,email. يرجع (rows, None) أو (None, response)
+    """
+    upload = request.files.get("file")
+    if upload is not None or request.mimetype in ("text/csv", "text/plain"):
+        raw = upload.read() if upload is not None else request.get_data()
+        try:
+            text = raw.decode("utf-8-sig")  # Excel يحط BOM
+        except UnicodeDecodeError:
+            return None, (jsonify({"msg": "CSV must be UTF-8"}), 400)
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or "email" not in [f.strip().lower() for f in reader.fieldnames]:
+            return None, (jsonify({"msg": "CSV header must include name,email"}), 400)
+        rows = [
+            {(k or "").strip().lower(): (v or "") for k, v in record.items()}
+            for record in reader
+        ]
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get("members") if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            return None, (jsonify({"msg": "Expected a list of members"}), 400)
+
+    if not rows:
+        return None, (jsonify({"msg": "No members to import"}), 400)
+    if len(rows) > current_app.config["MEMBER_IMPORT_MAX"]:
+        return None, (
+            jsonify({"msg": f"At most {current_app.config['MEMBER_IMPORT_MAX']} members per import"}),
+            413,
+        )
+
+    return [
+        {
+            "name": str(r.get("name") or "").strip(),
+            "email": str(r.get("email") or "").strip().lower(),
+        }
+        for r in rows
+    ], None
+
+
+def list_group_files(group_id: int):
+    rows = db.session.execute(select(*FILE_ROW.columns).where(GroupFile.group_id == group_id))
+    return FILE_ROW.all(rows)
+
+
 # ------------ Groups list & create ------------
 
 @groups_bp.route("", methods=["GET"])
+@admission_class("list")
+@query_budget(2)
 @jwt_required()
 def list_groups():
     """يعرض كل القروبات اللي المستخدم عضو فيها"""
@@ -48,34 +214,14 @@ def list_groups():
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
-    rows = (
-        db.session.query(GroupMember, Group)
+    rows = db.session.execute(
+        select(*GROUP_ROW.columns)
+        .select_from(GroupMember)
         .join(Group, GroupMember.group_id == Group.id)
-        .filter(GroupMember.user_id == user.id)
-        .all()
+        .where(GroupMember.user_id == user.id),
+        {"user_id": user.id},
     )
-
-    results = []
-    for gm, g in rows:
-        members_count = (
-            db.session.query(GroupMember)
-            .filter_by(group_id=g.id)
-            .count()
-        )
-        results.append(
-            {
-                "id": g.id,
-                "name": g.name,
-                "invite_code": g.invite_code,
-                "members_count": members_count,
-                "role": gm.role or "member",
-                "is_owner": bool(
-                    (gm.role == "admin") or (getattr(g, "owner_id", None) == user.id)
-                ),
-            }
-        )
-
-    return jsonify(results), 200
+    return jsonify(GROUP_ROW.all(rows)), 200
 
 
 @groups_bp.route("", methods=["POST"])
@@ -97,6 +243,7 @@ def create_group():
         name=name,
         invite_code=invite_code,
         owner_id=getattr(user, "id", None),
+        members_count=1,
     )
     db.session.add(group)
     db.session.flush()  # عشان group.id
@@ -127,38 +274,60 @@ def create_group():
 # ------------ Group details ------------
 
 @groups_bp.route("/<int:group_id>", methods=["GET"])
-@jwt_required()
-def get_group(group_id):
+@query_budget(2)
+@group_access()
+def get_group(group_id, user, group, membership):
     """تفاصيل قروب واحد"""
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
+    return jsonify(group_details(group, user, membership)), 200
+
+
+# ------------ Dashboard (كل شيء بطلب واحد) ------------
+
+DASHBOARD_SECTIONS = ("group", "members", "tasks", "files", "messages")
+
+
+@groups_bp.route("/<int:group_id>/dashboard", methods=["GET"])
+@admission_class("list")
+@query_budget(6)
+@group_access()
+def get_dashboard(group_id, user, group, membership):
+    """
+    تفاصيل القروب + الأعضاء + المهام + الملفات + آخر الرسائل بطلب واحد.
+    ?include=members,tasks يحدد الأقسام، و ?messages_limit=N عدد الرسائل.
+    """
+    include = request.args.get("include")
+    if include:
+        sections = {s.strip() for s in include.split(",") if s.strip()}
+        unknown = sections - set(DASHBOARD_SECTIONS)
+        if unknown:
+            return jsonify({"msg": f"Unknown sections: {', '.join(sorted(unknown))}"}), 400
+    else:
+        sections = set(DASHBOARD_SECTIONS)
+
+    try:
+        messages_limit = int(request.args.get("messages_limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"msg": "Invalid messages_limit"}), 400
+    messages_limit = max(1, min(messages_limit, MAX_PAGE_SIZE))
+
+    result = {}
+    if "group" in sections:
+        result["group"] = group_details(group, user, membership)
+    if "members" in sections:
+        result["members"] = list_group_members(group.id)
+    if "tasks" in sections:
+        result["tasks"] = list_group_tasks(group.id)
+    if "files" in sections:
+        result["files"] = list_group_files(group.id)
+    if "messages" in sections:
+        messages, has_more = fetch_messages_page(group.id, messages_limit)
+        result["messages"] = messages
+        # نفس cursor هيدر X-Prev-Cursor عشان العميل يكمّل للأقدم من /messages
+        result["messages_prev_cursor"] = (
+            encode_cursor(messages[0]) if messages and has_more else None
+        )
 
-    membership = get_membership(user.id, group.id)
-    if not membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    members_count = GroupMember.query.filter_by(group_id=group.id).count()
-
-    return (
-        jsonify(
-            {
-                "id": group.id,
-                "name": group.name,
-                "invite_code": group.invite_code,
-                "members_count": members_count,
-                "is_owner": bool(
-                    (membership.role == "admin")
-                    or (getattr(group, "owner_id", None) == user.id)
-                ),
-            }
-        ),
-        200,
-    )
+    return jsonify(result), 200
 
 
 # ------------ Join by invite code ------------
@@ -186,17 +355,16 @@ def join_group():
 
     gm = GroupMember(group_id=group.id, user_id=user.id, role="member")
     db.session.add(gm)
+    bump_members_count(group.id, 1)
     db.session.commit()
 
-    members_count = GroupMember.query.filter_by(group_id=group.id).count()
-
     return (
         jsonify(
             {
                 "id": group.id,
                 "name": group.name,
                 "invite_code": group.invite_code,
-                "members_count": members_count,
+                "members_count": group.members_count or 0,
                 "role": gm.role,
                 "is_owner": False,
             }
@@ -208,58 +376,20 @@ def join_group():
 # ------------ Members ------------
 
 @groups_bp.route("/<int:group_id>/members", methods=["GET"])
-@jwt_required()
-def list_members(group_id):
+@admission_class("list")
+@query_budget(3)
+@group_access()
+def list_members(group_id, user, group, membership):
     """عرض أعضاء القروب"""
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    membership = get_membership(user.id, group.id)
-    if not membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    rows = (
-        db.session.query(GroupMember, User)
-        .join(User, GroupMember.user_id == User.id)
-        .filter(GroupMember.group_id == group.id)
-        .all()
+    return versioned_response(
+        group, "members", lambda: json_stream(stream_rows(group_members_query(group.id), MEMBER_ROW))
     )
 
-    results = []
-    for gm, u in rows:
-        results.append(
-            {
-                "id": gm.id,
-                "name": u.name,
-                "email": u.email,
-                "role": gm.role or "member",
-            }
-        )
-
-    return jsonify(results), 200
-
 
 @groups_bp.route("/<int:group_id>/members", methods=["POST"])
-@jwt_required()
-def add_member(group_id):
+@group_access()
+def add_member(group_id, user, group, membership):
     """إضافة عضو جديد للقروب مع إنشاء User بباسورد عشوائي مشفّر لو احتجنا"""
-    current_user = get_current_user()
-    if not current_user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    current_membership = get_membership(current_user.id, group.id)
-    if not current_membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
     data = request.get_json() or {}
     name = (data.get("name") or "").strip()
     email = (data.get("email") or "").strip().lower()
@@ -267,36 +397,34 @@ def add_member(group_id):
     if not name:
         return jsonify({"msg": "Name is required"}), 400
 
-    user = None
+    member_user = None
     if email:
-        user = User.query.filter_by(email=email).first()
+        member_user = User.query.filter_by(email=email).first()
 
-    if not user:
-        random_password = secrets.token_hex(8)
-        pw_hash = generate_password_hash(random_password)
-
-        user = User(
+    if not member_user:
+        member_user = User(
             name=name,
             email=email or None,
-            password_hash=pw_hash,
+            password_hash=password_hasher.hash(placeholder_password()),
         )
-        db.session.add(user)
-        db.session.flush()  # عشان user.id
+        db.session.add(member_user)
+        db.session.flush()  # عشان member_user.id
 
-    already = GroupMember.query.filter_by(group_id=group.id, user_id=user.id).first()
+    already = GroupMember.query.filter_by(group_id=group.id, user_id=member_user.id).first()
     if already:
         return jsonify({"msg": "Member already in this group"}), 400
 
-    gm = GroupMember(group_id=group.id, user_id=user.id, role="member")
+    gm = GroupMember(group_id=group.id, user_id=member_user.id, role="member")
     db.session.add(gm)
+    bump_members_count(group.id, 1)
     db.session.commit()
 
     return (
         jsonify(
             {
                 "id": gm.id,
-                "name": user.name,
-                "email": user.email,
+                "name": member_user.name,
+                "email": member_user.email,
                 "role": gm.role or "member",
             }
         ),
@@ -304,27 +432,109 @@ def add_member(group_id):
     )
 
 
-@groups_bp.route("/<int:group_id>/members/<int:member_id>", methods=["DELETE"])
-@jwt_required()
-def remove_member(group_id, member_id):
-    """حذف عضوية من القروب"""
-    current_user = get_current_user()
-    if not current_user:
-        return jsonify({"msg": "User not found"}), 404
+@groups_bp.route("/<int:group_id>/members/bulk", methods=["POST"])
+@admission_class("bulk")
+@group_access(role="admin")
+def bulk_add_members(group_id, user, group, membership):
+    """
+    استيراد أعضاء كثير مرة وحدة (JSON أو CSV). المستخدمين الموجودين بكويري IN واحد،
+    باسوردات الجداد تنحسب في pool الـ processes، والإضافة كلها في transaction وحدة.
+    يرجع نتيجة لكل صف: added / already_member / duplicate / invalid
+    """
+    rows, error = parse_member_rows()
+    if error:
+        return error
+
+    results = [{"row": i, "name": r["name"], "email": r["email"]} for i, r in enumerate(rows, 1)]
+
+    # التحقق + التكرار داخل نفس الملف
+    pending = {}  # email -> index أول صف
+    for result in results:
+        if not result["email"] or "@" not in result["email"]:
+            result.update(status="invalid", msg="A valid email is required")
+        elif result["email"] in pending:
+            result.update(status="duplicate", msg=f"Same email as row {pending[result['email']] + 1}")
+        else:
+            pending[result["email"]] = result["row"] - 1
+
+    existing = {
+        u.email: u
+        for u in db.session.query(User.id, User.name, User.email).filter(
+            User.email.in_(list(pending))
+        )
+    } if pending else {}
 
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
+    members = {
+        user_id
+        for (user_id,) in db.session.query(GroupMember.user_id).filter(
+            GroupMember.group_id == group.id,
+            GroupMember.user_id.in_([u.id for u in existing.values()]),
+        )
+    } if existing else set()
+
+    # المستخدمين الجداد: لازم اسم، والباسورد عشوائي (يقدر يغيّره بعدين)
+    new_rows = []
+    for email, index in pending.items():
+        result = results[index]
+        if email in existing:
+            result["user_id"] = existing[email].id
+            result["name"] = existing[email].name
+            if existing[email].id in members:
+                result.update(status="already_member", msg="Member already in this group")
+        elif not result["name"]:
+            result.update(status="invalid", msg="Name is required for new users")
+        else:
+            new_rows.append(result)
+
+    try:
+        if new_rows:
+            hashes = password_hasher.hash_many(placeholder_password() for _ in new_rows)
+            created = db.session.execute(
+                insert(User).returning(User.id, User.email),
+                [
+                    {"name": r["name"], "email": r["email"], "password_hash": pw_hash}
+                    for r, pw_hash in zip(new_rows, hashes)
+                ],
+            ).all()
+            ids = {email: user_id for user_id, email in created}
+            for r in new_rows:
+                r.update(user_id=ids[r["email"]], created_user=True)
+
+        to_add = [r for r in results if "user_id" in r and "status" not in r]
+        if to_add:
+            added = db.session.execute(
+                insert(GroupMember).returning(GroupMember.id, GroupMember.user_id),
+                [{"group_id": group.id, "user_id": r["user_id"], "role": "member"} for r in to_add],
+            ).all()
+            member_ids = {user_id: gm_id for gm_id, user_id in added}
+            for r in to_add:
+                r.update(status="added", member_id=member_ids[r["user_id"]])
+            bump_members_count(group.id, len(to_add))
+
+        db.session.commit()
+    except IntegrityError:
+        # طلب ثاني أضاف نفس الإيميل/العضوية بنفس اللحظة
+        db.session.rollback()
+        return jsonify({"msg": "Members changed during import, please retry"}), 409
+
+    summary = {"added": 0, "already_member": 0, "duplicate": 0, "invalid": 0}
+    for r in results:
+        summary[r["status"]] += 1
+    summary["created_users"] = len(new_rows)
+
+    return jsonify({"summary": summary, "results": results}), 201 if to_add else 200
 
-    current_membership = get_membership(current_user.id, group.id)
-    if not current_membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
 
+@groups_bp.route("/<int:group_id>/members/<int:member_id>", methods=["DELETE"])
+@group_access()
+def remove_member(group_id, member_id, user, group, membership):
+    """حذف عضوية من القروب"""
     member = GroupMember.query.filter_by(id=member_id, group_id=group.id).first()
     if not member:
         return jsonify({"msg": "Member not found"}), 404
 
     db.session.delete(member)
+    bump_members_count(group.id, -1)
     db.session.commit()
 
     return jsonify({"msg": "Member removed"}), 200
@@ -333,53 +543,18 @@ def remove_member(group_id, member_id):
 # ------------ Files ------------
 
 @groups_bp.route("/<int:group_id>/files", methods=["GET"])
-@jwt_required()
-def list_files(group_id):
+@admission_class("list")
+@query_budget(3)
+@group_access()
+def list_files(group_id, user, group, membership):
     """جلب ملفات القروب (لو ما فيه ملفات يرجّع قائمة فاضية)"""
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    membership = get_membership(user.id, group.id)
-    if not membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    files = GroupFile.query.filter_by(group_id=group.id).all()
-
-    results = []
-    for f in files:
-        results.append(
-            {
-                "id": f.id,
-                "group_id": f.group_id,
-                "name": getattr(f, "original_name", None) or getattr(f, "filename", None),
-                "filename": getattr(f, "filename", None),
-            }
-        )
-
-    return jsonify(results), 200
+    return versioned_response(group, "files", lambda: jsonify(list_group_files(group.id)))
 
 
 @groups_bp.route("/<int:group_id>/files", methods=["POST"])
-@jwt_required()
-def upload_file(group_id):
+@group_access()
+def upload_file(group_id, user, group, membership):
     """رفع ملف جديد للقروب"""
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    membership = get_membership(user.id, group.id)
-    if not membership:
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
     if "file" not in request.files:
         return jsonify({"msg": "No file provided"}), 400
 
@@ -389,36 +564,21 @@ def upload_file(group_id):
 
     original_name = secure_filename(file.filename)
 
-    # نضيف suffix عشوائي لتفادي تكرار الأسماء
-    random_suffix = secrets.token_hex(4)
-    stored_name = f"{group.id}_{random_suffix}_{original_name}"
-
     upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
     os.makedirs(upload_folder, exist_ok=True)
 
-    save_path = os.path.join(upload_folder, stored_name)
-    file.save(save_path)
+    # ننسخ على دفعات مع حساب SHA-256، وبعدين نخزّن حسب المحتوى (بدون تكرار)
+    tmp_path = partial_path(upload_folder, secrets.token_hex(16))
+    hasher = hashlib.sha256()
+    with open(tmp_path, "wb") as f:
+        size = copy_stream(file.stream, f, hasher)
 
-    # حفظ في قاعدة البيانات
-    gf = GroupFile(group_id=group.id, filename=stored_name)
-    if hasattr(gf, "original_name"):
-        gf.original_name = original_name
-    if hasattr(gf, "name"):
-        gf.name = original_name
+    sha256 = hasher.hexdigest()
+    stored_name = store_object(upload_folder, tmp_path, sha256)
 
-    db.session.add(gf)
+    # حفظ في قاعدة البيانات
+    gf = add_group_file(group, original_name, stored_name, sha256, size)
     db.session.commit()
+    file_processor.notify()
 
-    return (
-        jsonify(
-            {
-                "id": gf.id,
-                "group_id": gf.group_id,
-                "name": getattr(gf, "name", None)
-                or getattr(gf, "original_name", None)
-                or original_name,
-                "filename": gf.filename,
-            }
-        ),
-        201,
-    )
+    return jsonify(file_response(gf)), 201
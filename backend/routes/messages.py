@@ -1,23 +1,83 @@
-from flask import Blueprint, request, jsonify
+import base64
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 from app import db
+from extensions import batcher, hub
+from models.group import Group
+from routes.auth import group_access
+from routes.etags import versioned_response
+from admission import admission_class, rate_limit
+from sqlstats import query_budget
+from streaming import json_stream
 from sqlalchemy import text
 
 messages_bp = Blueprint("messages", __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# =================== Cursors ===================
+
+def encode_cursor(row) -> str:
+    """cursor معتم (opaque) من (created_at, id)"""
+    created_at = row["created_at"]
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat(sep=" ")
+    raw = json.dumps([created_at, row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """يرجع (created_at, id) أو ValueError لو الـ cursor مو صالح"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(message_id, int):
+        raise ValueError("invalid cursor")
+    return created_at, message_id
+
+
 # =================== جلب رسائل القروب ===================
 
-@messages_bp.route("/<int:group_id>/messages", methods=["GET"])
-def list_messages(group_id):
+def fetch_messages_page(group_id: int, limit: int, before=None, after=None):
+    """
+    صفحة رسائل مرتبة تصاعدياً + هل فيه رسائل بعدها في نفس الاتجاه.
+    بدون cursor ترجع آخر limit رسالة. ValueError لو الـ cursor مو صالح.
+    """
+    params = {"gid": group_id, "limit": limit + 1}
+    if after:
+        params["c_at"], params["c_id"] = decode_cursor(after)
+        where = "AND (created_at > :c_at OR (created_at = :c_at AND id > :c_id))"
+        order = "ASC"
+    else:
+        where = ""
+        if before:
+            params["c_at"], params["c_id"] = decode_cursor(before)
+            where = "AND (created_at < :c_at OR (created_at = :c_at AND id < :c_id))"
+        order = "DESC"
+
     rows = db.session.execute(
-        text("""
+        text(f"""
             SELECT id, group_id, content, created_at
             FROM messages
-            WHERE group_id = :gid
-            ORDER BY created_at ASC
+            WHERE group_id = :gid {where}
+            ORDER BY created_at {order}, id {order}
+            LIMIT :limit
         """),
-        {"gid": group_id}
+        params
     ).mappings().all()
 
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if order == "DESC":
+        rows = list(reversed(rows))
+
     messages = []
     for row in rows:
         messages.append({
@@ -28,37 +88,202 @@ def list_messages(group_id):
             "created_at": row["created_at"],
         })
 
-    return jsonify(messages)
+    return messages, has_more
+
+
+@messages_bp.route("/<int:group_id>/messages", methods=["GET"])
+@admission_class("list")
+@query_budget(3)
+@group_access()
+def list_messages(group_id, user, group, membership):
+    """
+    Keyset pagination على (created_at, id):
+      ?limit=N             آخر N رسالة
+      ?before=<cursor>     رسائل أقدم من الـ cursor
+      ?after=<cursor>      رسائل أحدث من الـ cursor
+    النتيجة دايماً مرتبة تصاعدياً، والـ cursors ترجع في الهيدرز
+    X-Prev-Cursor (للأقدم) و X-Next-Cursor (للأحدث).
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"msg": "Invalid limit"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    before = request.args.get("before")
+    after = request.args.get("after")
+    if before and after:
+        return jsonify({"msg": "Use either before or after, not both"}), 400
+
+    try:
+        for cursor in (before, after):
+            if cursor:
+                decode_cursor(cursor)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+
+    def build():
+        messages, has_more = fetch_messages_page(group_id, limit, before, after)
+
+        # الصفحة محدودة بـ MAX_PAGE_SIZE وفيها cursors من أول وآخر رسالة، فنقراها كاملة —
+        # بس الـ encoding والضغط نفس باقي القوائم
+        response = json_stream(messages)
+        if messages:
+            # فيه رسائل أقدم؟ (لو جينا بـ after فأكيد فيه، لأن الـ cursor نفسه أقدم)
+            if after or has_more:
+                response.headers["X-Prev-Cursor"] = encode_cursor(messages[0])
+            # الـ next cursor دايماً موجود عشان العميل يكمّل يسحب الجديد
+            response.headers["X-Next-Cursor"] = encode_cursor(messages[-1])
+        elif after:
+            response.headers["X-Next-Cursor"] = after
+        return response
+
+    # لو ما تغيّر شيء من آخر مرة نرجع 304 بدون ما نقرأ الرسائل
+    return versioned_response(group, "messages", build)
 
 
 # =================== إضافة رسالة جديدة ===================
 
 @messages_bp.route("/<int:group_id>/messages", methods=["POST"])
-def create_message(group_id):
+@group_access()
+@rate_limit("messages", key=get_jwt_identity)
+def create_message(group_id, user, group, membership):
     data = request.get_json() or {}
     content = (data.get("content") or "").strip()
 
     if not content:
         return jsonify({"msg": "Content is required"}), 400
 
-    # إدخال الرسالة
-    result = db.session.execute(
-        text("""
-            INSERT INTO messages (group_id, content)
-            VALUES (:gid, :content)
-        """),
-        {"gid": group_id, "content": content}
-    )
-    db.session.commit()
-
-    message_id = getattr(result, "lastrowid", None)
+    if batcher.enabled:
+        # write-behind: نرجع بس بعد الـ flush اللي كتب رسالتنا فعلياً.
+        # الخطأ هنا = الرسالة ما انكتبت (الـ timeout يشيلها من الـ buffer)، فإعادة الطلب ما تكرّرها
+        # نرجّع الـ connection للـ pool قبل الانتظار — وإلا الطلبات المنتظرة تحجز الـ pool كله
+        # والـ flusher نفسه ما يلقى connection يكتب فيه
+        db.session.close()
+        try:
+            row = batcher.submit(group_id, content)
+        except Exception:
+            response = jsonify({"msg": "Could not save message"})
+            response.status_code = 503
+            response.headers["Retry-After"] = "1"
+            return response
+    else:
+        # إدخال الرسالة (RETURNING عشان نرجّع id و created_at الحقيقيين)
+        row = db.session.execute(
+            text("""
+                INSERT INTO messages (group_id, content)
+                VALUES (:gid, :content)
+                RETURNING id, created_at
+            """),
+            {"gid": group_id, "content": content}
+        ).mappings().one()
+        Group.bump_version(group_id, "messages")
+        db.session.commit()
 
-    # نرجّع نفس البيانات اللي أضفناها (بشكل بسيط)
     message = {
-        "id": message_id,
+        "id": row["id"],
         "group_id": group_id,
         "content": content,
-        "created_at": None,
+        "created_at": row["created_at"],
     }
 
+    # نوصّلها لكل اللي فاتحين stream على القروب
+    hub.publish(group_id, message)
+
     return jsonify(message), 201
+
+
+# =================== Stream للرسائل الجديدة (SSE) ===================
+
+def format_sse(message) -> str:
+    data = current_app.json.dumps(message)
+    return f"id: {message['id']}\nevent: message\ndata: {data}\n\n"
+
+
+def missed_messages(group_id: int, last_id: int):
+    """
+    كل الرسائل بعد last_id على صفحات من MAX_PAGE_SIZE (مهما كان العميل متأخر).
+    الـ connection يرجع للـ pool بعد كل صفحة، مو طول الإرسال.
+    """
+    while True:
+        try:
+            rows = db.session.execute(
+                text("""
+                    SELECT id, group_id, content, created_at
+                    FROM messages
+                    WHERE group_id = :gid AND id > :last_id
+                    ORDER BY id ASC
+                    LIMIT :limit
+                """),
+                {"gid": group_id, "last_id": last_id, "limit": MAX_PAGE_SIZE}
+            ).mappings().all()
+        finally:
+            db.session.remove()
+
+        for row in rows:
+            yield dict(row)
+        if len(rows) < MAX_PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+def streams_busy():
+    response = jsonify({"msg": "Too many open streams, try again later"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+
+@messages_bp.route("/<int:group_id>/messages/stream", methods=["GET"])
+@group_access()
+def stream_messages(group_id, user, group, membership):
+    """
+    Server-Sent Events: يرسل كل رسالة جديدة في القروب لحظة إنشائها.
+    لو العميل رجع يتصل بـ Last-Event-ID نكمّل له من جدول messages أول.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"msg": "Invalid Last-Event-ID"}), 400
+
+    # الحد نشيّكه هنا عشان نرجع 503. الاشتراك نفسه داخل الـ generator:
+    # رد ما أحد قرأه (HEAD، أو wrapper رماه) ما يحجز stream للأبد
+    if hub.active_streams >= hub.max_streams:
+        return streams_busy()
+
+    heartbeat = current_app.config["MESSAGE_STREAM_HEARTBEAT"]
+    retry_ms = current_app.config["MESSAGE_STREAM_RETRY_MS"]
+
+    @stream_with_context
+    def generate():
+        yield f"retry: {retry_ms}\n\n"
+
+        # نشترك قبل ما نقرأ الفائت عشان ما تضيع رسالة بين الخطوتين
+        sub = hub.subscribe(group_id)
+        if sub is None:
+            return  # امتلى بعد الفحص — العميل يعيد الاتصال بعد retry
+        sent_id = last_id or 0
+        try:
+            if last_id is not None:
+                for message in missed_messages(group_id, last_id):
+                    sent_id = message["id"]
+                    yield format_sse(message)
+
+            while not sub.lagged:
+                message = sub.get(timeout=heartbeat)
+                if message is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                # ممكن تكون وصلت مع الـ backlog
+                if message["id"] is not None and message["id"] <= sent_id:
+                    continue
+                sent_id = message["id"]
+                yield format_sse(message)
+        finally:
+            hub.unsubscribe(sub)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
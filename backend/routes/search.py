@@ -0,0 +1,178 @@
+# backend/routes/search.py
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import Boolean, DateTime, String, Text, cast, column, literal, null, select, table, union_all
+
+from admission import admission_class
+from extensions import db
+from models.file import GroupFile
+from models.task import Task
+from routes.auth import group_access
+from search import SOURCES, highlight, query_terms, search_documents
+from sqlstats import query_budget
+
+search_bp = Blueprint("search", __name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+MAX_OFFSET = 1000  # أبعد من كذا المستخدم يحتاج كلمات أدق، مو صفحات أكثر
+
+
+# ------------ Helpers ------------
+
+def search_args():
+    """q, types, limit, offset من الـ query string. يرجع (args, None) أو (None, response)"""
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return None, (jsonify({"msg": "q is required"}), 400)
+
+    kinds = [k for k in (request.args.get("type") or "").split(",") if k]
+    if any(k not in SOURCES for k in kinds):
+        return None, (jsonify({"msg": f"type must be one of {', '.join(SOURCES)}"}), 400)
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return None, (jsonify({"msg": "Invalid limit or offset"}), 400)
+
+    return {
+        "terms": query_terms(q),
+        "kinds": kinds,
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "offset": max(0, min(offset, MAX_OFFSET)),
+    }, None
+
+
+# جدول الرسائل ما له موديل
+MESSAGES = table(
+    "messages", column("id"), column("content", Text), column("created_at", DateTime)
+)
+
+# PostgreSQL يرفض UNION فيه NULL بدون نوع مقابل عمود له نوع — كل NULL لازم cast
+NO_TITLE = cast(null(), String)
+NO_CONTENT = cast(null(), Text)
+NO_COMPLETED = cast(null(), Boolean)
+NO_CREATED_AT = cast(null(), DateTime)
+
+
+def load_sources(rows) -> dict:
+    """النص الأصلي (بالتشكيل) لكل نتيجة — كويري واحد (UNION ALL) لكل الأنواع في الصفحة"""
+    ids = {}
+    for row in rows:
+        ids.setdefault(row["kind"], []).append(row["ref_id"])
+
+    parts = []
+    if "task" in ids:
+        parts.append(
+            select(
+                literal("task").label("kind"),
+                Task.id.label("id"),
+                Task.title.label("title"),
+                NO_CONTENT.label("content"),
+                Task.is_done.label("completed"),
+                NO_CREATED_AT.label("created_at"),
+            ).where(Task.id.in_(ids["task"]))
+        )
+    if "file" in ids:
+        parts.append(
+            select(
+                literal("file"),
+                GroupFile.id,
+                GroupFile.original_name,
+                NO_CONTENT,
+                NO_COMPLETED,
+                NO_CREATED_AT,
+            ).where(GroupFile.id.in_(ids["file"]))
+        )
+    if "message" in ids:
+        parts.append(
+            select(
+                literal("message"),
+                MESSAGES.c.id,
+                NO_TITLE,
+                MESSAGES.c.content,
+                NO_COMPLETED,
+                MESSAGES.c.created_at,
+            ).where(MESSAGES.c.id.in_(ids["message"]))
+        )
+    if not parts:
+        return {}
+
+    found = {}
+    statement = union_all(*parts) if len(parts) > 1 else parts[0]
+    for kind, ref_id, title, content, completed, created_at in db.session.execute(statement):
+        if kind == "task":
+            found[(kind, ref_id)] = {"title": title, "completed": bool(completed)}
+        elif kind == "file":
+            found[(kind, ref_id)] = {"title": title, "download_url": f"/groups/files/{ref_id}/download"}
+        else:
+            found[(kind, ref_id)] = {"content": content, "created_at": created_at}
+    return found
+
+
+def search_response(args, **scope):
+    if not args["terms"]:
+        return jsonify({"results": [], "next_offset": None})
+
+    rows, has_more = search_documents(
+        db.session,
+        args["terms"],
+        kinds=args["kinds"],
+        limit=args["limit"],
+        offset=args["offset"],
+        **scope,
+    )
+    sources = load_sources(rows)
+
+    results = []
+    for row in rows:
+        source = sources.get((row["kind"], row["ref_id"]))
+        if source is None:
+            continue  # انحذف بين الكويريين
+        results.append(
+            {
+                "type": row["kind"],
+                "id": row["ref_id"],
+                "group_id": row["group_id"],
+                "rank": row["rank"],
+                "snippet": highlight(row["snippet"]),
+                **source,
+            }
+        )
+
+    return jsonify(
+        {
+            "results": results,
+            "next_offset": args["offset"] + args["limit"] if has_more else None,
+        }
+    )
+
+
+# ------------ Routes ------------
+
+@search_bp.route("/groups/<int:group_id>/search", methods=["GET"])
+@admission_class("list")
+@query_budget(3)  # الصلاحية (JOIN واحد) + البحث + المصادر (UNION واحد)
+@group_access()
+def search_group(group_id, user, group, membership):
+    """
+    بحث داخل قروب: ?q=...&type=task,message,file&limit=20&offset=0
+    النتائج مرتبة بالأقرب (العنوان أهم من النص)، والكلمات تنطابق من بدايتها.
+    """
+    args, error = search_args()
+    if error:
+        return error
+    return search_response(args, group_id=group.id)
+
+
+@search_bp.route("/search", methods=["GET"])
+@admission_class("list")
+@query_budget(2)  # البحث + المصادر
+@jwt_required()
+def search_all():
+    """نفس البحث في كل القروبات اللي المستخدم عضو فيها"""
+    args, error = search_args()
+    if error:
+        return error
+    return search_response(args, user_id=int(get_jwt_identity()))
@@ -1,83 +1,63 @@
 # backend/routes/tasks.py
+from datetime import date
+
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import insert, select
 
+from admission import admission_class
 from extensions import db
 from models.task import Task
 from models.group import Group
-from models.group_member import GroupMember
-from models.user import User
+from routes.auth import group_access
+from routes.etags import versioned_response
+from serializers import RowSerializer
+from sqlstats import query_budget
+from streaming import json_stream, stream_rows
 
 tasks_bp = Blueprint("tasks", __name__)
 
 
 # ------------ Helpers ------------
 
-def get_current_user():
-    uid = get_jwt_identity()
-    if not uid:
-        return None
-    return User.query.get(uid)
+# شكل المهمة في كل الردود (القوائم و create/update/batch)
+TASK_ROW = RowSerializer(
+    "task",
+    ("id", Task.id),
+    ("group_id", Task.group_id),
+    ("title", Task.title),
+    ("description", Task.description),
+    ("due_date", Task.due_date),
+    ("priority", Task.priority),
+    ("completed", Task.is_done, bool),
+)
+
 
+def group_tasks_query(group_id: int):
+    return select(*TASK_ROW.columns).where(Task.group_id == group_id).order_by(Task.id.asc())
 
-def user_in_group(user_id, group_id):
-    """يتأكد إن المستخدم عضو في القروب"""
-    return GroupMember.query.filter_by(
-        user_id=user_id, group_id=group_id
-    ).first()
+
+def list_group_tasks(group_id: int):
+    """كل مهام القروب كـ dicts (للـ dashboard؛ list_tasks يسويها stream)"""
+    return TASK_ROW.all(db.session.execute(group_tasks_query(group_id)))
 
 
 # ------------ List tasks ------------
 
 @tasks_bp.route("/<int:group_id>/tasks", methods=["GET"])
-@jwt_required()
-def list_tasks(group_id):
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    if not user_in_group(user.id, group.id):
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    tasks = Task.query.filter_by(group_id=group.id).order_by(Task.id.asc()).all()
-
-    result = []
-    for t in tasks:
-        result.append(
-            {
-                "id": t.id,
-                "group_id": getattr(t, "group_id", group.id),
-                "title": getattr(t, "title", ""),
-                "description": getattr(t, "description", ""),
-                "due_date": getattr(t, "due_date", None),
-                "priority": getattr(t, "priority", "Normal"),
-                "completed": bool(getattr(t, "completed", False)),
-            }
-        )
-
-    return jsonify(result), 200
+@admission_class("list")
+@query_budget(3)
+@group_access()
+def list_tasks(group_id, user, group, membership):
+    return versioned_response(
+        group, "tasks", lambda: json_stream(stream_rows(group_tasks_query(group.id), TASK_ROW))
+    )
 
 
 # ------------ Create task ------------
 
 @tasks_bp.route("/<int:group_id>/tasks", methods=["POST"])
-@jwt_required()
-def create_task(group_id):
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    if not user_in_group(user.id, group.id):
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
+@group_access()
+def create_task(group_id, user, group, membership):
     data = request.get_json() or {}
 
     title = (data.get("title") or "").strip()
@@ -109,45 +89,22 @@ def create_task(group_id):
             task.completed = False
 
         db.session.add(task)
+        Group.bump_version(group.id, "tasks")
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         # نرجّع الرسالة عشان لو صار خطأ ثاني نقدر نفهمه من الفرونت
         return jsonify({"msg": f"Error creating task: {str(e)}"}), 500
 
-    return (
-        jsonify(
-            {
-                "id": task.id,
-                "group_id": getattr(task, "group_id", group.id),
-                "title": getattr(task, "title", title),
-                "description": getattr(task, "description", description),
-                "due_date": getattr(task, "due_date", due_date),
-                "priority": getattr(task, "priority", priority),
-                "completed": bool(getattr(task, "completed", False)),
-            }
-        ),
-        201,
-    )
+    return jsonify(TASK_ROW.from_object(task)), 201
 
 
 # ------------ Update task ------------
 
 @tasks_bp.route("/<int:group_id>/tasks/<int:task_id>", methods=["PATCH"])
-@jwt_required()
-def update_task(group_id, task_id):
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    if not user_in_group(user.id, group.id):
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    task = Task.query.filter_by(id=task_id).first()
+@group_access()
+def update_task(group_id, task_id, user, group, membership):
+    task = Task.query.filter_by(id=task_id, group_id=group.id).first()
     if not task:
         return jsonify({"msg": "Task not found"}), 404
 
@@ -172,45 +129,207 @@ def update_task(group_id, task_id):
         raw = (data["priority"] or "").strip()
         task.priority = raw or task.priority
 
+    Group.bump_version(group.id, "tasks")
     db.session.commit()
 
-    return (
-        jsonify(
-            {
-                "id": task.id,
-                "group_id": getattr(task, "group_id", group_id),
-                "title": getattr(task, "title", ""),
-                "description": getattr(task, "description", ""),
-                "due_date": getattr(task, "due_date", None),
-                "priority": getattr(task, "priority", "Normal"),
-                "completed": bool(getattr(task, "completed", False)),
-            }
-        ),
-        200,
-    )
+    return jsonify(TASK_ROW.from_object(task)), 200
 
 
 # ------------ Delete task ------------
 
 @tasks_bp.route("/<int:group_id>/tasks/<int:task_id>", methods=["DELETE"])
-@jwt_required()
-def delete_task(group_id, task_id):
-    user = get_current_user()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    group = Group.query.get(group_id)
-    if not group:
-        return jsonify({"msg": "Group not found"}), 404
-
-    if not user_in_group(user.id, group.id):
-        return jsonify({"msg": "You are not a member of this group"}), 403
-
-    task = Task.query.filter_by(id=task_id).first()
+@group_access()
+def delete_task(group_id, task_id, user, group, membership):
+    task = Task.query.filter_by(id=task_id, group_id=group.id).first()
     if not task:
         return jsonify({"msg": "Task not found"}), 404
 
     db.session.delete(task)
+    Group.bump_version(group.id, "tasks")
     db.session.commit()
 
     return jsonify({"msg": "Task deleted"}), 200
+
+
+# ------------ Batch ------------
+
+BATCH_MAX_OPS = 500
+
+
+def parse_task_fields(data: dict, creating: bool):
+    """القيم من operation واحدة بنفس قواعد create/update. يرجع (values, error)"""
+    values = {}
+
+    if creating or "title" in data:
+        title = str(data.get("title") or "").strip()
+        if title:
+            values["title"] = title
+        elif creating:
+            return None, "Title is required"
+
+    if "description" in data:
+        values["description"] = str(data["description"] or "").strip()
+
+    if "due_date" in data:
+        raw = str(data["due_date"] or "").strip()
+        try:
+            values["due_date"] = date.fromisoformat(raw) if raw else None
+        except ValueError:
+            return None, "Invalid due_date (expected YYYY-MM-DD)"
+
+    if creating or "priority" in data:
+        priority = str(data.get("priority") or "").strip()
+        if priority:
+            values["priority"] = priority
+        elif creating:
+            values["priority"] = "Normal"
+
+    if creating or "completed" in data:
+        values["completed"] = bool(data.get("completed", False))
+
+    return values, None
+
+
+def operation_ids(op: dict):
+    """"id" أو "ids" — يرجع قائمة أرقام أو None لو الشكل غلط"""
+    raw = op.get("ids", [op["id"]] if "id" in op else None)
+    if not isinstance(raw, list) or not raw:
+        return None
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in raw):
+        return None
+    return list(dict.fromkeys(raw))
+
+
+@tasks_bp.route("/<int:group_id>/tasks/batch", methods=["POST"])
+@admission_class("bulk")
+@group_access()
+def batch_tasks(group_id, user, group, membership):
+    """
+    عمليات كثيرة على المهام في transaction وحدة:
+    {"operations": [{"op": "create", "title": ...},
+                    {"op": "update", "ids": [1, 2], "completed": true},
+                    {"op": "delete", "id": 3}]}
+
+    الإنشاء INSERT واحد، التعديلات اللي بنفس القيم UPDATE ... WHERE id IN (...) واحد،
+    والحذف DELETE واحد. لو فيه عملية شكلها غلط ما ينطبق شيء (400).
+    الترتيب: إنشاء ثم تعديل ثم حذف.
+    """
+    data = request.get_json(silent=True)
+    ops = data.get("operations") if isinstance(data, dict) else data
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"msg": "Expected a list of operations"}), 400
+    if len(ops) > BATCH_MAX_OPS:
+        return jsonify({"msg": f"At most {BATCH_MAX_OPS} operations per batch"}), 413
+
+    results = []
+    creates, updates, deletes = [], [], []
+    for index, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        result = {"index": index, "op": kind}
+        results.append(result)
+
+        if kind == "create":
+            values, error = parse_task_fields(op, creating=True)
+            if error:
+                result.update(status="invalid", msg=error)
+            else:
+                creates.append((result, values))
+        elif kind in ("update", "delete"):
+            ids = operation_ids(op)
+            if ids is None:
+                result.update(status="invalid", msg='"id" or a non-empty "ids" list is required')
+                continue
+            result["ids"] = ids
+            if kind == "delete":
+                deletes.append(result)
+                continue
+            values, error = parse_task_fields(op, creating=False)
+            if error or not values:
+                result.update(status="invalid", msg=error or "Nothing to update")
+            else:
+                updates.append((result, values))
+        else:
+            result.update(status="invalid", msg='op must be "create", "update" or "delete"')
+
+    if any(r.get("status") == "invalid" for r in results):
+        return jsonify({"msg": "Batch rejected, nothing was applied", "results": results}), 400
+
+    # كل الـ ids المطلوبة (تعديل/حذف) اللي فعلاً في هالقروب — كويري واحد
+    wanted = {i for r in deletes for i in r["ids"]}
+    wanted.update(i for r, _ in updates for i in r["ids"])
+    existing = {
+        task_id
+        for (task_id,) in db.session.query(Task.id).filter(
+            Task.group_id == group.id, Task.id.in_(wanted)
+        )
+    } if wanted else set()
+
+    for result in deletes + [r for r, _ in updates]:
+        missing = [i for i in result["ids"] if i not in existing]
+        result["ids"] = [i for i in result["ids"] if i in existing]
+        result["status"] = "ok" if not missing else ("partial" if result["ids"] else "not_found")
+        if missing:
+            result["not_found"] = missing
+
+    try:
+        if creates:
+            # كل الصفوف بنفس الأعمدة عشان تطلع INSERT واحد (executemany)
+            rows = [
+                {
+                    "group_id": group.id,
+                    "title": values["title"],
+                    "description": values.get("description", ""),
+                    "due_date": values.get("due_date"),
+                    "priority": values["priority"],
+                    "is_done": values["completed"],
+                }
+                for _, values in creates
+            ]
+            # sort_by_parameter_order: الـ ids ترجع بنفس ترتيب rows (PostgreSQL ما يضمن
+            # ترتيب RETURNING). في SQLite هذا يصير INSERT لكل صف — داخل نفس الـ transaction
+            # render_nulls: بدونها الصفوف اللي فيها None (due_date) تنفصل في INSERT ثاني
+            created = db.session.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                rows,
+                execution_options={"render_nulls": True},
+            ).scalars().all()
+            for (result, _), row, task_id in zip(creates, rows, created):
+                result.update(status="created", task=TASK_ROW.one(
+                    (task_id, group.id, row["title"], row["description"], row["due_date"],
+                     row["priority"], row["is_done"])
+                ))
+
+        # التعديلات تنطبق بترتيب العمليات. اللي لها نفس القيم تنجمع في UPDATE واحد،
+        # بشرط ما فيه تعديل بينهم يلمس نفس الـ ids (وإلا آخر عملية ما تكون الأخيرة)
+        runs = []  # [values key, ids] بالترتيب
+        for result, values in updates:
+            key = tuple(sorted(values.items()))
+            ids = set(result["ids"])
+            for run in reversed(runs):
+                if run[0] == key:
+                    run[1].update(ids)
+                    break
+                if run[1] & ids:
+                    runs.append([key, ids])
+                    break
+            else:
+                runs.append([key, ids])
+        for key, ids in runs:
+            if ids:
+                Task.query.filter(Task.group_id == group.id, Task.id.in_(ids)).update(
+                    dict(key), synchronize_session=False
+                )
+
+        delete_ids = {i for r in deletes for i in r["ids"]}
+        if delete_ids:
+            Task.query.filter(Task.group_id == group.id, Task.id.in_(delete_ids)).delete(
+                synchronize_session=False
+            )
+
+        Group.bump_version(group.id, "tasks")
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": f"Error applying batch: {str(e)}"}), 500
+
+    return jsonify({"results": results}), 200
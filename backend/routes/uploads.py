@@ -0,0 +1,254 @@
+# backend/routes/uploads.py
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.utils import secure_filename
+
+from cache import TTLCache
+from extensions import db, file_processor
+from models.file import GroupFile
+from models.group import Group
+from models.upload_session import UploadSession
+from routes.auth import group_access
+from storage import copy_stream, hash_file, partial_path, store_object
+
+uploads_bp = Blueprint("uploads", __name__)
+
+# الـ hash التراكمي لكل رفع: upload_id -> (offset, sha256)
+# لو الطلب التالي راح لـ worker ثاني (أو الـ process انعاد تشغيله) نحسب الـ hash من الملف عند complete
+_hashers = TTLCache(maxsize=256, ttl=3600)
+
+
+# ------------ Helpers ------------
+
+def add_group_file(group, original_name: str, stored_name: str, sha256: str, size: int):
+    """يسجّل GroupFile جديد + مهمة معالجة، ويزيد نسخة قائمة الملفات (بدون commit)"""
+    gf = GroupFile(
+        group_id=group.id,
+        filename=stored_name,
+        original_name=original_name,
+        sha256=sha256,
+        size=size,
+        meta_status="pending",
+    )
+    db.session.add(gf)
+    db.session.flush()  # عشان gf.id
+
+    # النوع والصورة المصغّرة وعدد الصفحات تنحسب في الخلفية
+    file_processor.enqueue(gf.id)
+    Group.bump_version(group.id, "files")
+    return gf
+
+
+def file_response(gf) -> dict:
+    return {
+        "id": gf.id,
+        "group_id": gf.group_id,
+        "name": gf.original_name,
+        "filename": gf.filename,
+        "sha256": gf.sha256,
+        "size": gf.size,
+        "meta_status": gf.meta_status,
+    }
+
+
+def get_upload(group, user, upload_id):
+    return UploadSession.query.filter_by(
+        id=upload_id, group_id=group.id, user_id=user.id
+    ).first()
+
+
+def requested_offset():
+    """الـ offset من هيدر Upload-Offset أو ?offset="""
+    raw = request.headers.get("Upload-Offset", request.args.get("offset"))
+    if raw is None:
+        return None
+    try:
+        offset = int(raw)
+    except ValueError:
+        return None
+    return offset if offset >= 0 else None
+
+
+def offset_response(upload, status=200):
+    response = jsonify(upload.to_dict())
+    response.status_code = status
+    response.headers["Upload-Offset"] = str(upload.received)
+    return response
+
+
+# ------------ Init ------------
+
+@uploads_bp.route("/<int:group_id>/uploads", methods=["POST"])
+@group_access()
+def init_upload(group_id, user, group, membership):
+    """يبدأ رفع على دفعات: {"filename": "...", "size": 12345}"""
+    data = request.get_json() or {}
+    original_name = secure_filename((data.get("filename") or "").strip())
+    if not original_name:
+        return jsonify({"msg": "Filename is required"}), 400
+
+    total_size = data.get("size")
+    if total_size is not None:
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            return jsonify({"msg": "Invalid size"}), 400
+        if total_size < 0:
+            return jsonify({"msg": "Invalid size"}), 400
+
+    upload = UploadSession(
+        id=secrets.token_hex(16),
+        group_id=group.id,
+        user_id=user.id,
+        original_name=original_name,
+        total_size=total_size,
+        received=0,
+    )
+    db.session.add(upload)
+    db.session.commit()
+
+    # ملف فاضي من البداية عشان الـ chunks تنكتب بـ seek
+    open(partial_path(current_app.config["UPLOAD_FOLDER"], upload.id), "wb").close()
+
+    response = offset_response(upload, 201)
+    response.headers["Location"] = f"/groups/{group.id}/uploads/{upload.id}"
+    return response
+
+
+# ------------ Status (للاستكمال بعد انقطاع) ------------
+
+@uploads_bp.route("/<int:group_id>/uploads/<upload_id>", methods=["GET"])
+@group_access()
+def upload_status(group_id, upload_id, user, group, membership):
+    upload = get_upload(group, user, upload_id)
+    if not upload:
+        return jsonify({"msg": "Upload not found"}), 404
+    return offset_response(upload)
+
+
+# ------------ Chunk ------------
+
+@uploads_bp.route("/<int:group_id>/uploads/<upload_id>", methods=["PUT", "PATCH"])
+@group_access()
+def upload_chunk(group_id, upload_id, user, group, membership):
+    """
+    يكتب chunk خام (body) عند الـ offset المحدد. الـ offset لازم يساوي
+    آخر offset مكتوب، وإلا نرجع 409 مع الـ offset الصحيح.
+    """
+    upload = get_upload(group, user, upload_id)
+    if not upload:
+        return jsonify({"msg": "Upload not found"}), 404
+
+    offset = requested_offset()
+    if offset is None:
+        return jsonify({"msg": "Upload-Offset header is required"}), 400
+    if offset != upload.received:
+        return offset_response(upload, 409)
+
+    length = request.content_length
+    if length is None:
+        return jsonify({"msg": "Content-Length is required"}), 411
+    if length > current_app.config["UPLOAD_CHUNK_MAX"]:
+        return jsonify({"msg": "Chunk too large"}), 413
+    if upload.total_size is not None and offset + length > upload.total_size:
+        return jsonify({"msg": "Chunk exceeds declared size"}), 400
+
+    # نكمّل الـ hash لو عندنا حالته عند نفس الـ offset
+    cached = _hashers.get(upload.id)
+    _hashers.delete(upload.id)
+    hasher = cached[1] if cached and cached[0] == offset else None
+    if hasher is None and offset == 0:
+        hasher = hashlib.sha256()
+
+    path = partial_path(current_app.config["UPLOAD_FOLDER"], upload.id)
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        # أي بايتات بعد الـ offset المؤكد جاية من chunk ما اكتمل — نكتب فوقها
+        f.seek(offset)
+        f.truncate()
+        written = copy_stream(request.stream, f, hasher, limit=length)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if written != length:
+        return jsonify({"msg": "Incomplete chunk, retry from the last offset"}), 400
+
+    upload.received = offset + written
+    db.session.commit()
+
+    if hasher is not None:
+        _hashers.set(upload.id, (upload.received, hasher))
+
+    return offset_response(upload)
+
+
+# ------------ Complete ------------
+
+@uploads_bp.route("/<int:group_id>/uploads/<upload_id>/complete", methods=["POST"])
+@group_access()
+def complete_upload(group_id, upload_id, user, group, membership):
+    """ينهي الرفع: يحسب الـ SHA-256، يخزّن المحتوى مرة وحدة، وينشئ GroupFile"""
+    upload = get_upload(group, user, upload_id)
+    if not upload:
+        return jsonify({"msg": "Upload not found"}), 404
+
+    if upload.total_size is not None and upload.received != upload.total_size:
+        return offset_response(upload, 409)
+
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    path = partial_path(upload_folder, upload.id)
+
+    cached = _hashers.get(upload.id)
+    _hashers.delete(upload.id)
+    if cached and cached[0] == upload.received:
+        hasher = cached[1]
+    else:
+        hasher = hash_file(path)
+
+    sha256 = hasher.hexdigest()
+    stored_name = store_object(upload_folder, path, sha256)
+
+    gf = add_group_file(group, upload.original_name, stored_name, sha256, upload.received)
+    db.session.delete(upload)
+    db.session.commit()
+    file_processor.notify()
+
+    return jsonify(file_response(gf)), 201
+
+
+# ------------ Cancel ------------
+
+@uploads_bp.route("/<int:group_id>/uploads/<upload_id>", methods=["DELETE"])
+@group_access()
+def cancel_upload(group_id, upload_id, user, group, membership):
+    upload = get_upload(group, user, upload_id)
+    if not upload:
+        return jsonify({"msg": "Upload not found"}), 404
+
+    _hashers.delete(upload.id)
+    path = partial_path(current_app.config["UPLOAD_FOLDER"], upload.id)
+    if os.path.exists(path):
+        os.remove(path)
+
+    db.session.delete(upload)
+    db.session.commit()
+    return jsonify({"msg": "Upload cancelled"}), 200
+
+
+def prune_uploads(max_age_hours: int) -> int:
+    """يحذف الرفعات اللي ما اكتملت من زمان (مع ملفاتها الجزئية)"""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+
+    stale = UploadSession.query.filter(UploadSession.created_at < cutoff).all()
+    for upload in stale:
+        path = partial_path(upload_folder, upload.id)
+        if os.path.exists(path):
+            os.remove(path)
+        db.session.delete(upload)
+
+    db.session.commit()
+    return len(stale)
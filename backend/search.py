@@ -0,0 +1,122 @@
+# backend/search.py
+"""
+البحث النصي في المهام والرسائل وأسماء الملفات.
+
+جدول واحد search_index: FTS5 في SQLite، و tsvector + GIN في PostgreSQL.
+يتحدّث بـ triggers على الجداول الأصلية (migrations.m005_search_index)، فأي كتابة —
+حتى الـ INSERT/UPDATE الجماعي أو الـ SQL الخام — تنعكس في الفهرس بدون كود إضافي.
+
+رقم المستند = ref_id * 4 + نوعه، فالحذف/التحديث بالـ primary key مو بمسح الجدول.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+# الأنواع اللي في الفهرس -> جدولها. الـ triggers نفسها في migrations (m005)
+SOURCES = {
+    "task": "tasks",
+    "message": "messages",
+    "file": "group_files",
+}
+
+# توحيد الكتابة العربية: الهمزات على الألف، الألف المقصورة، التاء المربوطة...
+ARABIC_FOLD = {
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ى": "ي",
+    "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+}
+# التشكيل والتطويل — المستخدم يكتب بدونها غالباً
+ARABIC_STRIP = [chr(c) for c in range(0x064B, 0x0653)] + ["ٰ", "ـ"]
+
+MAX_QUERY_TERMS = 10
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# علامات التظليل داخل الـ snippet (نحوّلها لـ <mark> بعد html.escape)
+MARK_START, MARK_END = "\x02", "\x03"
+
+_TRANSLATE = str.maketrans({**ARABIC_FOLD, **{c: None for c in ARABIC_STRIP}})
+
+
+# ------------ Normalization ------------
+
+def normalize(value: str) -> str:
+    """نفس التوحيد اللي تسويه الـ triggers (SEARCH_FOLD_V5 في migrations)، للاستعلام"""
+    return (value or "").translate(_TRANSLATE).lower()
+
+
+def query_terms(q: str) -> list:
+    return TOKEN_RE.findall(normalize(q))[:MAX_QUERY_TERMS]
+
+
+# ------------ Query ------------
+
+def search_documents(session, terms, user_id=None, group_id=None, kinds=None, limit=20, offset=0):
+    """
+    يرجع (rows, has_more). كل row: kind, ref_id, group_id, rank, snippet.
+    group_id: قروب واحد (العضوية متحقق منها). بدونه: كل قروبات user_id.
+    """
+    params = {"limit": limit + 1, "offset": offset}
+    filters = []
+    if group_id is not None:
+        filters.append("s.group_id = :group_id")
+        params["group_id"] = group_id
+    else:
+        filters.append("s.group_id IN (SELECT group_id FROM group_member WHERE user_id = :user_id)")
+        params["user_id"] = user_id
+    if kinds:
+        names = []
+        for i, kind in enumerate(kinds):
+            params[f"kind{i}"] = kind
+            names.append(f":kind{i}")
+        filters.append(f"s.kind IN ({', '.join(names)})")
+    where = " AND ".join(filters)
+
+    if session.get_bind().dialect.name == "postgresql":
+        # prefix match لكل كلمة (بحث أثناء الكتابة)، والكلمات من \w+ فقط
+        params["q"] = " & ".join(f"{term}:*" for term in terms)
+        sql = f"""
+            SELECT page.kind, page.ref_id, page.group_id, page.rank,
+                   ts_headline('simple', CASE WHEN page.body <> '' THEN page.body ELSE page.title END,
+                               to_tsquery('simple', :q),
+                               'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=20, MinWords=8') AS snippet
+            FROM (
+                SELECT s.kind, s.ref_id, s.group_id, s.title, s.body,
+                       ts_rank_cd(s.tsv, to_tsquery('simple', :q)) AS rank
+                FROM search_index AS s
+                WHERE s.tsv @@ to_tsquery('simple', :q) AND {where}
+                ORDER BY rank DESC, s.doc_id DESC
+                LIMIT :limit OFFSET :offset
+            ) AS page
+            ORDER BY page.rank DESC
+        """
+    else:
+        # كل كلمة phrase بين "" (ما تنفسر كـ syntax) مع * للـ prefix
+        params["q"] = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        # bm25: العنوان أهم من النص (الأرقام الأقل = أقرب)
+        sql = f"""
+            SELECT s.kind, s.ref_id, s.group_id,
+                   -bm25(search_index, 5.0, 1.0, 0.0, 0.0, 0.0) AS rank,
+                   snippet(search_index, -1, '{MARK_START}', '{MARK_END}', '…', 12) AS snippet
+            FROM search_index AS s
+            WHERE search_index MATCH :q AND {where}
+            ORDER BY bm25(search_index, 5.0, 1.0, 0.0, 0.0, 0.0), s.rowid DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    rows = session.execute(text(sql), params).mappings().all()
+    return rows[:limit], len(rows) > limit
+
+
+def highlight(snippet: str) -> str:
+    """snippet آمن للعرض كـ HTML: نهرّب النص ثم نحط <mark>"""
+    return (
+        html.escape(snippet or "")
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
@@ -0,0 +1,66 @@
+# backend/serializers.py
+from datetime import date, datetime
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+# التحويل حسب نوع العمود (ينحدد مرة وحدة وقت بناء الـ serializer، مو لكل حقل في كل صف)
+TYPE_CONVERTERS = {
+    datetime: _iso,
+    date: _iso,
+}
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+class RowSerializer:
+    """
+    يحوّل صفوف select(...) (tuples) لـ dicts بدون ما نحمّل كائنات ORM.
+
+    الحقول: (key, column) أو (key, column, convert).
+    convert ينطبق على كل قيمة (حتى None)؛ بدونه نشوف نوع العمود: datetime/date
+    تتحول isoformat لو مو None، والباقي يطلع مثل ما هو.
+
+    من الحقول نولّد دالة وحدة فيها dict literal جاهز —
+    بدون getattr ولا loop على الحقول لكل صف.
+    """
+
+    def __init__(self, name: str, *fields):
+        self.name = name
+        self.keys = tuple(field[0] for field in fields)
+        self.columns = tuple(field[1] for field in fields)
+
+        namespace = {}
+        parts = []
+        for i, field in enumerate(fields):
+            convert = field[2] if len(field) > 2 else None
+            value = f"r[{i}]"
+            if convert is not None:
+                namespace[f"_c{i}"] = convert
+                value = f"_c{i}(r[{i}])"
+            elif _python_type(field[1]) in TYPE_CONVERTERS:
+                namespace[f"_c{i}"] = TYPE_CONVERTERS[_python_type(field[1])]
+                value = f"(None if r[{i}] is None else _c{i}(r[{i}]))"
+            parts.append(f"{field[0]!r}: {value}")
+
+        source = f"def serialize(r):\n    return {{{', '.join(parts)}}}\n"
+        exec(compile(source, f"<serializer {name}>", "exec"), namespace)
+        self.one = namespace["serialize"]
+        self.source = source
+
+    def all(self, rows) -> list:
+        return list(map(self.one, rows))
+
+    def from_object(self, obj) -> dict:
+        """لكائن ORM موجود أصلاً (ردود create/update) — نفس الشكل بالضبط"""
+        return self.one(tuple(getattr(obj, column.key) for column in self.columns))
+
+    def __repr__(self):
+        return f"<RowSerializer {self.name} {self.keys}>"
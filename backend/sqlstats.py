@@ -0,0 +1,291 @@
+# backend/sqlstats.py
+"""
+عدّاد SQL لكل طلب: عدد الكويريات، وقت قاعدة البيانات، أبطأ الكويريات،
+والكويريات المتكررة بنفس الشكل (علامة N+1: نفس الـ SELECT لكل صف).
+
+- slow query log: أي كويري أبطأ من SQL_SLOW_QUERY_MS ينكتب مع شكل الـ parameters
+  (الأنواع والأطوال، بدون القيم — فيها باسوردات وإيميلات).
+- ميزانية الكويريات: @query_budget(n) على الـ view أو SQL_QUERY_BUDGETS في الإعدادات.
+  في dev/test (SQL_QUERY_BUDGET_ENFORCE) الطلب اللي يتعداها يرجع 500، وفي الإنتاج نسجّل تحذير بس.
+- للاختبارات: `with sql_stats.capture(budget=3) as log: client.get(...)`.
+- execution_options(sql_stats=False) على الاتصال يستثني كويرياته (فحوصات داخلية).
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# IN (?, ?, ?) أو IN (%(id_1)s, %(id_2)s) الموسّعة — نفس الشكل مهما كان عدد العناصر
+_PLACEHOLDER_LIST = re.compile(
+    r"\bIN\s*\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)", re.IGNORECASE
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, queries: int, budget: int, repeated=None):
+        super().__init__(f"{queries} queries, budget is {budget}")
+        self.queries = queries
+        self.budget = budget
+        self.repeated = repeated or []
+
+
+def query_budget(limit: int):
+    """أقصى عدد كويريات للـ endpoint (تحت @bp.route مباشرة)"""
+
+    def decorator(fn):
+        fn.query_budget = limit
+        return fn
+
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("IN (?...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _value_shape(value):
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """أنواع الـ parameters بدون قيمها"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "first": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+class QueryLog:
+    """الكويريات اللي صارت في طلب واحد (أو داخل capture)"""
+
+    def __init__(self, keep_slowest: int = 5):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.shapes = Counter()
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # heap: (ms, seq, statement, params)
+
+    def record(self, shape: str, elapsed: float, params) -> None:
+        self.count += 1
+        self.db_seconds += elapsed
+        self.shapes[shape] += 1
+        item = (elapsed * 1000, self.count, shape, params)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, item)
+        elif item[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def repeated(self, threshold: int) -> list:
+        """SELECTs تكررت threshold مرة أو أكثر — غالباً N+1"""
+        return [
+            {"statement": shape, "count": count}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.upper().startswith("SELECT")
+        ]
+
+    def slowest(self) -> list:
+        return [
+            {"ms": round(ms, 3), "statement": shape, "params": params}
+            for ms, _, shape, params in sorted(self._slowest, reverse=True)
+        ]
+
+    def as_dict(self, repeat_threshold: int) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "slowest": self.slowest(),
+            "repeated": self.repeated(repeat_threshold),
+        }
+
+
+class SQLStats:
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.slow_ms = 200.0
+        self.repeat_threshold = 5
+        self.budgets = {}
+        self.default_budget = 0
+        self.enforce = False
+        self.timing_header = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.slow_queries = deque(maxlen=50)
+
+    def init_app(self, app):
+        """بعد db.init_app (والـ replicas) — نسمع لكل engine"""
+        self.enabled = app.config.get("SQL_STATS_ENABLED", True)
+        self.slow_ms = app.config.get("SQL_SLOW_QUERY_MS", self.slow_ms)
+        self.repeat_threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", self.repeat_threshold)
+        self.budgets = dict(app.config.get("SQL_QUERY_BUDGETS") or {})
+        self.default_budget = app.config.get("SQL_QUERY_BUDGET_DEFAULT", 0)
+        self.enforce = app.config.get("SQL_QUERY_BUDGET_ENFORCE", False)
+        self.timing_header = app.config.get("SQL_TIMING_HEADER", False)
+        self.app = app
+        app.extensions["sql_stats"] = self
+
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in app.extensions["sqlalchemy"].engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_execute)
+                event.listen(engine, "after_cursor_execute", self._after_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # ---------- Engine events ----------
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_stats_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("sql_stats_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if not conn.get_execution_options().get("sql_stats", True):
+            return  # كويريات داخلية (فحص الـ replicas مثلاً) ما تنحسب على الطلب
+
+        targets = list(getattr(self._local, "captures", ()))
+        if has_request_context() and "sql_log" in g:
+            targets.append(g.sql_log)
+
+        slow = self.slow_ms and elapsed * 1000 >= self.slow_ms
+        if not targets and not slow:
+            return
+
+        shape = statement_shape(statement)
+        params = parameter_shape(parameters, executemany)
+        for log in targets:
+            log.record(shape, elapsed, params)
+
+        if slow:
+            endpoint = request.endpoint if has_request_context() else None
+            entry = {
+                "ms": round(elapsed * 1000, 3),
+                "endpoint": endpoint,
+                "statement": shape,
+                "params": params,
+                "at": time.time(),
+            }
+            self.slow_queries.append(entry)
+            logger.warning("slow query %.1fms [%s] %s params=%s", entry["ms"], endpoint, shape, params)
+
+    # ---------- Request hooks ----------
+
+    def _before_request(self):
+        g.sql_log = QueryLog()
+
+    def budget_for(self, endpoint):
+        if endpoint in self.budgets:
+            return self.budgets[endpoint]
+        view = current_app.view_functions.get(endpoint)
+        return getattr(view, "query_budget", None) or self.default_budget or None
+
+    def _after_request(self, response):
+        log = g.pop("sql_log", None)
+        if log is None:
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        repeated = log.repeated(self.repeat_threshold)
+        budget = self.budget_for(endpoint)
+        over_budget = budget is not None and log.count > budget
+
+        self._aggregate(endpoint, log, bool(repeated), over_budget)
+
+        for item in repeated:
+            logger.warning("possible N+1 in %s: %dx %s", endpoint, item["count"], item["statement"])
+
+        if self.timing_header:
+            response.headers.add(
+                "Server-Timing", f'db;dur={log.db_seconds * 1000:.1f};desc="{log.count} queries"'
+            )
+
+        if over_budget:
+            logger.warning("query budget exceeded in %s: %d > %d", endpoint, log.count, budget)
+            if self.enforce:
+                failed = jsonify(
+                    {
+                        "msg": "Query budget exceeded",
+                        "endpoint": endpoint,
+                        "budget": budget,
+                        **log.as_dict(self.repeat_threshold),
+                    }
+                )
+                failed.status_code = 500
+                response.close()  # الرد الأصلي ما بيوصل للـ server — نفك اللي ماسكه (اتصال stream)
+                return failed
+        return response
+
+    def _aggregate(self, endpoint, log, repeated: bool, over_budget: bool) -> None:
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "n_plus_one": 0,
+                    "over_budget": 0,
+                }
+            stats["requests"] += 1
+            stats["queries"] += log.count
+            stats["max_queries"] = max(stats["max_queries"], log.count)
+            stats["db_ms"] += log.db_seconds * 1000
+            stats["n_plus_one"] += repeated
+            stats["over_budget"] += over_budget
+
+    # ---------- Tests / scripts ----------
+
+    @contextmanager
+    def capture(self, budget=None):
+        """كل كويريات هذا الـ thread داخل الـ block؛ مع budget يرمي QueryBudgetExceeded"""
+        log = QueryLog()
+        captures = self._local.__dict__.setdefault("captures", [])
+        captures.append(log)
+        try:
+            yield log
+        finally:
+            captures.remove(log)
+        if budget is not None and log.count > budget:
+            raise QueryBudgetExceeded(log.count, budget, log.repeated(self.repeat_threshold))
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {
+                name: {
+                    **stats,
+                    "db_ms": round(stats["db_ms"], 3),
+                    "avg_queries": round(stats["queries"] / stats["requests"], 2),
+                    "budget": self.budget_for(name) if name in current_app.view_functions else None,
+                }
+                for name, stats in self.endpoints.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_ms,
+            "enforce_budgets": self.enforce,
+            "endpoints": endpoints,
+            "slow_queries": list(self.slow_queries),
+        }
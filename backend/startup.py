@@ -0,0 +1,53 @@
+# backend/startup.py
+import os
+import time
+import weakref
+
+# الـ engines اللي لازم تنسى اتصالات الأب بعد fork
+_fork_engines = weakref.WeakSet()
+_fork_hook_registered = False
+
+
+class StartupTimer:
+    """توقيت كل مرحلة في create_app — عشان أي بطء في الإقلاع يبان بالأرقام"""
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self.phases = {}
+
+    def add(self, phase: str, ms: float) -> None:
+        """مرحلة انقاست برّا التايمر (مثلاً استيراد الموديول نفسه)"""
+        self.phases[phase] = round(ms, 2)
+
+    def mark(self, phase: str) -> None:
+        """يسجّل الوقت من آخر mark لين الحين تحت اسم المرحلة"""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def report(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 2),
+        }
+
+
+def _dispose_engines_in_child():
+    for engine in list(_fork_engines):
+        # close=False: الاتصالات للأب، الابن بس ينسى الـ pool ويفتح اتصالاته
+        engine.dispose(close=False)
+
+
+def dispose_after_fork(engine) -> None:
+    """
+    gunicorn --preload: الـ workers ينعملهم fork من أب جاهز، فأي اتصال في الـ pool
+    ينورث ويتشارك بين أكثر من process. نخلي كل worker يبدأ بـ pool فاضي.
+    """
+    global _fork_hook_registered
+
+    _fork_engines.add(engine)
+    if not _fork_hook_registered and hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_dispose_engines_in_child)
+        _fork_hook_registered = True
@@ -0,0 +1,63 @@
+# backend/storage.py
+import hashlib
+import os
+
+# حجم القراءة/الكتابة — الذاكرة تبقى محدودة مهما كبر الملف
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def objects_dir(upload_folder: str) -> str:
+    return os.path.join(upload_folder, "objects")
+
+
+def partial_path(upload_folder: str, upload_id: str) -> str:
+    """مكان الملف الجزئي لرفع لسه ما اكتمل"""
+    folder = os.path.join(upload_folder, "partial")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{upload_id}.part")
+
+
+def object_name(sha256: str) -> str:
+    """الاسم المخزَّن (نسبةً لـ UPLOAD_FOLDER) لمحتوى معيّن: objects/ab/abcdef..."""
+    return os.path.join("objects", sha256[:2], sha256)
+
+
+def copy_stream(src, dst, hasher=None, limit=None) -> int:
+    """ينسخ من stream لملف على دفعات، ويحدّث الـ hash أثناء النسخ"""
+    written = 0
+    while limit is None or written < limit:
+        size = COPY_BUFFER_SIZE if limit is None else min(COPY_BUFFER_SIZE, limit - written)
+        chunk = src.read(size)
+        if not chunk:
+            break
+        dst.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+        written += len(chunk)
+    return written
+
+
+def hash_file(path: str):
+    """SHA-256 لملف موجود (نقرأه على دفعات)"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def store_object(upload_folder: str, tmp_path: str, sha256: str) -> str:
+    """
+    يحط الملف المؤقت في مكانه حسب المحتوى. لو نفس المحتوى موجود من قبل
+    نحذف المؤقت ونستخدم الموجود (deduplication). يرجع الاسم المخزَّن.
+    """
+    name = object_name(sha256)
+    final_path = os.path.join(upload_folder, name)
+
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    return name
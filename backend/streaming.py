@@ -0,0 +1,159 @@
+# backend/streaming.py
+"""
+ردود JSON للقوائم الكبيرة (المهام، الأعضاء، الرسائل) بدون ما نبني القائمة كاملة في الذاكرة:
+- stream_rows: الكويري ينفّذ داخل الـ view (ينحسب في sql_stats والـ budget)،
+  والصفوف تنقرأ من server-side cursor (yield_per) دفعة دفعة وقت الإرسال.
+- json_array: "[" + الصفوف + "]" على شكل chunks تقريباً بحجم JSON_STREAM_CHUNK_BYTES.
+- json_stream: Response فيه الـ chunks، مضغوط gzip أو br حسب Accept-Encoding
+  لو الرد أكبر من COMPRESS_MIN_BYTES.
+
+Flask يسوي teardown (و session.remove) أول ما الـ view يرجع، قبل ما يطلع أول byte —
+فالـ stream ياخذ اتصال خاص فيه من الـ pool ويسكّره بعد آخر صف، أو لو العميل قطع،
+أو لما الـ server يسكّر الرد بدون ما يقرأه.
+يعني طول الإرسال فيه اتصال محجوز؛ الطلبات القصيرة ما تتأثر.
+"""
+import itertools
+import zlib
+
+from flask import Response, current_app, request
+
+from extensions import db
+
+
+def _brotli():
+    """brotli اختياري (pip install brotli)، بدونه نضغط gzip بس"""
+    try:
+        import brotli
+    except ImportError:  # pragma: no cover
+        return None
+    return brotli
+
+
+class RowStream:
+    """
+    iterator الصفوف، ويملك الاتصال: يتسكّر بعد آخر صف، أو بـ close() لو الرد
+    ما انقرأ أبد (HEAD، رد انرمى بعد الـ view) — generator ما بدأ ما يشغّل finally
+    """
+
+    def __init__(self, conn, result, serializer):
+        self._conn = conn
+        self._result = result
+        self._serializer = serializer
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._conn is None:
+            raise StopIteration
+        try:
+            row = next(self._result)
+        except BaseException:
+            self.close()  # StopIteration أو العميل قطع أو خطأ
+            raise
+        return self._serializer.one(row)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._result.close()
+            conn.close()
+
+
+def stream_rows(statement, serializer):
+    """
+    iterator من dicts (serializer.one) لصفوف الكويري.
+    نفس اختيار الـ engine حق الـ session (replica للقراءة)، بس على اتصال مستقل.
+    """
+    engine = db.session.get_bind(clause=statement)
+    conn = engine.connect()
+    try:
+        result = conn.execution_options(
+            yield_per=current_app.config.get("JSON_STREAM_YIELD_PER", 500)
+        ).execute(statement)
+    except Exception:
+        conn.close()
+        raise
+    return RowStream(conn, result, serializer)
+
+
+def json_array(items, dumps, chunk_bytes: int):
+    """chunks (bytes) لمصفوفة JSON بنفس شكل jsonify (مضغوط، ونهايته سطر جديد)"""
+    parts, size, separator = ["["], 1, ""
+    for item in items:
+        text = separator + dumps(item, separators=(",", ":"))
+        separator = ","
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_bytes:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    parts.append("]\n")
+    yield "".join(parts).encode()
+
+
+def negotiate_encoding():
+    """أفضل ترميز من COMPRESS_ENCODINGS يقبله العميل (حسب q)، أو None"""
+    offered = [
+        name
+        for name in current_app.config.get("COMPRESS_ENCODINGS", ("br", "gzip"))
+        if name == "gzip" or (name == "br" and _brotli() is not None)
+    ]
+    if not offered:
+        return None
+    return request.accept_encodings.best_match(offered)
+
+
+def _gzip(chunks, level: int):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip header
+    for chunk in chunks:
+        # sync flush لكل chunk: العميل يبدأ يقرأ بدري، والكلفة بضع bytes
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _br(chunks, quality: int):
+    compressor = _brotli().Compressor(quality=quality)
+    for chunk in chunks:
+        out = compressor.process(chunk) + compressor.flush()
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+def json_stream(items, status: int = 200) -> Response:
+    """
+    Response لمصفوفة JSON من أي iterable (stream_rows أو list).
+    لو العميل يقبل ضغط نقرأ لين COMPRESS_MIN_BYTES: الرد الأصغر يرجع كامل بدون ضغط
+    (مع Content-Length)، والأكبر يكمّل stream مضغوط.
+    """
+    config = current_app.config
+    chunks = json_array(items, current_app.json.dumps, config.get("JSON_STREAM_CHUNK_BYTES", 16384))
+    encoding = negotiate_encoding()
+
+    if encoding is not None:
+        head, size = [], 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= config.get("COMPRESS_MIN_BYTES", 1024):
+                chunks = itertools.chain(head, chunks)
+                break
+        else:
+            # الرد كله صغير وقريناه — ما يستاهل ضغط
+            encoding = None
+            chunks = b"".join(head)
+
+    if encoding == "br":
+        chunks = _br(chunks, config.get("BROTLI_QUALITY", 4))
+    elif encoding == "gzip":
+        chunks = _gzip(chunks, config.get("GZIP_LEVEL", 6))
+
+    response = Response(chunks, status=status, mimetype="application/json")
+    if hasattr(items, "close"):
+        # الـ server يسكّر الرد دايماً، حتى لو ما قرأ الـ body
+        response.call_on_close(items.close)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,57 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# إعدادات سريعة للاختبارات (تنغيّر لكل اختبار بـ make_app(KEY=value))
+TEST_ENV = {
+    "FLASK_ENV": "testing",  # ميزانية الكويريات تنفرض (500)
+    "DB_AUTO_MIGRATE": "1",
+    "DB_SEED": "0",
+    "SECRET_KEY": "test-secret-key-with-enough-bytes-for-hs256",
+    "PASSWORD_HASH_WORKERS": "0",
+    "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    "FILE_JOBS_ENABLED": "0",
+    "MESSAGE_WRITE_BEHIND": "0",
+    "PROFILER_ENABLED": "0",
+    "ADMISSION_ENABLED": "1",
+    "ADMISSION_SQLITE_PATH": "",
+    "DATABASE_REPLICA_URLS": "",
+    "METRICS_MULTIPROC_DIR": "",
+    "PROMETHEUS_MULTIPROC_DIR": "",
+}
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """create_app على قاعدة SQLite جديدة في tmp_path"""
+
+    def factory(**env):
+        values = {
+            **TEST_ENV,
+            "DATABASE_URL": "sqlite:///" + str(tmp_path / "test.db"),
+            "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+            **env,
+        }
+        for key, value in values.items():
+            monkeypatch.setenv(key, str(value))
+
+        from app import create_app
+
+        return create_app()
+
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
@@ -0,0 +1,58 @@
+# backend/tests/helpers.py
+"""دوال مشتركة بين الاختبارات (مستخدمين وقروبات عن طريق الـ API)"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+
+
+def register(client, email, name="User", password="secret"):
+    """يسجّل ويدخل، ويرجع هيدر Authorization"""
+    client.post("/auth/register", json={"name": name, "email": email, "password": password})
+    response = client.post("/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.get_json()
+    return {"Authorization": "Bearer " + response.get_json()["access_token"]}
+
+
+def create_group(client, headers, name="Group"):
+    response = client.post("/groups", json={"name": name}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def join_group(client, headers, group):
+    response = client.post("/groups/join", json={"code": group["invite_code"]}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+@contextmanager
+def count_queries(app):
+    """الكويريات اللي تنفّذت على قاعدة التطبيق داخل الـ block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def upload_file(client, headers, group, content, name="file.txt"):
+    """يرفع ملف كامل بـ chunk واحد ويرجّع الـ GroupFile"""
+    response = client.post(
+        f"/groups/{group['id']}/uploads", json={"filename": name, "size": len(content)}, headers=headers
+    )
+    assert response.status_code == 201, response.get_json()
+    url = response.headers["Location"]
+    response = client.put(url, data=content, headers={**headers, "Upload-Offset": "0"})
+    assert response.status_code == 200, response.get_json()
+    response = client.post(url + "/complete", headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
@@ -0,0 +1,81 @@
+# backend/tests/test_admission.py
+from extensions import admission
+from helpers import create_group, register
+
+
+def test_streamed_body_holds_its_slot_until_closed(make_app):
+    app = make_app(ADMISSION_LIMITS="list=1:0")
+    client = app.test_client()
+    headers = register(client, "stream@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/members"
+
+    response = client.get(url, headers=headers, buffered=False)
+    assert response.status_code == 200 and response.is_streamed
+    assert admission.store.active("list") == 1
+
+    busy = client.get(url, headers=headers)
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+
+    assert response.get_json()[0]["email"] == "stream@example.com"
+    response.close()
+    assert admission.store.active("list") == 0
+    # الـ test client ما يسكّر الرد بنفسه (السيرفر الحقيقي يسكّره بعد آخر byte)
+    with client.get(url, headers=headers) as again:
+        assert again.status_code == 200
+    assert admission.store.active("list") == 0
+
+
+def test_sqlite_store_shares_slots(make_app, tmp_path):
+    app = make_app(ADMISSION_LIMITS="list=1:0", ADMISSION_SQLITE_PATH=str(tmp_path / "admission.db"))
+    client = app.test_client()
+    headers = register(client, "shared@example.com")
+    group = create_group(client, headers)
+
+    response = client.get(f"/groups/{group['id']}/members", headers=headers, buffered=False)
+    assert admission.stats()["store"] == "SQLiteStore"
+    assert admission.store.active("list") == 1
+    response.close()
+    assert admission.store.active("list") == 0
+
+
+def test_message_rate_limit_returns_429(make_app):
+    app = make_app(RATE_LIMIT_MESSAGES="2/60")
+    client = app.test_client()
+    headers = register(client, "chatty@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+
+    statuses = [client.post(url, json={"content": f"hi {i}"}, headers=headers).status_code for i in range(3)]
+    assert statuses == [201, 201, 429]
+
+    limited = client.post(url, json={"content": "again"}, headers=headers)
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+
+def test_login_limit_cannot_lock_out_another_ip(make_app):
+    app = make_app(RATE_LIMIT_LOGIN="2/60", RATE_LIMIT_LOGIN_IP="4/60")
+    client = app.test_client()
+    client.post("/auth/register", json={"name": "V", "email": "victim@example.com", "password": "secret"})
+    attacker = {"REMOTE_ADDR": "203.0.113.7"}
+
+    wrong = {"email": "victim@example.com", "password": "nope"}
+    statuses = [client.post("/auth/login", json=wrong, environ_base=attacker).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
+
+    # صاحب الحساب من IP ثاني يدخل عادي
+    own = client.post(
+        "/auth/login",
+        json={"email": "victim@example.com", "password": "secret"},
+        environ_base={"REMOTE_ADDR": "198.51.100.2"},
+    )
+    assert own.status_code == 200
+
+    # نفس الـ IP يجرّب إيميلات ثانية: يوقفه حد الـ IP
+    sprayed = [
+        client.post("/auth/login", json={"email": f"u{i}@example.com", "password": "x"}, environ_base=attacker)
+        for i in range(2)
+    ]
+    assert [r.status_code for r in sprayed] == [401, 429]
@@ -0,0 +1,110 @@
+# backend/tests/test_batch_tasks.py
+from extensions import db
+from helpers import create_group, register
+from models.task import Task
+
+
+def batch(client, headers, group_id, operations):
+    return client.post(f"/groups/{group_id}/tasks/batch", json={"operations": operations}, headers=headers)
+
+
+def test_created_ids_match_their_operations(app, client):
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    titles = [f"task {i}" for i in range(12)]
+    operations = [
+        # due_date None في بعضها يخليها بأعمدة مختلفة (render_nulls)
+        {"op": "create", "title": title, "due_date": "2030-01-0" + str(i % 9 + 1) if i % 2 else None}
+        for i, title in enumerate(titles)
+    ]
+
+    response = batch(client, headers, group["id"], operations)
+
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()["results"]
+    with app.app_context():
+        stored = dict(db.session.query(Task.id, Task.title).filter(Task.group_id == group["id"]))
+    assert len(stored) == len(titles)
+    for result, title in zip(results, titles):
+        assert result["status"] == "created"
+        assert result["task"]["title"] == title
+        assert stored[result["task"]["id"]] == title
+
+
+def test_update_and_delete_in_one_transaction(client):
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    gid = group["id"]
+    ids = [
+        client.post(f"/groups/{gid}/tasks", json={"title": f"t{i}"}, headers=headers).get_json()["id"]
+        for i in range(3)
+    ]
+    etag = client.get(f"/groups/{gid}/tasks", headers=headers).headers["ETag"]
+
+    response = batch(
+        client,
+        headers,
+        gid,
+        [
+            {"op": "update", "ids": ids[:2] + [9999], "completed": True},
+            {"op": "delete", "id": ids[2]},
+        ],
+    )
+
+    assert response.status_code == 200
+    update, delete = response.get_json()["results"]
+    assert update["status"] == "partial" and update["not_found"] == [9999]
+    assert delete["status"] == "ok"
+
+    listed = client.get(f"/groups/{gid}/tasks", headers=headers)
+    assert listed.headers["ETag"] != etag
+    assert [(t["id"], t["completed"]) for t in listed.get_json()] == [(ids[0], True), (ids[1], True)]
+
+
+def test_updates_to_the_same_task_apply_in_order(client):
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    gid = group["id"]
+    first, second = (
+        client.post(f"/groups/{gid}/tasks", json={"title": f"t{i}"}, headers=headers).get_json()["id"]
+        for i in range(2)
+    )
+
+    response = batch(
+        client,
+        headers,
+        gid,
+        [
+            {"op": "update", "id": first, "completed": True},
+            {"op": "update", "ids": [first, second], "completed": False},
+            {"op": "update", "id": first, "completed": True},
+        ],
+    )
+
+    assert response.status_code == 200
+    listed = client.get(f"/groups/{gid}/tasks", headers=headers).get_json()
+    assert [(t["id"], t["completed"]) for t in listed] == [(first, True), (second, False)]
+
+
+def test_invalid_operation_rejects_whole_batch(client):
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+
+    response = batch(client, headers, group["id"], [{"op": "create", "title": "ok"}, {"op": "create"}])
+
+    assert response.status_code == 400
+    assert response.get_json()["results"][1]["status"] == "invalid"
+    assert client.get(f"/groups/{group['id']}/tasks", headers=headers).get_json() == []
+
+
+def test_other_groups_tasks_are_not_touched(client):
+    owner = register(client, "a@example.com")
+    mine = create_group(client, owner, "Mine")
+    other_owner = register(client, "b@example.com")
+    other = create_group(client, other_owner, "Other")
+    foreign = client.post(f"/groups/{other['id']}/tasks", json={"title": "x"}, headers=other_owner).get_json()
+
+    response = batch(client, owner, mine["id"], [{"op": "delete", "id": foreign["id"]}])
+
+    assert response.get_json()["results"][0]["status"] == "not_found"
+    assert len(client.get(f"/groups/{other['id']}/tasks", headers=other_owner).get_json()) == 1
@@ -0,0 +1,65 @@
+# backend/tests/test_benchmarks.py
+import json
+
+import pytest
+
+from benchmarks.load import compare, main, percentile, run_endpoint, scenarios, seed
+from extensions import sql_stats
+
+BENCH_ENV = {"ADMISSION_ENABLED": "0", "SQL_STATS_ENABLED": "1", "SQL_QUERY_BUDGET_ENFORCE": "0"}
+
+
+def result(p95=10.0, rps=100.0, queries=3.0, errors=0):
+    return {"p95_ms": p95, "requests_per_sec": rps, "queries_per_request": queries, "errors": errors}
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"endpoints": {"a": result(), "b": result(), "gone": result()}}
+    current = {"endpoints": {
+        "a": result(p95=11.9, rps=81, queries=3.5),  # داخل الحدود
+        "b": result(p95=12.5, rps=70, queries=4, errors=1),
+        "new": result(p95=999),
+    }}
+
+    regressions = compare(current, baseline, threshold=0.2)
+    assert all(line.startswith("b: ") for line in regressions)
+    assert [line.split(" ")[1] for line in regressions] == ["p95", "requests/sec", "queries/request", "errors"]
+
+
+def test_percentile():
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == pytest.approx(50.5, abs=1)
+    assert percentile(values, 99) >= 99
+    assert percentile([7.0], 95) == 7.0
+
+
+def test_every_scenario_runs_without_errors(make_app):
+    app = make_app(**BENCH_ENV)
+    ctx = seed(app, app.test_client(), rows=5)
+
+    for name, call in scenarios(ctx).items():
+        stats = run_endpoint(app, sql_stats, call, ctx["headers"], requests=4, concurrency=2, warmup=1)
+        assert stats["errors"] == 0, (name, stats["error_statuses"])
+        assert stats["queries_per_request"] > 0, name
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_main_writes_json_and_fails_on_regression(make_app, tmp_path, capsys):
+    # make_app يسجّل نفس متغيرات البيئة اللي main يغيّرها، فترجع بعد الاختبار
+    make_app(**BENCH_ENV)
+    out = tmp_path / "bench.json"
+    args = ["--requests", "4", "--concurrency", "2", "--warmup", "1", "--rows", "5", "--only", "tasks.list"]
+
+    main(args + ["--out", str(out)])
+    saved = json.loads(out.read_text())
+    assert list(saved["endpoints"]) == ["tasks.list"]
+    assert saved["meta"]["requests"] == 4
+    assert "tasks.list" in capsys.readouterr().out
+
+    saved["endpoints"]["tasks.list"].update(p95_ms=0.001, requests_per_sec=1e9)
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(saved))
+    with pytest.raises(SystemExit) as exit_info:
+        main(args + ["--baseline", str(baseline)])
+    assert exit_info.value.code == 1
+    assert "REGRESSION tasks.list" in capsys.readouterr().out
@@ -0,0 +1,86 @@
+# backend/tests/test_bulk_members.py
+from extensions import password_hasher
+from helpers import create_group, join_group, register
+
+
+def test_json_import_reports_every_row(client):
+    admin = register(client, "teacher@example.com")
+    group = create_group(client, admin)
+    student = register(client, "student@example.com", name="Existing")
+    join_group(client, student, group)
+    register(client, "outsider@example.com", name="Outsider")
+    hashed = password_hasher.hashed
+
+    response = client.post(
+        f"/groups/{group['id']}/members/bulk",
+        json={"members": [
+            {"name": "New One", "email": "New1@Example.com"},
+            {"name": "", "email": "outsider@example.com"},
+            {"name": "Existing", "email": "student@example.com"},
+            {"name": "Again", "email": "new1@example.com"},
+            {"name": "No Email", "email": ""},
+            {"name": "", "email": "nameless@example.com"},
+        ]},
+        headers=admin,
+    )
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [r["status"] for r in body["results"]] == [
+        "added", "added", "already_member", "duplicate", "invalid", "invalid"
+    ]
+    assert body["results"][0]["email"] == "new1@example.com"
+    assert body["results"][1]["name"] == "Outsider"  # الاسم من الحساب الموجود
+    assert body["summary"] == {
+        "added": 2, "already_member": 1, "duplicate": 1, "invalid": 2, "created_users": 1
+    }
+    # مستخدم جديد واحد → hash واحد من الـ pool
+    assert password_hasher.hashed == hashed + 1
+
+    members = client.get(f"/groups/{group['id']}/members", headers=admin).get_json()
+    assert {m["email"] for m in members} == {
+        "teacher@example.com", "student@example.com", "new1@example.com", "outsider@example.com"
+    }
+    assert client.get(f"/groups/{group['id']}", headers=admin).get_json()["members_count"] == 4
+
+
+def test_csv_import_and_rerun(client):
+    admin = register(client, "csv@example.com")
+    group = create_group(client, admin)
+    url = f"/groups/{group['id']}/members/bulk"
+    csv_body = "﻿Name,Email\nAli,ali@example.com\nSara,sara@example.com\n".encode()
+
+    first = client.post(url, data=csv_body, content_type="text/csv", headers=admin)
+    assert first.status_code == 201
+    assert first.get_json()["summary"]["added"] == 2
+
+    # نفس الملف مرة ثانية: ما يتغيّر شي
+    again = client.post(url, data=csv_body, content_type="text/csv", headers=admin)
+    assert again.status_code == 200
+    assert again.get_json()["summary"]["already_member"] == 2
+
+
+def test_bad_payloads(make_app):
+    app = make_app(MEMBER_IMPORT_MAX="2")
+    client = app.test_client()
+    admin = register(client, "limits-bulk@example.com")
+    group = create_group(client, admin)
+    url = f"/groups/{group['id']}/members/bulk"
+
+    assert client.post(url, json={"members": []}, headers=admin).status_code == 400
+    assert client.post(url, data="name\nAli\n", content_type="text/csv", headers=admin).status_code == 400
+    rows = [{"name": str(i), "email": f"{i}@example.com"} for i in range(3)]
+    assert client.post(url, json=rows, headers=admin).status_code == 413
+
+
+def test_only_admins_can_import(client):
+    owner = register(client, "owner-bulk@example.com")
+    group = create_group(client, owner)
+    member = register(client, "member-bulk@example.com")
+    join_group(client, member, group)
+
+    response = client.post(
+        f"/groups/{group['id']}/members/bulk",
+        json=[{"name": "X", "email": "x@example.com"}],
+        headers=member,
+    )
+    assert response.status_code == 403
@@ -0,0 +1,51 @@
+# backend/tests/test_cache.py
+import cache
+from cache import TTLCache
+from extensions import db, identity_cache
+from helpers import register
+from models.user import User
+
+
+def fake_clock(monkeypatch):
+    """ساعة وهمية للـ TTL — الاختبار ما يعتمد على سرعة الجهاز"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_ttl_cache_expires_and_evicts_least_recent(monkeypatch):
+    now = fake_clock(monkeypatch)
+    users = TTLCache(maxsize=2, ttl=0.05)
+    users.set("a", 1)
+    users.set("b", 2)
+    assert users.get("a") == 1
+    users.set("c", 3)  # b أقدم استخدام
+    assert users.get("b") is None
+    assert users.get("a") == 1 and users.get("c") == 3
+
+    now[0] += 0.06
+    assert users.get("a") is None
+    assert users.stats()["size"] == 1  # c انتهت بس ما انمسحت لين نطلبها
+
+
+def test_default_ttl_is_short(app):
+    assert app.config["IDENTITY_CACHE_TTL"] <= 5
+    assert identity_cache.users.ttl == app.config["IDENTITY_CACHE_TTL"]
+
+
+def test_user_changes_show_up_after_the_ttl(make_app, monkeypatch):
+    now = fake_clock(monkeypatch)
+    app = make_app(IDENTITY_CACHE_TTL="5")
+    client = app.test_client()
+    register(client, "renamed@example.com", name="Before")
+
+    with app.app_context():
+        user = User.query.filter_by(email="renamed@example.com").one()
+        assert identity_cache.get_user(user.id).name == "Before"
+
+        user.name = "After"
+        db.session.commit()
+        # worker ثاني ما يدري بالتعديل: يشوف القديم لين يخلص الـ TTL
+        assert identity_cache.get_user(user.id).name == "Before"
+        now[0] += 5.01
+        assert identity_cache.get_user(user.id).name == "After"
@@ -0,0 +1,36 @@
+# backend/tests/test_dashboard.py
+from helpers import count_queries, create_group, join_group, register
+
+
+def test_dashboard_returns_every_section_in_one_request(app, client):
+    headers = register(client, "dash@example.com", name="Dash")
+    group = create_group(client, headers, name="Board")
+    join_group(client, register(client, "mate@example.com"), group)
+    client.post(f"/groups/{group['id']}/tasks", json={"title": "Read"}, headers=headers)
+    for i in range(3):
+        client.post(f"/groups/{group['id']}/messages", json={"content": f"m{i}"}, headers=headers)
+
+    with count_queries(app) as queries:
+        response = client.get(f"/groups/{group['id']}/dashboard?messages_limit=2", headers=headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["group"]["name"] == "Board"
+    assert sorted(m["email"] for m in body["members"]) == ["dash@example.com", "mate@example.com"]
+    assert [t["title"] for t in body["tasks"]] == ["Read"]
+    assert body["files"] == []
+    assert [m["content"] for m in body["messages"]] == ["m1", "m2"]
+    assert body["messages_prev_cursor"]
+    assert len(queries) <= 6
+
+
+def test_dashboard_sections_can_be_selected(client):
+    headers = register(client, "pick@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/dashboard"
+
+    body = client.get(f"{url}?include=tasks,members", headers=headers).get_json()
+    assert set(body) == {"tasks", "members"}
+
+    assert client.get(f"{url}?include=tasks,secrets", headers=headers).status_code == 400
+    assert client.get(f"{url}?messages_limit=lots", headers=headers).status_code == 400
@@ -0,0 +1,81 @@
+# backend/tests/test_downloads.py
+from helpers import create_group, register, upload_file
+
+CONTENT = bytes(range(256)) * 40
+
+
+def setup(client):
+    headers = register(client, "download@example.com")
+    group = create_group(client, headers)
+    gf = upload_file(client, headers, group, CONTENT, name="data.bin")
+    return headers, f"/groups/files/{gf['id']}/download", gf
+
+
+def test_full_download_has_strong_etag(client):
+    headers, url, gf = setup(client)
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers["ETag"] == f'"{gf["sha256"]}"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "data.bin" in response.headers["Content-Disposition"]
+
+    cached = client.get(url, headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+
+def test_single_range(client):
+    headers, url, _ = setup(client)
+
+    response = client.get(url, headers={**headers, "Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.data == CONTENT[100:200]
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    suffix = client.get(url, headers={**headers, "Range": "bytes=-10"})
+    assert suffix.status_code == 206
+    assert suffix.data == CONTENT[-10:]
+
+
+def test_multiple_ranges_are_multipart(client):
+    headers, url, _ = setup(client)
+
+    response = client.get(url, headers={**headers, "Range": "bytes=0-9,-5"})
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    body = response.data
+    assert b"Content-Range: bytes 0-9/%d" % len(CONTENT) in body
+    assert b"Content-Range: bytes %d-%d/%d" % (len(CONTENT) - 5, len(CONTENT) - 1, len(CONTENT)) in body
+    assert CONTENT[:10] in body and CONTENT[-5:] in body
+
+    outside = client.get(url, headers={**headers, "Range": f"bytes={len(CONTENT)}-,{len(CONTENT) + 5}-"})
+    assert outside.status_code == 416
+    assert outside.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_stale_if_range_returns_the_whole_file(client):
+    headers, url, _ = setup(client)
+
+    for ranges in ("bytes=0-9", "bytes=0-9,20-29"):
+        response = client.get(url, headers={**headers, "Range": ranges, "If-Range": '"old"'})
+        assert response.status_code == 200
+        assert response.data == CONTENT
+
+
+def test_non_members_cannot_download(client):
+    _, url, _ = setup(client)
+    stranger = register(client, "stranger-dl@example.com")
+    assert client.get(url, headers=stranger).status_code == 403
+
+
+def test_x_accel_offload(make_app):
+    app = make_app(FILE_OFFLOAD="x-accel")
+    client = app.test_client()
+    headers, url, gf = setup(client)
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.data == b""
+    assert response.headers["X-Accel-Redirect"].endswith("/" + gf["filename"])
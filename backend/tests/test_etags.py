@@ -0,0 +1,45 @@
+# backend/tests/test_etags.py
+from helpers import count_queries, create_group, register
+
+
+def test_unchanged_lists_return_304(app, client):
+    headers = register(client, "etag@example.com")
+    group = create_group(client, headers)
+    other = create_group(client, headers, name="Other")
+
+    for collection in ("tasks", "members", "files", "messages"):
+        url = f"/groups/{group['id']}/{collection}"
+        first = client.get(url, headers=headers)
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"') and first.headers["Cache-Control"] == "private, no-cache"
+
+        with count_queries(app) as queries:
+            cached = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert cached.status_code == 304, collection
+        assert cached.data == b""
+        assert cached.headers["ETag"] == etag
+        # المستخدم + القروب والعضوية — بدون قراءة القائمة نفسها
+        assert len(queries) <= 2, collection
+
+        # تعديل في قروب ثاني ما يلغي الكاش
+        client.post(f"/groups/{other['id']}/tasks", json={"title": "x"}, headers=headers)
+        assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_changes_and_query_strings_get_new_etags(client):
+    headers = register(client, "fresh@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/tasks"
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    client.post(url, json={"title": "New"}, headers=headers)
+    changed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [t["title"] for t in changed.get_json()] == ["New"]
+
+    messages = f"/groups/{group['id']}/messages"
+    assert (
+        client.get(f"{messages}?limit=5", headers=headers).headers["ETag"]
+        != client.get(f"{messages}?limit=6", headers=headers).headers["ETag"]
+    )
@@ -0,0 +1,55 @@
+# backend/tests/test_file_jobs.py
+import os
+from datetime import datetime, timedelta
+
+from extensions import db, file_processor
+from models.file_job import FileJob
+
+
+def test_dispatcher_starts_with_the_first_request(make_app):
+    file_processor._pid = None  # كأنه process جديد
+    app = make_app(FILE_JOBS_ENABLED="1", FILE_JOB_POLL_SECONDS="0.05")
+    try:
+        # create_app لحاله (CLI، أب الـ preload) ما يشغّل شي
+        assert file_processor._pid is None
+
+        app.test_client().get("/health")
+        assert file_processor._thread is not None and file_processor._thread.is_alive()
+        assert file_processor._pid == os.getpid()
+    finally:
+        # الـ dispatcher يكمّل بعد الاختبار، بس ما يلمس قواعد الاختبارات الجاية
+        file_processor.enabled = False
+
+
+def test_failed_job_backs_off_exponentially(make_app):
+    app = make_app(FILE_JOB_RETRY_SECONDS="60", FILE_JOB_MAX_ATTEMPTS="3")
+
+    with app.app_context():
+        job = FileJob(file_id=424242, status="pending")  # ملف مو موجود = فشل
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+        started = datetime.utcnow()
+        assert file_processor.run_pending() == 1
+        job = db.session.get(FileJob, job_id)
+        assert job.status == "pending" and job.attempts == 1
+        assert "LookupError" in job.error
+        first_delay = (job.next_attempt_at - started).total_seconds()
+        assert 55 <= first_delay <= 65
+
+        # قبل وقتها ما تنعاد
+        assert file_processor.run_pending() == 0
+
+        job.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        started = datetime.utcnow()
+        assert file_processor.run_pending() == 1
+        job = db.session.get(FileJob, job_id)
+        assert job.attempts == 2
+        assert 115 <= (job.next_attempt_at - started).total_seconds() <= 125
+
+        job.next_attempt_at = None
+        db.session.commit()
+        assert file_processor.run_pending() == 1
+        assert db.session.get(FileJob, job_id).status == "failed"
@@ -0,0 +1,28 @@
+# backend/tests/test_group_access.py
+from helpers import create_group, join_group, register
+
+
+def test_membership_changes_apply_on_the_next_request(client):
+    owner = register(client, "owner@example.com")
+    member = register(client, "member@example.com")
+    group = create_group(client, owner)
+    tasks_url = f"/groups/{group['id']}/tasks"
+
+    assert client.get(tasks_url, headers=member).status_code == 403
+
+    join_group(client, member, group)
+    assert client.get(tasks_url, headers=member).status_code == 200
+
+    members = client.get(f"/groups/{group['id']}/members", headers=owner).get_json()
+    member_id = next(m["id"] for m in members if m["email"] == "member@example.com")
+    response = client.delete(f"/groups/{group['id']}/members/{member_id}", headers=owner)
+    assert response.status_code == 200
+
+    assert client.get(tasks_url, headers=member).status_code == 403
+
+
+def test_missing_group_and_missing_token(client):
+    headers = register(client, "lonely@example.com")
+
+    assert client.get("/groups/999999/tasks", headers=headers).status_code == 404
+    assert client.get("/groups/999999/tasks").status_code == 401
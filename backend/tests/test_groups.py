@@ -0,0 +1,40 @@
+# backend/tests/test_groups.py
+from helpers import count_queries, create_group, join_group, register
+
+
+def counts(client, headers):
+    return {g["name"]: g["members_count"] for g in client.get("/groups", headers=headers).get_json()}
+
+
+def test_members_count_follows_membership_changes(client):
+    owner = register(client, "owner@example.com")
+    group = create_group(client, owner, name="Study")
+    assert counts(client, owner) == {"Study": 1}
+
+    join_group(client, register(client, "b@example.com"), group)
+    response = client.post(
+        f"/groups/{group['id']}/members", json={"name": "C", "email": "c@example.com"}, headers=owner
+    )
+    assert response.status_code == 201
+    assert counts(client, owner) == {"Study": 3}
+
+    response = client.delete(f"/groups/{group['id']}/members/{response.get_json()['id']}", headers=owner)
+    assert response.status_code == 200
+    assert counts(client, owner) == {"Study": 2}
+
+
+def test_group_list_query_count_does_not_grow_with_groups(app, client):
+    headers = register(client, "many@example.com")
+    create_group(client, headers, name="G0")
+    with count_queries(app) as one_group:
+        client.get("/groups", headers=headers)
+
+    for i in range(1, 5):
+        create_group(client, headers, name=f"G{i}")
+    with count_queries(app) as queries:
+        groups = client.get("/groups", headers=headers).get_json()
+
+    assert len(groups) == 5
+    assert all(g["members_count"] == 1 and g["is_owner"] for g in groups)
+    # بدون COUNT لكل قروب
+    assert len(queries) <= len(one_group)
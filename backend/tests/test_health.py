@@ -0,0 +1,37 @@
+# backend/tests/test_health.py
+import pytest
+
+INTERNAL = [
+    "/metrics",
+    "/health/messages-batch",
+    "/health/file-jobs",
+    "/health/cache",
+    "/health/passwords",
+    "/health/replicas",
+    "/health/sql",
+    "/health/profiler",
+    "/health/admission",
+    "/health/startup",
+]
+
+
+def test_probes_are_public(client):
+    assert client.get("/health").get_json() == {"ok": True}
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.get_json()["ready"] is True
+
+
+@pytest.mark.parametrize("path", INTERNAL)
+def test_internal_stats_are_hidden_without_a_token(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_internal_stats_need_the_token(make_app):
+    client = make_app(HEALTH_TOKEN="s3cret").test_client()
+
+    for path in INTERNAL:
+        assert client.get(path).status_code == 401, path
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401, path
+        response = client.get(path, headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200, path
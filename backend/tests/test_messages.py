@@ -0,0 +1,57 @@
+# backend/tests/test_messages.py
+from helpers import create_group, register
+from routes.messages import encode_cursor
+
+
+def post_messages(client, headers, group_id, count):
+    for i in range(count):
+        response = client.post(f"/groups/{group_id}/messages", json={"content": f"m{i}"}, headers=headers)
+        assert response.status_code == 201
+
+
+def test_keyset_pages_walk_the_whole_history(client):
+    headers = register(client, "pager@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+    post_messages(client, headers, group["id"], 7)
+
+    latest = client.get(f"{url}?limit=3", headers=headers)
+    assert [m["content"] for m in latest.get_json()] == ["m4", "m5", "m6"]
+
+    seen = latest.get_json()
+    cursor = latest.headers["X-Prev-Cursor"]
+    while cursor:
+        page = client.get(f"{url}?limit=3&before={cursor}", headers=headers)
+        seen = page.get_json() + seen
+        cursor = page.headers.get("X-Prev-Cursor")
+    assert [m["content"] for m in seen] == [f"m{i}" for i in range(7)]
+
+    # after: من أقدم رسالة لقدّام (نفس الثانية في created_at — الترتيب بالـ id)
+    first = client.get(f"{url}?limit=2&after={encode_cursor(seen[0])}", headers=headers)
+    assert [m["content"] for m in first.get_json()] == ["m1", "m2"]
+
+
+def test_new_messages_after_the_last_cursor(client):
+    headers = register(client, "poller@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+    post_messages(client, headers, group["id"], 2)
+
+    cursor = client.get(url, headers=headers).headers["X-Next-Cursor"]
+    empty = client.get(f"{url}?after={cursor}", headers=headers)
+    assert empty.get_json() == []
+    assert empty.headers["X-Next-Cursor"] == cursor
+
+    client.post(url, json={"content": "fresh"}, headers=headers)
+    assert [m["content"] for m in client.get(f"{url}?after={cursor}", headers=headers).get_json()] == ["fresh"]
+
+
+def test_bad_pagination_arguments(client):
+    headers = register(client, "bad@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+
+    assert client.get(f"{url}?before=nope", headers=headers).status_code == 400
+    assert client.get(f"{url}?before=a&after=b", headers=headers).status_code == 400
+    assert client.get(f"{url}?limit=x", headers=headers).status_code == 400
+    assert client.post(url, json={"content": "  "}, headers=headers).status_code == 400
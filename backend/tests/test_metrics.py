@@ -0,0 +1,100 @@
+# backend/tests/test_metrics.py
+import json
+
+from extensions import metrics
+from helpers import create_group, register
+
+TOKEN = {"Authorization": "Bearer s3cret"}
+LIST = 'blueprint="groups",endpoint="groups.list_groups",method="GET"'
+
+
+def scrape(client) -> dict:
+    """سطور العينات: "name{labels}" -> القيمة"""
+    response = client.get("/metrics", headers=TOKEN)
+    assert response.status_code == 200
+    assert response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_requests_and_latency_histogram(make_app):
+    client = make_app(HEALTH_TOKEN="s3cret", METRICS_BUCKETS="0.5,60").test_client()
+    headers = register(client, "metrics@example.com")
+    before = scrape(client)
+
+    for _ in range(3):
+        assert client.get("/groups", headers=headers).status_code == 200
+    assert client.get("/groups").status_code == 401
+    samples = scrape(client)
+
+    def delta(name):
+        return samples.get(name, 0) - before.get(name, 0)
+
+    assert delta(f'http_requests_total{{{LIST},status="200"}}') == 3
+    assert delta(f'http_requests_total{{{LIST},status="401"}}') == 1
+    # الـ buckets تراكمية، و +Inf = العدد
+    assert delta(f'http_request_duration_seconds_bucket{{{LIST},le="60.0"}}') == 4
+    assert delta(f'http_request_duration_seconds_bucket{{{LIST},le="+Inf"}}') == 4
+    assert delta(f"http_request_duration_seconds_count{{{LIST}}}") == 4
+    assert samples[f"http_request_duration_seconds_sum{{{LIST}}}"] > 0
+    assert samples["http_requests_in_flight"] >= 1  # الـ scrape نفسه
+    assert samples['db_pool_size{engine="primary"}'] >= 1
+
+
+def test_snapshots_from_other_workers_are_merged(make_app, tmp_path):
+    folder = tmp_path / "metrics"
+    client = make_app(HEALTH_TOKEN="s3cret", METRICS_MULTIPROC_DIR=str(folder)).test_client()
+    buckets = list(metrics.buckets)
+    dead = {
+        "pid": 2 ** 22 + 12345,  # worker مات
+        "buckets": buckets,
+        "requests": [["groups", "groups.list_groups", "GET", "200", 7]],
+        "durations": [["groups", "groups.list_groups", "GET", [7] + [0] * len(buckets), 0.07]],
+        "in_flight": 5,
+        "pools": {"primary": {"size": 9, "checked_out": 9, "overflow": 0}},
+        "custom": [
+            ["message_batch_size", "summary", "Batch size.", [10, 2]],
+            ["message_batch_queue_depth", "gauge", "Queue depth.", 4],
+        ],
+    }
+    (folder / "metrics-1.json").write_text(json.dumps(dead))
+    (folder / "metrics-2.json").write_text(json.dumps({**dead, "buckets": [1.0]}))
+
+    samples = scrape(client)
+    assert samples[f'http_requests_total{{{LIST},status="200"}}'] >= 7
+    assert samples[f"http_request_duration_seconds_count{{{LIST}}}"] >= 7
+    # الـ gauges من الأحياء بس
+    assert samples["http_requests_in_flight"] < 5
+    assert samples['db_pool_size{engine="primary"}'] < 9
+    assert samples["message_batch_size_sum"] >= 10 and samples["message_batch_size_count"] >= 2
+    assert samples["message_batch_queue_depth"] < 4
+    assert any(p.name.startswith("metrics-") and p.name != "metrics-1.json" for p in folder.iterdir())
+
+
+def test_write_behind_batches_are_exported(make_app):
+    client = make_app(HEALTH_TOKEN="s3cret", MESSAGE_WRITE_BEHIND="1").test_client()
+    headers = register(client, "batched-metrics@example.com")
+    group = create_group(client, headers)
+    before = scrape(client)
+
+    for i in range(2):
+        response = client.post(f"/groups/{group['id']}/messages", json={"content": f"m{i}"}, headers=headers)
+        assert response.status_code == 201
+    samples = scrape(client)
+
+    assert samples["message_batch_size_sum"] - before.get("message_batch_size_sum", 0) == 2
+    assert samples["message_batch_flush_seconds_count"] - before.get("message_batch_flush_seconds_count", 0) >= 1
+    assert samples["message_batch_flush_seconds_sum"] > 0
+    assert samples["message_batch_queue_depth"] == 0
+
+
+def test_readiness_reports_checks(client):
+    response = client.get("/health/ready")
+    body = response.get_json()
+    assert response.status_code == 200 and body["ready"] is True
+    assert body["checks"]["database"]["ok"] is True
+    assert body["checks"]["schema"]["version"] == body["checks"]["schema"]["expected"]
@@ -0,0 +1,75 @@
+# backend/tests/test_migrations.py
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+import models  # noqa: F401 — يسجّل الجداول في metadata
+from extensions import db
+from migrations import LATEST_VERSION, current_version, upgrade
+
+
+def quiet(*_):
+    pass
+
+
+def test_fresh_database_matches_the_models(tmp_path, app):
+    engine = create_engine("sqlite:///" + str(tmp_path / "fresh.db"))
+
+    assert upgrade(engine, log=quiet) == list(range(1, LATEST_VERSION + 1))
+    assert current_version(engine) == LATEST_VERSION
+    assert upgrade(engine, log=quiet) == []
+
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert columns == set(table.columns.keys()), table.name
+    assert {c["name"] for c in inspector.get_columns("messages")} == {
+        "id", "group_id", "content", "created_at"
+    }
+
+
+def test_legacy_create_all_database_is_upgraded(tmp_path, app):
+    # قاعدة من قبل الترقيات: group بدون عدّادات، group_files بدون أعمدة المحتوى
+    engine = create_engine("sqlite:///" + str(tmp_path / "legacy.db"))
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE user (id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, '
+            'email VARCHAR(120) NOT NULL UNIQUE, password_hash VARCHAR(255) NOT NULL)'
+        ))
+        conn.execute(text(
+            'CREATE TABLE "group" (id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, '
+            'invite_code VARCHAR(20) NOT NULL UNIQUE, owner_id INTEGER NOT NULL)'
+        ))
+        conn.execute(text(
+            "CREATE TABLE group_member (id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL, "
+            "user_id INTEGER NOT NULL, role VARCHAR(20))"
+        ))
+        conn.execute(text(
+            "CREATE TABLE group_files (id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL, "
+            "filename VARCHAR(255) NOT NULL, original_name VARCHAR(255) NOT NULL, uploaded_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO user VALUES (1, 'A', 'a@example.com', 'x'), (2, 'B', 'b@example.com', 'x')"))
+        conn.execute(text("""INSERT INTO "group" VALUES (1, 'G', 'CODE', 1)"""))
+        # عضوية مكررة من قبل الـ unique index
+        conn.execute(text("INSERT INTO group_member VALUES (1, 1, 1, 'admin'), (2, 1, 2, NULL), (3, 1, 2, NULL)"))
+
+    upgrade(engine, log=quiet)
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT members_count FROM "group"')).scalar() == 2
+        assert conn.execute(text("SELECT COUNT(*) FROM group_member")).scalar() == 2
+    inspector = inspect(engine)
+    assert "sha256" in {c["name"] for c in inspector.get_columns("group_files")}
+    assert "next_attempt_at" in {c["name"] for c in inspector.get_columns("file_jobs")}
+    assert "uq_group_member_user_group" in {i["name"] for i in inspector.get_indexes("group_member")}
+
+
+def test_current_version_only_hides_a_missing_table(tmp_path):
+    engine = create_engine("sqlite:///" + str(tmp_path / "broken.db"))
+    assert current_version(engine) == 0
+
+    # الجدول موجود بس الكويري يفشل: ما نرجّع 0 (وإلا DB_AUTO_MIGRATE يعيد كل الترقيات)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE schema_version (applied_at TIMESTAMP)"))
+    with pytest.raises(OperationalError):
+        current_version(engine)
@@ -0,0 +1,41 @@
+# backend/tests/test_passwords.py
+from extensions import password_hasher
+from helpers import register
+from models.user import User
+
+
+def stored_hash(app, email):
+    with app.app_context():
+        return User.query.filter_by(email=email).one().password_hash
+
+
+def test_login_rehashes_after_method_change(make_app):
+    old_app = make_app(PASSWORD_HASH_METHOD="pbkdf2:sha256:1000")
+    register(old_app.test_client(), "rehash@example.com")
+    assert stored_hash(old_app, "rehash@example.com").startswith("pbkdf2:sha256:1000$")
+
+    app = make_app(PASSWORD_HASH_METHOD="pbkdf2:sha256:2000")
+    client = app.test_client()
+    rehashed = password_hasher.rehashed
+
+    credentials = {"email": "rehash@example.com", "password": "secret"}
+    assert client.post("/auth/login", json=credentials).status_code == 200
+    assert stored_hash(app, "rehash@example.com").startswith("pbkdf2:sha256:2000$")
+    assert password_hasher.rehashed == rehashed + 1
+
+    # الـ hash الجديد يشتغل، وما يتحدّث مرة ثانية
+    assert client.post("/auth/login", json=credentials).status_code == 200
+    assert password_hasher.rehashed == rehashed + 1
+    assert password_hasher.stats()["rehashed"] == rehashed + 1
+
+
+def test_full_queue_returns_503(make_app):
+    app = make_app(PASSWORD_HASH_WORKERS="1", PASSWORD_HASH_QUEUE_MAX="0")
+    rejected = password_hasher.rejected
+
+    response = app.test_client().post(
+        "/auth/register", json={"name": "Busy", "email": "busy@example.com", "password": "secret"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.rejected == rejected + 1
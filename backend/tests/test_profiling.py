@@ -0,0 +1,84 @@
+# backend/tests/test_profiling.py
+import os
+import threading
+import time
+from collections import Counter
+
+from extensions import profiler
+from helpers import register
+from profiling import HEADER, _Sampler, hot_functions, read_collapsed
+
+PROFILE = {HEADER: "p-token"}
+
+
+def profiled_app(make_app, tmp_path, **env):
+    return make_app(
+        PROFILER_ENABLED="1", PROFILER_TOKEN="p-token", PROFILER_DIR=str(tmp_path / "profiles"), **env
+    )
+
+
+def test_hot_functions_counts_self_and_total():
+    stacks = Counter({"main;view;query": 3, "main;view": 1})
+    report = hot_functions(stacks, top=2)
+
+    assert report["samples"] == 4
+    assert report["self"][0] == {"function": "query", "samples": 3, "percent": 75.0}
+    assert {row["function"]: row["samples"] for row in report["total"]} == {"main": 4, "view": 4}
+
+
+def test_sampler_records_the_busy_thread():
+    sampler = _Sampler(0.001)
+    sampler.start(threading.get_ident())
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    stacks = sampler.stop(threading.get_ident())
+
+    assert sum(stacks.values()) > 0
+    assert any("test_sampler_records_the_busy_thread" in stack for stack in stacks)
+    assert not sampler._active.is_set()
+
+
+def test_only_requests_with_the_token_are_profiled(make_app, tmp_path):
+    app = profiled_app(make_app, tmp_path)
+    client = app.test_client()
+    headers = register(client, "profiled@example.com")
+    profiled = profiler.profiled["groups.list_groups"]
+
+    assert "X-Profile-Id" not in client.get("/groups", headers=headers).headers
+    assert "X-Profile-Id" not in client.get("/groups", headers={**headers, HEADER: "wrong"}).headers
+
+    response = client.get("/groups", headers={**headers, **PROFILE})
+    profile_id = response.headers["X-Profile-Id"]
+    assert profile_id.startswith("groups.list_groups/") and profile_id.endswith(".collapsed")
+    path = os.path.join(app.config["PROFILER_DIR"], profile_id)
+    assert isinstance(read_collapsed(path), Counter)
+    assert profiler.profiled["groups.list_groups"] == profiled + 1
+
+
+def test_cprofile_mode_reports_hot_functions_and_rotates(make_app, tmp_path):
+    app = profiled_app(make_app, tmp_path, PROFILER_MODE="cprofile", PROFILER_KEEP="2")
+    client = app.test_client()
+    headers = register(client, "cprofile@example.com")
+
+    ids = [client.get("/groups", headers={**headers, **PROFILE}).headers["X-Profile-Id"] for _ in range(3)]
+    assert all(profile_id.endswith(".prof") for profile_id in ids)
+    folder = os.path.join(app.config["PROFILER_DIR"], "groups.list_groups")
+    assert len(os.listdir(folder)) == 2
+
+    report = profiler.report_from_files(endpoint="groups.list_groups", top=5)["groups.list_groups"]
+    assert report["requests"] == 2
+    assert len(report["total"]) == 5
+    assert any("list_groups" in row["function"] for row in report["total"])
+
+    result = app.test_cli_runner().invoke(args=["profile-report", "--endpoint", "groups.list_groups"])
+    assert result.exit_code == 0
+    assert "groups.list_groups (2 request(s))" in result.output
+
+
+def test_sample_rate_profiles_without_a_token(make_app, tmp_path):
+    app = profiled_app(make_app, tmp_path, PROFILER_SAMPLE_RATE="1")
+    client = app.test_client()
+
+    assert "X-Profile-Id" in client.get("/health").headers
+    assert profiler.stats()["sample_rate"] == 1.0
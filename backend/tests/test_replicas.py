@@ -0,0 +1,73 @@
+# backend/tests/test_replicas.py
+import time
+
+import pytest
+from sqlalchemy import event
+
+from extensions import replica_router
+from helpers import create_group, register
+
+
+@pytest.fixture
+def replica_app(make_app, tmp_path):
+    # replicas على نفس ملف SQLite: engines مستقلة، فنعرف كل كويري راح لأي وحدة
+    url = "sqlite:///" + str(tmp_path / "test.db")
+    return make_app(DATABASE_REPLICA_URLS=f"{url},{url}")
+
+
+@pytest.fixture
+def engine_log(replica_app):
+    with replica_app.app_context():
+        engines = dict(replica_app.extensions["sqlalchemy"].engines)
+    names = {id(engine): key or "primary" for key, engine in engines.items()}
+    log = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.append(names[id(conn.engine)])
+
+    for engine in engines.values():
+        event.listen(engine, "before_cursor_execute", record)
+    yield log
+    for engine in engines.values():
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_write_returns_marker_and_reads_stay_on_primary(replica_app, engine_log):
+    client = replica_app.test_client()
+    headers = register(client, "ryw@example.com")
+    response = client.post("/groups", json={"name": "Fresh"}, headers=headers)
+    written = response.headers["X-Last-Write"]
+    assert abs(float(written) - time.time()) < 5
+
+    engine_log.clear()
+    response = client.get("/groups", headers={**headers, "X-Last-Write": written})
+    assert [g["name"] for g in response.get_json()] == ["Fresh"]
+    assert engine_log and set(engine_log) == {"primary"}
+
+
+def test_reads_without_recent_write_use_one_replica_per_request(replica_app, engine_log):
+    client = replica_app.test_client()
+    headers = register(client, "reader@example.com")
+    group = create_group(client, headers)
+    stale = {**headers, "X-Last-Write": f"{time.time() - 60:.3f}"}
+
+    used = set()
+    for request_headers in (headers, stale, headers, stale):
+        engine_log.clear()
+        response = client.get(f"/groups/{group['id']}/dashboard", headers=request_headers)
+        assert response.status_code == 200
+        # كل كويريات الطلب على نفس الـ replica
+        assert len(set(engine_log)) == 1
+        used |= set(engine_log)
+
+    assert used == {"replica0", "replica1"}
+
+
+def test_invalid_marker_is_ignored(replica_app, engine_log):
+    client = replica_app.test_client()
+    headers = register(client, "junk@example.com")
+
+    engine_log.clear()
+    client.get("/groups", headers={**headers, "X-Last-Write": "soon"})
+    assert set(engine_log) <= {"replica0", "replica1"}
+    assert "read_your_writes_requests" in replica_router.stats()
@@ -0,0 +1,132 @@
+# backend/tests/test_search.py
+import io
+
+from helpers import create_group, register
+from search import normalize, query_terms
+
+
+def seed_report(client, headers, group_id):
+    """مهمة ورسالة وملف كلها فيها كلمة report"""
+    client.post(f"/groups/{group_id}/tasks", json={"title": "Weekly report"}, headers=headers)
+    client.post(f"/groups/{group_id}/messages", json={"content": "report is ready"}, headers=headers)
+    client.post(
+        f"/groups/{group_id}/files",
+        data={"file": (io.BytesIO(b"%PDF-1.4 report"), "report.pdf")},
+        headers=headers,
+        content_type="multipart/form-data",
+    )
+
+
+def test_group_search_covers_all_types_within_budget(app, client):
+    assert app.config["SQL_QUERY_BUDGET_ENFORCE"]
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    seed_report(client, headers, group["id"])
+
+    response = client.get(f"/groups/{group['id']}/search?q=report", headers=headers)
+
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()["results"]
+    assert {r["type"] for r in results} == {"task", "message", "file"}
+    by_type = {r["type"]: r for r in results}
+    assert by_type["task"]["title"] == "Weekly report"
+    assert by_type["message"]["content"] == "report is ready"
+    assert by_type["file"]["download_url"].endswith("/download")
+    assert "<mark>" in by_type["message"]["snippet"]
+
+
+def test_search_all_covers_all_types_within_budget(client):
+    headers = register(client, "a@example.com")
+    first = create_group(client, headers, "First")
+    second = create_group(client, headers, "Second")
+    seed_report(client, headers, first["id"])
+    client.post(f"/groups/{second['id']}/tasks", json={"title": "Report draft"}, headers=headers)
+
+    response = client.get("/search?q=report", headers=headers)
+
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()["results"]
+    assert {r["type"] for r in results} == {"task", "message", "file"}
+    assert {r["group_id"] for r in results} == {first["id"], second["id"]}
+
+
+def test_search_is_scoped_to_members(client):
+    owner = register(client, "owner@example.com")
+    group = create_group(client, owner)
+    seed_report(client, owner, group["id"])
+    outsider = register(client, "outsider@example.com")
+
+    assert client.get(f"/groups/{group['id']}/search?q=report", headers=outsider).status_code == 403
+    assert client.get("/search?q=report", headers=outsider).get_json()["results"] == []
+
+
+def test_search_validates_arguments(client):
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+
+    assert client.get(f"/groups/{group['id']}/search", headers=headers).status_code == 400
+    assert client.get(f"/groups/{group['id']}/search?q=x&type=nope", headers=headers).status_code == 400
+
+
+def test_normalize_folds_arabic_spelling():
+    assert normalize("مَدْرَسَة") == normalize("مدرسه")
+    assert normalize("أحمد") == normalize("احمد") == normalize("إحمد")
+    assert normalize("مستشفى") == "مستشفي"
+    assert query_terms("  Report، الواجبات ") == ["report", "الواجبات"]
+
+
+def test_arabic_text_matches_across_spellings(client):
+    headers = register(client, "arabic@example.com")
+    group = create_group(client, headers)
+    client.post(f"/groups/{group['id']}/messages", json={"content": "موعد الإختبار بُكرة"}, headers=headers)
+
+    for q in ("الاختبار", "الإختبار", "بكره"):
+        results = client.get(f"/groups/{group['id']}/search?q={q}", headers=headers).get_json()["results"]
+        assert [r["type"] for r in results] == ["message"], q
+
+
+def test_index_follows_updates_and_deletes(client):
+    headers = register(client, "sync@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/search"
+    task = client.post(f"/groups/{group['id']}/tasks", json={"title": "Draft essay"}, headers=headers).get_json()
+
+    assert len(client.get(url + "?q=essay", headers=headers).get_json()["results"]) == 1
+
+    client.patch(f"/groups/{group['id']}/tasks/{task['id']}", json={"title": "Final poster"}, headers=headers)
+    assert client.get(url + "?q=essay", headers=headers).get_json()["results"] == []
+    assert len(client.get(url + "?q=poster", headers=headers).get_json()["results"]) == 1
+
+    client.delete(f"/groups/{group['id']}/tasks/{task['id']}", headers=headers)
+    assert client.get(url + "?q=poster", headers=headers).get_json()["results"] == []
+
+
+def test_results_are_ranked_and_paginated(client):
+    headers = register(client, "pages@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/search"
+    for i in range(3):
+        client.post(f"/groups/{group['id']}/messages", json={"content": f"lab notes {i}"}, headers=headers)
+    client.post(f"/groups/{group['id']}/tasks", json={"title": "Lab"}, headers=headers)
+
+    first = client.get(url + "?q=lab&limit=2", headers=headers).get_json()
+    assert first["results"][0]["type"] == "task"  # العنوان أهم من النص
+    assert first["next_offset"] == 2
+
+    second = client.get(url + "?q=lab&limit=2&offset=2", headers=headers).get_json()
+    assert second["next_offset"] is None
+    ids = {(r["type"], r["id"]) for r in first["results"] + second["results"]}
+    assert len(ids) == 4
+
+    only_tasks = client.get(url + "?q=lab&type=task", headers=headers).get_json()["results"]
+    assert [r["type"] for r in only_tasks] == ["task"]
+
+
+def test_source_union_nulls_are_typed():
+    # PostgreSQL ما يقبل NULL بدون نوع في UNION مقابل عمود timestamp/text
+    from sqlalchemy.dialects import postgresql
+
+    from routes.search import NO_COMPLETED, NO_CONTENT, NO_CREATED_AT, NO_TITLE
+
+    for expr in (NO_TITLE, NO_CONTENT, NO_COMPLETED, NO_CREATED_AT):
+        assert str(expr.compile(dialect=postgresql.dialect())).startswith("CAST(NULL AS ")
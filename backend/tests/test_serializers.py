@@ -0,0 +1,60 @@
+# backend/tests/test_serializers.py
+from datetime import date, datetime
+
+from extensions import db
+from helpers import count_queries, create_group, register
+from models.task import Task
+from routes.tasks import TASK_ROW
+from serializers import RowSerializer
+from sqlalchemy import select
+
+
+def test_fields_convert_by_column_type():
+    row = RowSerializer(
+        "task",
+        ("id", Task.id),
+        ("due_date", Task.due_date),
+        ("created_at", Task.created_at),
+        ("completed", Task.is_done, bool),
+    )
+    assert row.keys == ("id", "due_date", "created_at", "completed")
+    assert row.one((1, date(2026, 1, 2), datetime(2026, 1, 1, 3, 4), 0)) == {
+        "id": 1, "due_date": "2026-01-02", "created_at": "2026-01-01T03:04:00", "completed": False
+    }
+    # None يطلع None بدون convert، والـ convert الصريح ينطبق حتى على None
+    assert row.one((2, None, None, None)) == {
+        "id": 2, "due_date": None, "created_at": None, "completed": False
+    }
+    assert [r["completed"] for r in row.all([(3, None, None, 1), (4, None, None, 0)])] == [True, False]
+    assert "getattr" not in row.source
+
+
+def test_projection_matches_orm_shape(app, client):
+    headers = register(client, "serial@example.com")
+    group = create_group(client, headers)
+    created = client.post(
+        f"/groups/{group['id']}/tasks",
+        json={"title": "Essay", "description": "600 words", "priority": "high"},
+        headers=headers,
+    ).get_json()
+
+    with app.app_context():
+        task = db.session.get(Task, created["id"])
+        projected = db.session.execute(select(*TASK_ROW.columns).where(Task.id == task.id)).one()
+        assert TASK_ROW.one(projected) == TASK_ROW.from_object(task) == created
+
+
+def test_list_endpoints_use_one_query_each(app, client):
+    headers = register(client, "lists@example.com")
+    group = create_group(client, headers)
+    for i in range(5):
+        client.post(f"/groups/{group['id']}/tasks", json={"title": f"T{i}"}, headers=headers)
+
+    for path in ("tasks", "members", "files"):
+        with count_queries(app) as queries:
+            response = client.get(f"/groups/{group['id']}/{path}", headers=headers)
+            assert response.status_code == 200
+            response.get_json()
+        # الصلاحية + نسخة القائمة + القائمة — مو كويري لكل صف
+        assert len(queries) <= 3, path
+    assert len(client.get(f"/groups/{group['id']}/tasks", headers=headers).get_json()) == 5
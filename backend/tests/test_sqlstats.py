@@ -0,0 +1,93 @@
+# backend/tests/test_sqlstats.py
+import pytest
+from sqlalchemy import text
+
+from extensions import db, sql_stats
+from helpers import create_group, join_group, register
+from sqlstats import QueryBudgetExceeded, parameter_shape, statement_shape
+from test_search import seed_report
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?...)"
+    assert statement_shape("INSERT INTO t VALUES (?, ?)") == "INSERT INTO t VALUES (?, ?)"
+
+
+def test_parameter_shape_hides_values():
+    shape = parameter_shape({"email": "a@example.com", "id": 3})
+    assert shape == {"email": "str[13]", "id": "int"}
+    assert parameter_shape([("x", 1), ("y", 2)], executemany=True) == {"rows": 2, "first": ["str[1]", "int"]}
+
+
+def test_budgeted_endpoints_stay_within_budget(app, client):
+    """كل endpoint عليه ميزانية، ببيانات في كل نوع، والـ enforce شغّال (500 لو تعدّاها)"""
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    seed_report(client, headers, group["id"])
+    join_group(client, register(client, "b@example.com"), group)
+
+    gid = group["id"]
+    urls = [
+        "/groups",
+        f"/groups/{gid}",
+        f"/groups/{gid}/dashboard",
+        f"/groups/{gid}/members",
+        f"/groups/{gid}/files",
+        f"/groups/{gid}/tasks",
+        f"/groups/{gid}/messages",
+        f"/groups/{gid}/search?q=report",
+        "/search?q=report",
+    ]
+    for url in urls:
+        with sql_stats.capture() as log:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, (url, response.get_json())
+        endpoint = app.url_map.bind("localhost").match(url.split("?")[0])[0]
+        with app.test_request_context():
+            assert log.count <= sql_stats.budget_for(endpoint), url
+
+
+def test_budget_exceeded_returns_500_when_enforced(make_app):
+    app = make_app(SQL_QUERY_BUDGETS="tasks.list_tasks=1")
+    client = app.test_client()
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+
+    response = client.get(f"/groups/{group['id']}/tasks", headers=headers)
+
+    assert response.status_code == 500
+    body = response.get_json()
+    assert body["msg"] == "Query budget exceeded"
+    assert body["budget"] == 1 and body["queries"] > 1
+
+
+def test_budget_only_logged_when_not_enforced(make_app):
+    app = make_app(SQL_QUERY_BUDGETS="tasks.list_tasks=1", SQL_QUERY_BUDGET_ENFORCE="0")
+    client = app.test_client()
+    headers = register(client, "a@example.com")
+    group = create_group(client, headers)
+    before = sql_stats.endpoints.get("tasks.list_tasks", {}).get("over_budget", 0)
+
+    assert client.get(f"/groups/{group['id']}/tasks", headers=headers).status_code == 200
+    assert sql_stats.endpoints["tasks.list_tasks"]["over_budget"] == before + 1
+
+
+def test_capture_detects_repeated_selects(app):
+    with app.app_context():
+        with sql_stats.capture() as log:
+            for i in range(6):
+                db.session.execute(text("SELECT :i"), {"i": i})
+        assert log.count == 6
+        assert log.repeated(5) == [{"statement": "SELECT ?", "count": 6}]
+
+        with pytest.raises(QueryBudgetExceeded) as info:
+            with sql_stats.capture(budget=1):
+                db.session.execute(text("SELECT 1"))
+                db.session.execute(text("SELECT 2"))
+        assert info.value.queries == 2
+
+
+def test_server_timing_header(client):
+    headers = register(client, "a@example.com")
+    response = client.get("/groups", headers=headers)
+    assert response.headers["Server-Timing"].startswith("db;dur=")
@@ -0,0 +1,120 @@
+# backend/tests/test_sse.py
+import pytest
+
+from extensions import hub
+from helpers import create_group, register
+
+
+@pytest.fixture
+def sse_app(make_app):
+    return make_app(MESSAGE_STREAM_HEARTBEAT="0.1", MESSAGE_STREAM_MAX="1")
+
+
+def events(response):
+    """chunks الـ stream كنصوص (كل وحدة event أو heartbeat)"""
+    for chunk in response.response:
+        yield chunk.decode() if isinstance(chunk, bytes) else chunk
+
+
+def next_message(stream):
+    for chunk in stream:
+        if chunk.startswith("id:"):
+            return chunk
+
+
+def test_stream_delivers_new_and_missed_messages(sse_app):
+    client = sse_app.test_client()
+    headers = register(client, "sse@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+    first = client.post(url, json={"content": "before"}, headers=headers).get_json()
+
+    # Last-Event-ID: نكمّل من بعد الرسالة الأولى
+    response = client.get(f"{url}/stream", headers={**headers, "Last-Event-ID": "0"}, buffered=False)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        stream = events(response)
+        assert next(stream).startswith("retry: ")
+        assert f"id: {first['id']}\n" in next_message(stream)
+
+        live = client.post(url, json={"content": "live"}, headers=headers).get_json()
+        chunk = next_message(stream)
+        assert chunk.startswith(f"id: {live['id']}\nevent: message\n")
+        assert '"content":"live"' in chunk.replace(" ", "")
+
+        # بعد مهلة بدون رسائل يطلع heartbeat
+        assert next(stream) == ": heartbeat\n\n"
+
+        # حد الـ streams المفتوحة
+        busy = client.get(f"{url}/stream", headers=headers)
+        assert busy.status_code == 503
+        assert busy.headers["Retry-After"] == "5"
+    finally:
+        response.close()
+    # العميل قطع = الاشتراك ينشال
+    assert hub.active_streams == 0
+
+
+def test_stream_needs_a_valid_last_event_id(sse_app):
+    client = sse_app.test_client()
+    owner = register(client, "owner@example.com")
+    group = create_group(client, owner)
+    url = f"/groups/{group['id']}/messages/stream"
+
+    assert client.get(url, headers={**owner, "Last-Event-ID": "abc"}).status_code == 400
+
+
+def test_stream_needs_membership(sse_app):
+    client = sse_app.test_client()
+    group = create_group(client, register(client, "owner@example.com"))
+    outsider = register(client, "outsider@example.com")
+
+    response = client.get(f"/groups/{group['id']}/messages/stream", headers=outsider)
+    assert response.status_code == 403
+
+
+def test_unread_streams_do_not_hold_a_slot(sse_app):
+    client = sse_app.test_client()
+    headers = register(client, "head@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages/stream"
+
+    # HEAD ما يقرأ الـ body أبد
+    for _ in range(3):
+        assert client.head(url, headers=headers).status_code == 200
+    assert hub.active_streams == 0
+
+    # رد انرمى بدون ما أحد يقرأه
+    dropped = client.get(url, headers=headers, buffered=False)
+    assert dropped.status_code == 200
+    dropped.close()
+    assert hub.active_streams == 0
+
+    response = client.get(url, headers=headers, buffered=False)
+    try:
+        assert response.status_code == 200
+    finally:
+        response.close()
+
+
+def test_stream_pages_through_a_long_backlog(sse_app, monkeypatch):
+    import routes.messages
+
+    monkeypatch.setattr(routes.messages, "MAX_PAGE_SIZE", 2)
+    client = sse_app.test_client()
+    headers = register(client, "backlog@example.com")
+    group = create_group(client, headers)
+    url = f"/groups/{group['id']}/messages"
+    ids = [
+        client.post(url, json={"content": f"m{i}"}, headers=headers).get_json()["id"]
+        for i in range(5)
+    ]
+
+    response = client.get(f"{url}/stream", headers={**headers, "Last-Event-ID": "0"}, buffered=False)
+    try:
+        stream = events(response)
+        received = [int(next_message(stream).split("\n")[0][4:]) for _ in ids]
+    finally:
+        response.close()
+    assert received == ids
@@ -0,0 +1,28 @@
+# backend/tests/test_startup.py
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_optional_subsystems_are_not_imported_at_boot():
+    # process جديد: الموديولات اللي استوردتها اختبارات ثانية ما تأثر
+    code = (
+        "import sys, extensions; "
+        "print(','.join(m for m in ('multiprocessing', 'sqlite3', 'cProfile', 'pstats') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_startup_phases_are_reported(make_app):
+    app = make_app(HEALTH_TOKEN="t")
+    report = app.extensions["startup"]
+    assert {"imports", "config", "routes"} <= set(report["phases_ms"])
+    assert report["total_ms"] > 0
+
+    response = app.test_client().get("/health/startup", headers={"Authorization": "Bearer t"})
+    assert response.get_json() == report
@@ -0,0 +1,102 @@
+# backend/tests/test_streaming.py
+import gzip
+import json
+
+import pytest
+from sqlalchemy import insert
+
+from extensions import db
+from helpers import create_group, register
+from models.task import Task
+from streaming import json_array
+
+
+def seed_tasks(app, client, count):
+    headers = register(client, "stream-json@example.com")
+    group = create_group(client, headers)
+    with app.app_context():
+        db.session.execute(
+            insert(Task),
+            [{"group_id": group["id"], "title": f"Task {i} " + "x" * 40, "is_done": False} for i in range(count)],
+        )
+        db.session.commit()
+    return headers, f"/groups/{group['id']}/tasks"
+
+
+def test_json_array_matches_json_dumps():
+    items = [{"id": i, "name": f"n{i}"} for i in range(50)]
+    chunks = list(json_array(iter(items), json.dumps, chunk_bytes=100))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 200 for chunk in chunks)
+    assert json.loads(b"".join(chunks)) == items
+    assert b"".join(json_array([], json.dumps, chunk_bytes=100)) == b"[]\n"
+
+
+def test_large_list_is_gzipped(make_app):
+    app = make_app(COMPRESS_ENCODINGS="gzip", JSON_STREAM_YIELD_PER="50")
+    client = app.test_client()
+    headers, url = seed_tasks(app, client, 300)
+
+    plain = client.get(url, headers=headers)
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.get_json()) == 300
+
+    with client.get(url, headers={**headers, "Accept-Encoding": "gzip"}) as compressed:
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in compressed.headers["Vary"]
+        assert compressed.is_streamed
+        body = compressed.get_data()
+    assert len(body) < len(plain.data)
+    assert json.loads(gzip.decompress(body)) == plain.get_json()
+
+
+def test_small_list_is_not_compressed(app, client):
+    headers, url = seed_tasks(app, client, 1)
+
+    response = client.get(url, headers={**headers, "Accept-Encoding": "gzip, br"})
+    assert "Content-Encoding" not in response.headers
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert len(response.get_json()) == 1
+
+
+def test_brotli_when_available(make_app):
+    brotli = pytest.importorskip("brotli")
+    app = make_app(COMPRESS_MIN_BYTES="100")
+    client = app.test_client()
+    headers, url = seed_tasks(app, client, 50)
+
+    response = client.get(url, headers={**headers, "Accept-Encoding": "gzip;q=0.5, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert len(json.loads(brotli.decompress(response.data))) == 50
+
+
+def test_stream_returns_its_connection(app, client):
+    headers, url = seed_tasks(app, client, 200)
+
+    with app.app_context():
+        pool = db.engine.pool
+    response = client.get(url, headers=headers, buffered=False)
+    assert pool.checkedout() == 1  # الـ cursor مفتوح لين نقرأ الرد
+    assert len(json.loads(response.get_data())) == 200
+    response.close()
+    assert pool.checkedout() == 0
+
+
+def test_unread_stream_returns_its_connection(make_app):
+    app = make_app(SQL_QUERY_BUDGETS="tasks.list_tasks=1", SQL_QUERY_BUDGET_ENFORCE="1")
+    client = app.test_client()
+    headers, url = seed_tasks(app, client, 10)
+    with app.app_context():
+        pool = db.engine.pool
+
+    # HEAD: الـ server ما يقرأ الـ body، بس يسكّر الرد
+    head = client.head(url, headers=headers)
+    head.close()
+    assert pool.checkedout() == 0
+
+    # الـ budget يبدّل الرد بـ 500 بعد ما الـ view فتح الـ stream
+    over = client.get(url, headers=headers)
+    assert over.status_code == 500
+    over.close()
+    assert pool.checkedout() == 0
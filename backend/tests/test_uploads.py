@@ -0,0 +1,116 @@
+# backend/tests/test_uploads.py
+import hashlib
+import os
+
+from helpers import create_group, join_group, register
+from storage import partial_path
+
+CONTENT = b"hello resumable world " * 100
+
+
+def start(client, headers, group_id, size=len(CONTENT), name="notes.txt"):
+    response = client.post(
+        f"/groups/{group_id}/uploads", json={"filename": name, "size": size}, headers=headers
+    )
+    assert response.status_code == 201
+    return response.headers["Location"]
+
+
+def put(client, headers, url, offset, chunk):
+    return client.put(url, data=chunk, headers={**headers, "Upload-Offset": str(offset)})
+
+
+def upload(client, headers, group_id, content=CONTENT, name="notes.txt"):
+    url = start(client, headers, group_id, size=len(content), name=name)
+    assert put(client, headers, url, 0, content).status_code == 200
+    response = client.post(url + "/complete", headers=headers)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_chunked_upload_resumes_from_reported_offset(app, client):
+    headers = register(client, "uploader@example.com")
+    group = create_group(client, headers)
+    url = start(client, headers, group["id"])
+
+    assert put(client, headers, url, 0, CONTENT[:1000]).headers["Upload-Offset"] == "1000"
+
+    # انقطاع: العميل يسأل وين وقف ويكمّل من هناك
+    status = client.get(url, headers=headers)
+    assert status.status_code == 200
+    assert status.get_json()["offset"] == 1000
+    assert status.headers["Upload-Offset"] == "1000"
+
+    # offset غلط → 409 مع الـ offset الصحيح
+    wrong = put(client, headers, url, 500, CONTENT[500:])
+    assert wrong.status_code == 409
+    assert wrong.headers["Upload-Offset"] == "1000"
+    assert put(client, headers, url, 1000, CONTENT[1000:] + b"!").status_code == 400
+    assert client.put(url, data=b"x", headers=headers).status_code == 400
+
+    # ما نكمّل قبل ما يوصل الحجم المعلن
+    assert client.post(url + "/complete", headers=headers).status_code == 409
+
+    assert put(client, headers, url, 1000, CONTENT[1000:]).status_code == 200
+    done = client.post(url + "/complete", headers=headers)
+    assert done.status_code == 201
+    body = done.get_json()
+    assert body["size"] == len(CONTENT)
+    assert body["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+    with open(os.path.join(app.config["UPLOAD_FOLDER"], body["filename"]), "rb") as f:
+        assert f.read() == CONTENT
+    assert client.get(url, headers=headers).status_code == 404
+
+
+def test_identical_content_is_stored_once(app, client):
+    headers = register(client, "dedupe@example.com")
+    group = create_group(client, headers)
+
+    first = upload(client, headers, group["id"], name="a.txt")
+    second = upload(client, headers, group["id"], name="b.txt")
+
+    assert first["id"] != second["id"]
+    assert (first["name"], second["name"]) == ("a.txt", "b.txt")
+    assert first["filename"] == second["filename"]
+    objects = os.path.join(app.config["UPLOAD_FOLDER"], "objects", first["sha256"][:2])
+    assert os.listdir(objects) == [first["sha256"]]
+
+    other = upload(client, headers, group["id"], content=b"different", name="c.txt")
+    assert other["filename"] != first["filename"]
+
+
+def test_chunk_limits(make_app):
+    app = make_app(UPLOAD_CHUNK_MAX="16")
+    client = app.test_client()
+    headers = register(client, "limits@example.com")
+    group = create_group(client, headers)
+    url = start(client, headers, group["id"], size=64)
+
+    assert put(client, headers, url, 0, b"x" * 17).status_code == 413
+    assert put(client, headers, url, 0, b"x" * 16).headers["Upload-Offset"] == "16"
+
+
+def test_cancel_removes_the_partial_file(app, client):
+    headers = register(client, "cancel@example.com")
+    group = create_group(client, headers)
+    url = start(client, headers, group["id"])
+    upload_id = url.rsplit("/", 1)[1]
+    assert put(client, headers, url, 0, CONTENT[:10]).status_code == 200
+
+    partial = partial_path(app.config["UPLOAD_FOLDER"], upload_id)
+    assert os.path.getsize(partial) == 10
+
+    assert client.delete(url, headers=headers).status_code == 200
+    assert not os.path.exists(partial)
+    assert client.get(url, headers=headers).status_code == 404
+
+
+def test_uploads_are_private_to_their_owner(client):
+    owner = register(client, "owner-up@example.com")
+    group = create_group(client, owner)
+    url = start(client, owner, group["id"])
+
+    other = register(client, "other-up@example.com")
+    join_group(client, other, group)
+    assert client.get(url, headers=other).status_code == 404
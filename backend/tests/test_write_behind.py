@@ -0,0 +1,91 @@
+# backend/tests/test_write_behind.py
+import threading
+import time
+
+import pytest
+
+from extensions import batcher, db
+from helpers import create_group, register
+
+
+@pytest.fixture
+def batched_app(make_app):
+    return make_app(MESSAGE_WRITE_BEHIND="1", MESSAGE_BATCH_SIZE="8", MESSAGE_BATCH_LATENCY_MS="50")
+
+
+def test_concurrent_messages_get_their_own_ids(batched_app):
+    client = batched_app.test_client()
+    headers = register(client, "writer@example.com")
+    group = create_group(client, headers)
+
+    results = {}
+
+    def post(i):
+        response = batched_app.test_client().post(
+            f"/groups/{group['id']}/messages", json={"content": f"message {i}"}, headers=headers
+        )
+        results[i] = response
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(24)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    failed = {i: (r.status_code, r.get_json()) for i, r in results.items() if r.status_code != 201}
+    assert failed == {}
+
+    stored = client.get(f"/groups/{group['id']}/messages?limit=100", headers=headers).get_json()
+    content_by_id = {message["id"]: message["content"] for message in stored}
+    assert len(content_by_id) == 24
+    for i, response in results.items():
+        body = response.get_json()
+        assert body["content"] == f"message {i}"
+        assert content_by_id[body["id"]] == f"message {i}"
+
+    assert batcher.stats()["max_batch_size"] > 1
+
+
+def test_timed_out_message_is_never_written(make_app):
+    app = make_app(MESSAGE_WRITE_BEHIND="1", MESSAGE_BATCH_SIZE="1000", MESSAGE_BATCH_LATENCY_MS="1000")
+    client = app.test_client()
+    headers = register(client, "slow@example.com")
+    group = create_group(client, headers)
+    timed_out = batcher.timed_out
+
+    with app.app_context():
+        with pytest.raises(TimeoutError):
+            batcher.submit(group["id"], "lost", timeout=0.05)
+        assert batcher.timed_out == timed_out + 1
+        assert batcher.stats()["buffered"] == 0
+
+        # الـ flusher يكمّل عادي بعد ما انشالت الرسالة من تحته
+        row = batcher.submit(group["id"], "kept", timeout=5)
+
+    stored = client.get(f"/groups/{group['id']}/messages", headers=headers).get_json()
+    assert [message["content"] for message in stored] == ["kept"]
+    assert stored[0]["id"] == row["id"]
+
+
+def test_waiting_requests_do_not_hold_connections(make_app):
+    app = make_app(MESSAGE_WRITE_BEHIND="1", MESSAGE_BATCH_SIZE="1000", MESSAGE_BATCH_LATENCY_MS="300")
+    client = app.test_client()
+    headers = register(client, "pool@example.com")
+    group = create_group(client, headers)
+    with app.app_context():
+        pool = db.engine.pool
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(
+        app.test_client().post(f"/groups/{group['id']}/messages", json={"content": "hi"}, headers=headers)
+    ))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not batcher.stats()["buffered"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # الطلب ينتظر الـ flush بدون ما يحجز connection
+    assert batcher.stats()["buffered"] == 1
+    assert pool.checkedout() == 0
+    thread.join()
+    assert results[0].status_code == 201
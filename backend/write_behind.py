@@ -0,0 +1,202 @@
+# backend/write_behind.py
+import os
+import threading
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, bindparam, insert, text
+
+# جدول الرسائل ما له موديل (ينشئه migration 0001) — metadata خاصة عشان ما يدخل create_all
+MESSAGES = Table(
+    "messages",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("group_id", Integer, nullable=False),
+    Column("content", Text, nullable=False),
+    Column("created_at"),  # بدون نوع: نفس القيمة اللي يرجعها الـ driver (نص في SQLite)
+)
+
+
+class PendingMessage:
+    """رسالة تنتظر الـ flush اللي يكتبها فعلياً في قاعدة البيانات"""
+
+    def __init__(self, group_id: int, content: str):
+        self.group_id = group_id
+        self.content = content
+        self.done = threading.Event()
+        self.row = None
+        self.error = None
+
+
+class MessageBatcher:
+    """
+    Write-behind للرسائل: الطلبات تحط الرسالة في buffer، و thread واحد
+    يكتبها كلها بـ INSERT واحد متعدد الصفوف + commit واحد كل N رسالة
+    أو كل M ملّي ثانية. الطلب ما يرجع إلا بعد الـ flush اللي يغطي رسالته.
+    """
+
+    def __init__(self, batch_size: int = 50, max_latency_ms: int = 20):
+        self.enabled = False
+        self.batch_size = batch_size
+        self.max_latency_ms = max_latency_ms
+        self.app = None
+        self.db = None
+
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._thread = None
+        self._pid = None
+
+        self.flush_count = 0
+        self.messages_flushed = 0
+        self.max_batch_size = 0
+        self.flush_seconds_total = 0.0
+        self.max_flush_seconds = 0.0
+        self.failed_flushes = 0
+        self.timed_out = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get("MESSAGE_WRITE_BEHIND", self.enabled)
+        self.batch_size = app.config.get("MESSAGE_BATCH_SIZE", self.batch_size)
+        self.max_latency_ms = app.config.get("MESSAGE_BATCH_LATENCY_MS", self.max_latency_ms)
+        self.app = app
+        self.db = app.extensions["sqlalchemy"]
+        app.extensions["message_batcher"] = self
+
+    # ---------- Public ----------
+
+    def submit(self, group_id: int, content: str, timeout: float = 10.0):
+        """
+        يرجع صف الرسالة (id, created_at) بعد ما تنكتب فعلياً.
+        TimeoutError = الرسالة ما انكتبت ولا بتنكتب (نشيلها من الـ buffer)، فالعميل يعيد بأمان.
+        """
+        pending = PendingMessage(group_id, content)
+
+        with self._cond:
+            self._ensure_thread()
+            self._buffer.append(pending)
+            # أول رسالة تصحّي الـ thread (يبدأ يعد الـ latency)، والـ batch الكامل يـ flush على طول
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+        if not pending.done.wait(timeout):
+            with self._cond:
+                if pending in self._buffer:
+                    self._buffer.remove(pending)
+                    self.timed_out += 1
+                    raise TimeoutError("message flush timed out")
+            # الـ flush أخذها وهو شغّال — نتيجته (commit أو rollback) جاية، ننتظرها
+            # بدل ما نرجع خطأ والرسالة تنكتب بعدين (العميل يعيد = رسالة مكررة)
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.row
+
+    def stats(self) -> dict:
+        flushes = self.flush_count or 1
+        return {
+            "enabled": self.enabled,
+            "batch_size_limit": self.batch_size,
+            "max_latency_ms": self.max_latency_ms,
+            "flush_count": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "timed_out": self.timed_out,
+            "messages_flushed": self.messages_flushed,
+            "avg_batch_size": self.messages_flushed / flushes,
+            "max_batch_size": self.max_batch_size,
+            "avg_flush_ms": self.flush_seconds_total * 1000 / flushes,
+            "max_flush_ms": self.max_flush_seconds * 1000,
+            "buffered": len(self._buffer),
+        }
+
+    def metric_samples(self) -> list:
+        """نفس أرقام stats() لـ /metrics (metrics.add_collector)"""
+        return [
+            ("message_batch_size", "summary", "Messages written per write-behind flush.",
+             (self.messages_flushed, self.flush_count)),
+            ("message_batch_flush_seconds", "summary", "Time spent writing one write-behind batch.",
+             (self.flush_seconds_total, self.flush_count)),
+            ("message_batch_failed_flushes_total", "counter", "Write-behind flushes that were rolled back.",
+             self.failed_flushes),
+            ("message_batch_timed_out_total", "counter", "Messages whose request gave up waiting for a flush.",
+             self.timed_out),
+            ("message_batch_queue_depth", "gauge", "Messages waiting for the next write-behind flush.",
+             len(self._buffer)),
+        ]
+
+    # ---------- Flusher thread ----------
+
+    def _ensure_thread(self):
+        # بعد fork (gunicorn --preload) الـ thread ما ينتقل للـ worker، نشغّل واحد جديد
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(
+            target=self._run, name="message-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+
+                # ننتظر لين يكتمل الـ batch أو يخلص وقت أول رسالة
+                deadline = time.monotonic() + self.max_latency_ms / 1000
+                while len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._buffer[: self.batch_size]
+                del self._buffer[: self.batch_size]
+                if not batch:
+                    continue  # اللي كانوا ينتظرون خلص وقتهم وانشالوا
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+
+        db = self.db
+        with self.app.app_context():
+            try:
+                # sort_by_parameter_order: كل صف يرجع لصاحبه (ترتيب RETURNING مو مضمون).
+                # PostgreSQL: INSERT واحد مرتب بالـ id؛ SQLite: INSERT لكل صف بنفس الـ transaction
+                rows = db.session.execute(
+                    insert(MESSAGES).returning(
+                        MESSAGES.c.id, MESSAGES.c.created_at, sort_by_parameter_order=True
+                    ),
+                    [{"group_id": p.group_id, "content": p.content} for p in batch],
+                ).mappings().all()
+
+                # نسخة قائمة الرسائل (ETag) لكل قروب في الـ batch
+                db.session.execute(
+                    text(
+                        'UPDATE "group" SET messages_version = messages_version + 1 '
+                        "WHERE id IN :group_ids"
+                    ).bindparams(bindparam("group_ids", expanding=True)),
+                    {"group_ids": sorted({p.group_id for p in batch})},
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.failed_flushes += 1
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                return
+            finally:
+                db.session.remove()
+
+        for pending, row in zip(batch, rows):
+            pending.row = row
+            pending.done.set()
+
+        elapsed = time.perf_counter() - started
+        self.flush_count += 1
+        self.messages_flushed += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.flush_seconds_total += elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
@@ -20,11 +20,22 @@ export async function authFetch(path, options = {}) {
     headers["Authorization"] = `Bearer ${token}`;
   }
 
+  // read-your-writes: نرجّع وقت آخر كتابة عشان السيرفر يقرأ من الـ primary
+  const lastWrite = localStorage.getItem("vsgp_last_write");
+  if (lastWrite) {
+    headers["X-Last-Write"] = lastWrite;
+  }
+
   const res = await fetch(`${API_BASE}${path}`, {
     ...options,
     headers,
   });
 
+  const written = res.headers.get("X-Last-Write");
+  if (written) {
+    localStorage.setItem("vsgp_last_write", written);
+  }
+
   if (!res.ok) {
     let data = {};
     try {